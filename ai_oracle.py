@@ -1,29 +1,184 @@
 # ai_oracle.py - Machine Learning Price Prediction Engine
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from santander_bot.core.tracing import stage
+except ImportError:  # Uruchomione bez pakietu santander_bot (np. szybki test poniżej)
+    from contextlib import nullcontext
+
+    def stage(name, **attributes):
+        return nullcontext()
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Hiperparametry modelu + okna cech; nadpisywane wynikiem strojenia (oracle_tuning.py)
+DEFAULT_CONFIG = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'min_samples_leaf': 1,
+    'max_features': 'sqrt',
+    'sma_fast': 5,
+    'sma_mid': 10,
+    'sma_slow': 20,
+    'rsi_window': 14,
+    'momentum_short': 5,
+    'momentum_long': 10,
+    'volatility_window': 10,
+    'volume_window': 10,
+    'horizon': 3,           # Cel: czy cena wzrośnie w ciągu `horizon` sesji
+}
+MODEL_KEYS = ('n_estimators', 'max_depth', 'min_samples_leaf', 'max_features')
+FEATURE_KEYS = tuple(k for k in DEFAULT_CONFIG if k not in MODEL_KEYS)
+
+# Tryb online (SANTANDER_ORACLE_ONLINE=1): SGD partial_fit zamiast RandomForest od zera co snapshot
+ORACLE_ONLINE = os.getenv("SANTANDER_ORACLE_ONLINE", "").lower() in ("1", "true", "yes")
+FEATURE_WARMUP = 150    # wiersze historii przed nowymi świecami - rozbieg okien i EMA dla cech przyrostowych
+REFIT_WINDOW = 500      # ostatnie oznaczone wiersze - materiał do pełnego refitu po dryfie
+
+# Horyzonty (sesje) wspólnego modelu dashboardu - jeden las wielowyjściowy na jednej macierzy cech;
+# SANTANDER_ORACLE_HORIZONS="3" = las jednowyjściowy (jak klasyczny model, cel tylko z rozstrzygniętych wierszy)
+ORACLE_HORIZONS = tuple(sorted({int(h) for h in os.getenv("SANTANDER_ORACLE_HORIZONS", "1,3,5,10").split(",")
+                                if h.strip()}))
+
+ORACLE_CONFIG_PATH = os.getenv(
+    "SANTANDER_ORACLE_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "oracle_config.json")
+)
+
+
+def _read_tuned(path=None):
+    try:
+        with open(path or ORACLE_CONFIG_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_tuned_config(ticker=None, path=None):
+    """DEFAULT_CONFIG nadpisany sekcją 'pooled', a potem 'tickers'[ticker] z pliku strojenia"""
+    tuned = _read_tuned(path)
+    config = dict(DEFAULT_CONFIG)
+    for section in (tuned.get('pooled'), tuned.get('tickers', {}).get(ticker) if ticker else None):
+        if section:
+            config.update({k: v for k, v in section.items() if k in DEFAULT_CONFIG})
+    return config
+
+
+def tuned_tickers(path=None):
+    """Tickery z własną (nie wspólną) konfiguracją"""
+    return set(_read_tuned(path).get('tickers', {}))
+
+
+def data_fingerprint(df):
+    """Tani odcisk danych OHLCV: (ostatni timestamp, długość, crc32 wartości OHLCV)"""
+    values = np.ascontiguousarray(df[OHLCV].to_numpy(dtype=np.float64))
+    return df.index[-1], len(df), zlib.crc32(values.tobytes())
+
+
+class FeatureCache:
+    """
+    LRU macierzy cech (X, y) z limitem pamięci, klucz = data_fingerprint()
+
+    Wspólny dla wszystkich instancji AIOracleEngine (FEATURE_CACHE), więc rerun
+    dashboardu na tych samych historiach nie przelicza cech od nowa.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # klucz -> (X, y, nbytes)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sizeof(X, y):
+        if X is None:
+            return 0
+        return int(X.memory_usage(index=True).sum()) + int(y.nbytes)
+
+    def get_or_create(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+            self.misses += 1
+
+        X, y = build()  # Poza lockiem - równoległe przebiegi nie czekają na siebie
+        size = self._sizeof(X, y)
+        if size > self.max_bytes:
+            return X, y
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (X, y, size)
+                self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+        return X, y
+
+    def info(self):
+        """Liczniki jak functools.lru_cache().cache_info() + zajęta pamięć"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'nbytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+FEATURE_CACHE = FeatureCache()
+
+
 class AIOracleEngine:
     """
     AI Oracle - ML-powered price movement predictor
     Używa Random Forest do klasyfikacji wzrostu/spadku na podstawie wskaźników technicznych
     """
     
-    def __init__(self):
+    def __init__(self, config=None, ticker=None, feature_cache=None, n_jobs=-1):
+        # sklearn ładowany leniwie - import modułu nie kosztuje startu dashboardu
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+
+        # Jawny config (strojenie) albo wynik strojenia dla tickera / wspólny
+        self.config = {**DEFAULT_CONFIG, **config} if config else load_tuned_config(ticker)
         self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
+            **{k: self.config[k] for k in MODEL_KEYS},
             random_state=42,
-            n_jobs=-1
+            n_jobs=n_jobs
         )
         self.scaler = StandardScaler()
         self.is_trained = False
+        self.feature_cache = feature_cache or FEATURE_CACHE
+        self.feature_params = tuple(self.config[k] for k in FEATURE_KEYS)
     
     def create_features(self, df):
-        """Tworzy features z danych OHLCV + wskaźników"""
+        """Tworzy features z danych OHLCV + wskaźników (memoizowane po odcisku danych)"""
         if df.empty or len(df) < 30:
             return None, None
         
@@ -31,6 +186,19 @@ class AIOracleEngine:
         if isinstance(df.columns, pd.MultiIndex):
             df.columns = df.columns.droplevel(1)
         
+        # Okna cech w kluczu: trial strojenia z tymi samymi oknami trafia w cache
+        key = (data_fingerprint(df), self.feature_params)
+        return self.feature_cache.get_or_create(key, lambda: self._build_features(df))
+
+    def cache_info(self):
+        return self.feature_cache.info()
+
+    def _build_features(self, df):
+        with stage("compute.features", rows=len(df)):
+            return self._feature_matrix(df)
+
+    def _feature_matrix(self, df):
+        c = self.config
         features = pd.DataFrame(index=df.index)
         
         # Price features
@@ -40,15 +208,15 @@ class AIOracleEngine:
         features['close_open_spread'] = ((df['Close'] - df['Open']) / df['Open']).values
         
         # Moving averages
-        features['sma5'] = df['Close'].rolling(5).mean().values
-        features['sma10'] = df['Close'].rolling(10).mean().values
-        features['sma20'] = df['Close'].rolling(20).mean().values
-        features['sma_ratio_5_20'] = (features['sma5'] / features['sma20']).values
+        features['sma_fast'] = df['Close'].rolling(c['sma_fast']).mean().values
+        features['sma_mid'] = df['Close'].rolling(c['sma_mid']).mean().values
+        features['sma_slow'] = df['Close'].rolling(c['sma_slow']).mean().values
+        features['sma_ratio_fast_slow'] = (features['sma_fast'] / features['sma_slow']).values
         
         # RSI
         delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+        gain = (delta.where(delta > 0, 0)).rolling(c['rsi_window']).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(c['rsi_window']).mean()
         rs = gain / loss
         features['rsi'] = (100 - (100 / (1 + rs))).values
         
@@ -62,32 +230,21 @@ class AIOracleEngine:
         features['macd_diff'] = (macd - macd_signal).values
         
         # Momentum
-        features['momentum_5'] = df['Close'].pct_change(5).values
-        features['momentum_10'] = df['Close'].pct_change(10).values
+        features['momentum_short'] = df['Close'].pct_change(c['momentum_short']).values
+        features['momentum_long'] = df['Close'].pct_change(c['momentum_long']).values
         
         # Volatility
-        vol_std = df['Close'].rolling(10).std()
-        vol_mean = df['Close'].rolling(10).mean()
+        vol_std = df['Close'].rolling(c['volatility_window']).std()
+        vol_mean = df['Close'].rolling(c['volatility_window']).mean()
         features['volatility'] = (vol_std / vol_mean).values
         
         # Volume trend
-        volume_sma = df['Volume'].rolling(10).mean()
+        volume_sma = df['Volume'].rolling(c['volume_window']).mean()
         features['volume_sma'] = volume_sma.values
         features['volume_ratio'] = (df['Volume'] / volume_sma).values
         
-        # Target: Czy cena wzrośnie w ciągu następnych 3 dni?
-        features['target'] = (df['Close'].shift(-3) > df['Close']).astype(int).values
-        
-        # Drop NaN
-        features = features.dropna()
-        
-        if features.empty:
-            return None, None
-        
-        X = features.drop('target', axis=1)
-        y = features['target']
-        
-        return X, y
+        # Target: Czy cena wzrośnie w ciągu następnych `horizon` dni?
+        features['target'] = (df['Close'].shift(-c['horizon']) > df['Close']).astype(int).values
         
         # Drop NaN
         features = features.dropna()
@@ -107,15 +264,20 @@ class AIOracleEngine:
         if X is None or len(X) < 50:
             return False
         
-        # Normalizacja
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Trening
-        self.model.fit(X_scaled, y)
-        self.is_trained = True
-        
-        # Accuracy na training set (dla informacji)
-        train_score = self.model.score(X_scaled, y)
+        return self.fit(X, y)
+
+    def fit(self, X, y):
+        """Normalizacja + trening na gotowej macierzy cech; zwraca accuracy na zbiorze treningowym"""
+        with stage("model.train", rows=len(X)):
+            # Normalizacja
+            X_scaled = self.scaler.fit_transform(X)
+            
+            # Trening
+            self.model.fit(X_scaled, y)
+            self.is_trained = True
+            
+            # Accuracy na training set (dla informacji)
+            train_score = self.model.score(X_scaled, y)
         return train_score
     
     def predict(self, current_data):
@@ -156,12 +318,13 @@ class AIOracleEngine:
         # Bierzemy tylko ostatni wiersz (najnowsze dane)
         X_latest = X.iloc[-1:].copy()
         
-        # Normalizacja
-        X_scaled = self.scaler.transform(X_latest)
-        
-        # Predykcja
-        prediction = self.model.predict(X_scaled)[0]
-        probabilities = self.model.predict_proba(X_scaled)[0]
+        with stage("model.predict"):
+            # Normalizacja
+            X_scaled = self.scaler.transform(X_latest)
+            
+            # Predykcja
+            prediction = self.model.predict(X_scaled)[0]
+            probabilities = self.model.predict_proba(X_scaled)[0]
         
         prob_down = probabilities[0] * 100
         prob_up = probabilities[1] * 100
@@ -202,8 +365,316 @@ class AIOracleEngine:
         return predictions
 
 
+def horizon_targets(close, horizons):
+    """[n, len(horizons)]: 1.0 gdy Close za h sesji > Close, NaN gdy t+h wykracza poza dane"""
+    values = np.asarray(close, dtype=np.float64)
+    targets = np.full((len(values), len(horizons)), np.nan)
+    for k, h in enumerate(horizons):
+        if h < len(values):
+            targets[:-h, k] = values[h:] > values[:-h]
+    return targets
+
+
+class MultiHorizonOracleEngine(AIOracleEngine):
+    """
+    AI Oracle dla kilku horyzontów naraz
+
+    - macierz cech budowana raz (ten sam klucz FEATURE_CACHE co AIOracleEngine z tymi
+      samymi oknami); cele dla wszystkich horyzontów to tanie przesunięcia Close
+    - jeden RandomForest wielowyjściowy: wspólne podziały drzew dla wszystkich horyzontów,
+      koszt treningu zbliżony do jednego horyzontu
+    - uczy się tylko na wierszach z rozstrzygniętym celem najdłuższego horyzontu
+    - predict() zwraca pola jak AIOracleEngine (dla config['horizon']) + 'horizons': {h: P(wzrost) %}
+    """
+
+    def __init__(self, horizons=ORACLE_HORIZONS, config=None, ticker=None, feature_cache=None, n_jobs=-1):
+        super().__init__(config=config, ticker=ticker, feature_cache=feature_cache, n_jobs=n_jobs)
+        self.horizons = tuple(sorted(set(horizons) | {self.config['horizon']}))
+
+    def targets(self, df, X):
+        """Cele horyzontów wyrównane do wierszy macierzy cech"""
+        return horizon_targets(df['Close'], self.horizons)[df.index.get_indexer(X.index)]
+
+    def train(self, historical_data):
+        X, _ = self.create_features(historical_data)
+        if X is None:
+            return False
+        Y = self.targets(historical_data, X)
+        labeled = ~np.isnan(Y).any(axis=1)
+        if labeled.sum() < 50:
+            return False
+        Y = Y[labeled].astype(int)
+        return self.fit(X[labeled], Y if Y.shape[1] > 1 else Y[:, 0])
+
+    def predict_horizons(self, X_latest):
+        """{h: P(wzrost) w %} dla wiersza cech"""
+        with stage("model.predict", horizons=len(self.horizons)):
+            probabilities = self.model.predict_proba(self.scaler.transform(X_latest))
+        classes_ = self.model.classes_
+        if len(self.horizons) == 1:  # Las jednowyjściowy: classes_ / predict_proba bez listy per wyjście
+            classes_, probabilities = [classes_], [probabilities]
+        result = {}
+        for h, classes, proba in zip(self.horizons, classes_, probabilities):
+            up = proba[0][list(classes).index(1)] if 1 in classes else 0.0  # Horyzont bez wzrostów w treningu
+            result[h] = round(float(up) * 100, 1)
+        return result
+
+    def predict(self, current_data):
+        if not self.is_trained and not self.train(current_data):
+            return {'prediction': 'NEUTRAL', 'confidence': 0, 'probability_up': 50, 'probability_down': 50,
+                    'horizons': {}, 'error': 'Insufficient data for training'}
+
+        X, _ = self.create_features(current_data)
+        if X is None or X.empty:
+            return {'prediction': 'NEUTRAL', 'confidence': 0, 'probability_up': 50, 'probability_down': 50,
+                    'horizons': {}, 'error': 'Insufficient features'}
+
+        horizons = self.predict_horizons(X.iloc[-1:])
+        prob_up = horizons[self.config['horizon']]
+        confidence = max(prob_up, 100 - prob_up)
+        return {
+            'prediction': 'UP' if prob_up > 50 else 'DOWN',
+            'confidence': round(confidence, 1),
+            'probability_up': prob_up,
+            'probability_down': round(100 - prob_up, 1),
+            'signal_strength': 'STRONG' if confidence > 70 else 'MODERATE' if confidence > 60 else 'WEAK',
+            'horizons': horizons,
+        }
+
+
+class PageHinkley:
+    """Test Page-Hinkley: wykrywa wzrost średniej strumienia (tu: błędów predykcji 0/1)"""
+
+    def __init__(self, delta=0.02, threshold=30.0, min_samples=30):
+        self.delta = delta
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.cumulative = 0.0
+        self.minimum = 0.0
+
+    def update(self, x):
+        """True = dryf (i reset stanu)"""
+        self.n += 1
+        self.mean += (x - self.mean) / self.n
+        self.cumulative += x - self.mean - self.delta
+        self.minimum = min(self.minimum, self.cumulative)
+        if self.n >= self.min_samples and self.cumulative - self.minimum > self.threshold:
+            self.reset()
+            return True
+        return False
+
+
+class OnlineOracleEngine(AIOracleEngine):
+    """
+    AI Oracle w trybie online
+
+    - uczeń z partial_fit (SGD, regresja logistyczna) + skaler z partial_fit
+    - update(ticker, df) dokłada tylko wiersze, których cel (`horizon` sesji) właśnie
+      się rozstrzygnął; cechy liczone z ogona historii (FEATURE_WARMUP), więc koszt
+      na świecę jest stały, niezależny od długości historii
+    - przed nauką wiersz jest oceniany (prequential); błędy zasilają Page-Hinkley,
+      a wykryty dryf = pełny refit na ostatnich REFIT_WINDOW wierszach
+    """
+
+    def __init__(self, config=None, ticker=None, feature_cache=None, alpha=1e-3, refit_window=REFIT_WINDOW):
+        super().__init__(config=config, ticker=ticker, feature_cache=feature_cache, n_jobs=1)
+        self.alpha = alpha
+        self.model = self._new_model()
+        self.detector = PageHinkley()
+        self.recent = deque(maxlen=refit_window)  # (wiersz cech, cel)
+        self.labeled_until = {}                   # ticker -> ostatni wchłonięty timestamp
+        self.absorbed = 0
+        self.refits = 0
+        self.drifts = 0
+
+    def _new_model(self):
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(loss="log_loss", alpha=self.alpha, random_state=42)
+
+    def fit(self, X, y):
+        """Pełny refit (start albo dryf): nowy skaler i model od zera"""
+        from sklearn.preprocessing import StandardScaler
+
+        with stage("model.train", rows=len(X), mode="online"):
+            self.scaler = StandardScaler()
+            X_scaled = self.scaler.fit_transform(X)
+            self.model = self._new_model()
+            self.model.fit(X_scaled, y)
+            self.is_trained = True
+            self.recent.extend(zip(X.to_numpy(), y.to_numpy()))
+            self.refits += 1
+            return self.model.score(X_scaled, y)
+
+    def train(self, historical_data):
+        """Jak w AIOracleEngine, ale bez ostatnich `horizon` wierszy - ich cel nie jest jeszcze znany"""
+        X, y = self.create_features(historical_data)
+        horizon = self.config['horizon']
+        if X is None or len(X) - horizon < 50:
+            return False
+        return self.fit(X.iloc[:-horizon], y.iloc[:-horizon])
+
+    def update(self, ticker, df):
+        """Wchłania nowo oznaczone wiersze tickera; zwraca ich liczbę"""
+        horizon = self.config['horizon']
+        if len(df) <= horizon:
+            return 0
+        resolved = df.index[-1 - horizon]
+        last = self.labeled_until.get(ticker)
+        if last is not None and last >= resolved:
+            return 0
+
+        if not self.is_trained:
+            if not self.train(df):
+                return 0
+            self.labeled_until[ticker] = resolved
+            return len(self.recent)
+
+        if last is None:
+            X, y = self.create_features(df)  # Nowy ticker we wspólnym modelu - jednorazowo cała historia
+        else:
+            new_rows = len(df) - 1 - horizon - df.index.searchsorted(last, side="right") + 1
+            X, y = self._feature_matrix(df.iloc[-(new_rows + horizon + FEATURE_WARMUP):])
+        if X is None:
+            return 0
+        mask = X.index <= resolved
+        if last is not None:
+            mask &= X.index > last
+        X_new, y_new = X[mask], y[mask]
+        self.labeled_until[ticker] = resolved
+        if X_new.empty:
+            return 0
+
+        with stage("model.update", rows=len(X_new), ticker=ticker):
+            X_scaled = self.scaler.transform(X_new)
+            errors = self.model.predict(X_scaled) != y_new.to_numpy()  # Ocena przed nauką
+            drift = False
+            for error in errors:
+                drift |= self.detector.update(float(error))
+            self.scaler.partial_fit(X_new)
+            self.model.partial_fit(self.scaler.transform(X_new), y_new, classes=[0, 1])
+            self.recent.extend(zip(X_new.to_numpy(), y_new.to_numpy()))
+            self.absorbed += len(X_new)
+
+        if drift and len(self.recent) >= 50:
+            self.drifts += 1
+            rows, targets = zip(*self.recent)
+            self.fit(pd.DataFrame(list(rows), columns=X_new.columns), pd.Series(targets))
+        return len(X_new)
+
+    def online_info(self):
+        return {"absorbed": self.absorbed, "refits": self.refits, "drifts": self.drifts,
+                "tickers": len(self.labeled_until), "window": len(self.recent)}
+
+
+def benchmark_online(tickers=20, sessions=500, start=200, seed=0):
+    """
+    Koszt aktualizacji modelu na sesję: RandomForest od zera (jak co snapshot) vs update() online,
+    przy rosnącej historii; na końcu czułość Page-Hinkley na skok błędu 0.4 -> 0.6
+    """
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "legacy_terminal_app"))
+    from santander_bot.strategies.sharded import synthetic_history
+
+    histories = {f"T{i:02d}": synthetic_history(f"T{i:02d}", periods=sessions) for i in range(tickers)}
+    online = OnlineOracleEngine(config=DEFAULT_CONFIG)
+    for t, df in histories.items():
+        online.update(t, df.iloc[:start])
+
+    print(f"{'sesja':>6}{'RF od zera ms':>16}{'online ms/świeca':>18}")
+    step = (sessions - start) // 5
+    for checkpoint in range(start + step, sessions + 1, step):
+        updates = []
+        for day in range(checkpoint - step + 1, checkpoint + 1):  # Świeca po świecy, jak kolejne snapshoty
+            for t, df in histories.items():
+                t0 = time.perf_counter()
+                online.update(t, df.iloc[:day])
+                updates.append(time.perf_counter() - t0)
+
+        batch = AIOracleEngine(config=DEFAULT_CONFIG, n_jobs=1)
+        t0 = time.perf_counter()
+        batch.train(histories["T00"].iloc[:checkpoint])
+        rf = time.perf_counter() - t0
+        print(f"{checkpoint:>6}{rf * 1000:>16.1f}{np.median(updates) * 1000:>18.2f}")
+    print(f"online: {online.online_info()}")
+
+    rng = np.random.default_rng(seed)
+    detector, alarms = PageHinkley(), []
+    for i, error in enumerate(np.r_[rng.random(1000) < 0.4, rng.random(1000) < 0.6]):
+        if detector.update(float(error)):
+            alarms.append(i)
+    print(f"Page-Hinkley: alarmy {alarms} (skok błędu w próbce 1000)")
+
+
+def benchmark_horizons(tickers=10, sessions=750, horizons=(1, 3, 5, 10), holdout=0.3):
+    """
+    Trening i trafność (balanced accuracy na ostatnich `holdout` wierszach) dla kilku horyzontów:
+    osobny AIOracleEngine na horyzont (każdy liczy cechy od nowa) vs jeden MultiHorizonOracleEngine
+    """
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "legacy_terminal_app"))
+    from sklearn.metrics import balanced_accuracy_score
+    from santander_bot.strategies.sharded import synthetic_history
+
+    histories = [synthetic_history(f"T{i:02d}", periods=sessions) for i in range(tickers)]
+    split = int(sessions * (1 - holdout))
+    timings = {"single (3d)": [], f"separate x{len(horizons)}": [], "multi-horizon": []}
+    scores = {"separate": {h: [] for h in horizons}, "multi": {h: [] for h in horizons}}
+
+    for df in histories:
+        train_df = df.iloc[:split]
+        FEATURE_CACHE.clear()
+        t0 = time.perf_counter()
+        AIOracleEngine(config=DEFAULT_CONFIG, n_jobs=1).train(train_df)
+        timings["single (3d)"].append(time.perf_counter() - t0)
+
+        FEATURE_CACHE.clear()
+        t0 = time.perf_counter()
+        separate = {h: AIOracleEngine(config={**DEFAULT_CONFIG, 'horizon': h}, n_jobs=1) for h in horizons}
+        for h, engine in separate.items():
+            engine.train(train_df)
+        timings[f"separate x{len(horizons)}"].append(time.perf_counter() - t0)
+
+        FEATURE_CACHE.clear()
+        t0 = time.perf_counter()
+        multi = MultiHorizonOracleEngine(horizons, config=DEFAULT_CONFIG, n_jobs=1)
+        multi.train(train_df)
+        timings["multi-horizon"].append(time.perf_counter() - t0)
+
+        X, _ = multi.create_features(df)
+        Y = multi.targets(df, X)
+        test = (X.index >= df.index[split]) & ~np.isnan(Y).any(axis=1)
+        X_test, Y_test = X[test], Y[test].astype(int)
+        predicted = multi.model.predict(multi.scaler.transform(X_test))
+        for k, h in enumerate(horizons):
+            scores["multi"][h].append(balanced_accuracy_score(Y_test[:, k], predicted[:, k]))
+            engine = separate[h]
+            scores["separate"][h].append(balanced_accuracy_score(
+                Y_test[:, k], engine.model.predict(engine.scaler.transform(X_test))))
+
+    print(f"{'tryb':<16}{'trening ms / ticker':>22}")
+    for name, values in timings.items():
+        print(f"{name:<16}{1000 * np.mean(values):>22.1f}")
+    print(f"\n{'horyzont':<10}{'separate bal.acc':>18}{'multi bal.acc':>16}")
+    for h in horizons:
+        print(f"{h:<10}{np.mean(scores['separate'][h]):>18.3f}{np.mean(scores['multi'][h]):>16.3f}")
+
+
 # Quick test function
 if __name__ == "__main__":
+    import sys
+
+    if "--online-benchmark" in sys.argv:
+        benchmark_online()
+        sys.exit(0)
+    if "--horizons-benchmark" in sys.argv:
+        benchmark_horizons()
+        sys.exit(0)
+
     import yfinance as yf
     
     print("🧠 AI ORACLE - ML Price Predictor")
@@ -233,6 +704,7 @@ if __name__ == "__main__":
         print(f"📈 Prob UP: {prediction['probability_up']}%")
         print(f"📉 Prob DOWN: {prediction['probability_down']}%")
         print(f"⚡ Strength: {prediction['signal_strength']}")
+        print(f"🗄  Feature cache: {oracle.cache_info()}")
         print(f"{'='*60}")
     else:
         print("❌ Failed to download data")
@@ -0,0 +1,310 @@
+# api.py - Bezgłowe API: wyniki screenera, AI Oracle i historie ze wspólnego snapshotu
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+import pandas as pd
+
+# Pakiet santander_bot (snapshoty, telemetria) leży w legacy_terminal_app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "legacy_terminal_app"))
+
+from santander_bot.core.gpw_calendar import CALENDAR
+from santander_bot.core.snapshot import SnapshotStore
+from santander_bot.core.tracing import setup_tracing, stage
+from market_data import TICKERS, create_market_store
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+JSON_MIME = "application/json"
+
+# Screener (P/E z yfinance .info) jest wolny - liczony w tle najwyżej co SCREENER_TTL s
+SCREENER_TTL = 300
+SCREENER_SNAPSHOT_PATH = os.getenv(
+    "SANTANDER_SCREENER_SNAPSHOT_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "santander", "screener_snapshot.pkl")
+)
+
+
+def compute_screener():
+    """Pełny wynik ScreenerEngine (bez filtrów - filtrowanie per zapytanie), P/E jako float"""
+    from santander_bot.strategies.screener import ScreenerEngine
+
+    df = ScreenerEngine().run_screener(tickers=[t.replace(".WA", "") for t in TICKERS],
+                                       max_pe=float("inf"), require_fan=False)
+    if df.empty:
+        return df
+    df = df.reset_index(drop=True)
+    df["P/E"] = pd.to_numeric(df["P/E"], errors="coerce")
+    df["Fan"] = (df["SMA5"] > df["SMA10"]) & (df["SMA10"] > df["SMA15"]) & (df["SMA15"] > df["SMA20"])
+    return df
+
+
+def create_screener_store():
+    return SnapshotStore(
+        compute_screener,
+        ttl=SCREENER_TTL,
+        path=SCREENER_SNAPSHOT_PATH,
+        is_valid=lambda df: isinstance(df, pd.DataFrame) and not df.empty,
+        schedule=CALENDAR.needs_refresh
+    )
+
+
+def encode_frame(df, fmt):
+    """DataFrame -> (bajty, Content-Type): Arrow IPC stream albo JSON orient=split"""
+    if fmt == "arrow":
+        import pyarrow as pa  # Zależność streamlita - ładowana przy pierwszym zapytaniu Arrow
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW_MIME
+    body = df.to_json(orient="split", index=False, date_format="iso", double_precision=6)
+    return body.encode(), JSON_MIME
+
+
+def matches_etag(header, etag):
+    """If-None-Match: lista tagów (także W/"..." i *) zawiera `etag`"""
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+class MarketAPI:
+    """
+    Odczyty tylko ze snapshotów (SnapshotStore) - zapytanie niczego nie przelicza
+
+    - ETag = wersja + czas snapshotu + trasa + parametry + format, więc liczony bez
+      serializacji; If-None-Match z tym tagiem kończy się 304 bez ciała
+    - zakodowane ciała w LRU (`cache_size`) - N klientów z tym samym zapytaniem koduje raz
+    - snapshot zapisany na dysk przez inny proces (dashboard) jest przejmowany zamiast liczony
+    """
+
+    def __init__(self, market_store=None, screener_store=None, cache_size=128):
+        self.market_store = market_store or create_market_store()
+        self.screener_store = screener_store or create_screener_store()
+        self.cache_size = cache_size
+        self.encoded = 0
+        self.not_modified = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Snapshoty ---
+    def _snapshot(self, store):
+        store.sync_from_disk()
+        snapshot = store.get(block=False)
+        if snapshot is None:
+            store.refresh_async()  # Zimny start - klient dostaje 503 + Retry-After
+        return snapshot
+
+    # --- Trasy: (snapshot, budowa DataFrame) ---
+    def market(self, params):
+        snapshot = self._snapshot(self.market_store)
+
+        def build():
+            table = snapshot.value.table
+            if "tickers" in params:
+                table = table[table["Ticker"].isin(params["tickers"].split(","))]
+            return table.reset_index(drop=True)
+        return snapshot, build
+
+    def screener(self, params):
+        snapshot = self._snapshot(self.screener_store)
+
+        def build():
+            df = snapshot.value
+            if params.get("fan", "0").lower() in ("1", "true", "yes"):
+                df = df[df["Fan"]]
+            if "max_pe" in params:
+                df = df[~(df["P/E"] > float(params["max_pe"]))]  # Brak P/E (NaN) przechodzi jak w run_screener
+            return df.sort_values("Strength", ascending=False).reset_index(drop=True)
+        return snapshot, build
+
+    def history(self, params, ticker):
+        snapshot = self._snapshot(self.market_store)
+        if snapshot is not None and ticker not in snapshot.value.tickers:
+            raise KeyError(ticker)
+
+        def build():
+            df = snapshot.value.history(ticker)
+            if "columns" in params:
+                df = df[[c for c in params["columns"].split(",") if c in df.columns]]
+            if "tail" in params:
+                df = df.tail(int(params["tail"]))
+            return df.rename_axis("Date").reset_index()
+        return snapshot, build
+
+    def status(self):
+        def info(store):
+            snapshot = store.peek()
+            return None if snapshot is None else {
+                "version": snapshot.version, "created_at": snapshot.created_at,
+                "age_s": round(snapshot.age, 1), "refreshing": store.refreshing}
+        market = self.market_store.peek()
+        return {"market": info(self.market_store), "screener": info(self.screener_store),
+                "tickers": market.value.tickers if market else [],
+                "encoded": self.encoded, "not_modified": self.not_modified}
+
+    # --- Obsługa zapytania ---
+    def route(self, path, params):
+        parts = [p for p in path.split("/") if p]
+        if parts[:1] != ["v1"] or len(parts) < 2:
+            raise LookupError(path)
+        if parts[1:] == ["market"]:
+            return self.market(params)
+        if parts[1:] == ["screener"]:
+            return self.screener(params)
+        if parts[1] == "history" and len(parts) == 3:
+            return self.history(params, parts[2].upper().replace(".WA", ""))
+        raise LookupError(path)
+
+    def handle(self, target, headers):
+        """(status, nagłówki, ciało) dla GET `target` (ścieżka + query)"""
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path.rstrip("/") == "/v1/status":
+            return 200, {"Content-Type": JSON_MIME, "Cache-Control": "no-store"}, json.dumps(self.status()).encode()
+
+        accept = headers.get("Accept", "")
+        fmt = params.pop("format", "arrow" if ARROW_MIME in accept else "json")
+        if fmt not in ("arrow", "json"):
+            return 400, {"Content-Type": "text/plain"}, b"format: arrow | json\n"
+        try:
+            snapshot, build = self.route(url.path, params)
+        except (LookupError, ValueError):
+            return 404, {"Content-Type": "text/plain"}, b"not found\n"
+        if snapshot is None:
+            return 503, {"Retry-After": "5", "Content-Type": "text/plain"}, b"snapshot not ready\n"
+
+        key = f"{url.path}?{sorted(params.items())}&{fmt}@{snapshot.version}:{snapshot.created_at!r}"
+        etag = '"' + hashlib.blake2s(key.encode(), digest_size=12).hexdigest() + '"'
+        meta = {"ETag": etag, "Cache-Control": "no-cache",
+                "X-Snapshot-Version": str(snapshot.version), "X-Snapshot-Age": f"{snapshot.age:.1f}"}
+        if matches_etag(headers.get("If-None-Match"), etag):
+            self.not_modified += 1
+            return 304, meta, b""
+
+        with self._lock:
+            cached = self._cache.get(etag)
+            if cached is not None:
+                self._cache.move_to_end(etag)
+        if cached is None:
+            try:
+                with stage("api.encode", route=url.path.split("/")[2], format=fmt):
+                    cached = encode_frame(build(), fmt)
+            except ValueError:
+                return 400, {"Content-Type": "text/plain"}, b"bad parameter\n"
+            with self._lock:
+                self.encoded += 1
+                self._cache[etag] = cached
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        body, content_type = cached
+        meta["Content-Type"] = content_type
+        return 200, meta, body
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive dla klientów odpytujących w pętli
+        disable_nagle_algorithm = True  # Nagłówki i ciało to osobne zapisy - bez tego +40 ms (delayed ACK)
+
+        def do_GET(self):
+            with stage("api.request", path=self.path.split("?")[0]):
+                status, headers, body = api.handle(self.path, self.headers)
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(host="0.0.0.0", port=8000, api=None):
+    server = ThreadingHTTPServer((host, port), make_handler(api or MarketAPI()))
+    server.daemon_threads = True
+    return server
+
+
+def synthetic_api(tickers=18, sessions=60):
+    """MarketAPI nad syntetycznym snapshotem (benchmark bez sieci)"""
+    from market_data import MarketSnapshot
+    from santander_bot.strategies.sharded import synthetic_history
+
+    snapshot = MarketSnapshot(pd.DataFrame())
+    rows = []
+    for i in range(tickers):
+        name = f"T{i:02d}"
+        df = synthetic_history(name, periods=sessions)
+        for window in (5, 10, 15, 20):
+            df[f"SMA{window}"] = df["Close"].rolling(window).mean()
+        df["RSI"] = 50.0
+        snapshot.add_history(name, df)
+        rows.append({"Ticker": name, "Price": round(df["Close"].iloc[-1], 2), "Change %": 0.0, "RSI": 50.0,
+                     "Signal": "NEUTRAL", "Score": 0, "Volume": df["Volume"].iloc[-1],
+                     "AI_Prediction": "NEUTRAL", "AI_Confidence": 0.5, "AI_Prob_Up": 0.5, "AI_Prob_Down": 0.5})
+    snapshot.table = pd.DataFrame(rows)
+    screener = pd.DataFrame({"Ticker": snapshot.table["Ticker"], "Price": snapshot.table["Price"],
+                             "Strength": np.linspace(0, 100, tickers), "P/E": np.nan, "Fan": True})
+    return MarketAPI(SnapshotStore(lambda: snapshot, ttl=3600), SnapshotStore(lambda: screener, ttl=3600))
+
+
+def benchmark(requests=500):
+    """Latencja: pierwsze zapytanie (kodowanie), powtórzone 200 z LRU i 304 po If-None-Match"""
+    import http.client
+
+    api = synthetic_api()
+    api.market_store.refresh()
+    api.screener_store.refresh()
+    server = serve("127.0.0.1", 0, api)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+
+    def get(path, headers=None):
+        start = time.perf_counter()
+        conn.request("GET", path, headers=headers or {})
+        resp = conn.getresponse()
+        body = resp.read()
+        return time.perf_counter() - start, resp, body
+
+    for path in ("/v1/market", "/v1/history/T00?format=arrow", "/v1/history/T00", "/v1/screener?fan=1"):
+        first, resp, body = get(path)
+        etag = resp.getheader("ETag")
+        repeat = [get(path)[0] for _ in range(requests)]
+        cond = [get(path, {"If-None-Match": etag}) for _ in range(requests)]
+        assert all(r.status == 304 for _, r, _ in cond)
+        print(f"{path:<32} {len(body):>7} B  pierwsze {1000 * first:6.2f} ms | "
+              f"200 p50 {1000 * np.median(repeat):.3f} ms | 304 p50 {1000 * np.median([t for t, _, _ in cond]):.3f} ms")
+    print(f"zakodowane ciała: {api.encoded}, odpowiedzi 304: {api.not_modified}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP API: screener, AI Oracle i historie (Arrow IPC / JSON, ETag)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("SANTANDER_API_PORT", "8000")))
+    parser.add_argument("--benchmark", action="store_true", help="syntetyczny snapshot: latencja 200 / 304")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    else:
+        setup_tracing("santander-api")
+        server = serve(args.host, args.port)
+        print(f"API: http://{args.host}:{args.port}/v1/market")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
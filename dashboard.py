@@ -1,12 +1,27 @@
+import functools
+import os
+import sys
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import threading
 import time
+import uuid
 from datetime import datetime
-from ai_oracle import AIOracleEngine
-from streamlit_autorefresh import st_autorefresh
+
+# Pakiet santander_bot (telemetria, silniki) leży w legacy_terminal_app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "legacy_terminal_app"))
+
+from santander_bot.core.tracing import setup_tracing, stage
+from santander_bot.core.profiling import profiling_requested, start_profiler
+from market_data import WATCHLISTS, close_history, create_market_store
+from santander_bot.core.snapshot import Snapshot
+from santander_bot.strategies.universe import load_universe
+from santander_bot.strategies.risk import RollingRisk, BENCHMARK
+from santander_bot.strategies.pairs import PairsScanner, ENTRY_Z
+from santander_bot.strategies.patterns import PatternIndex
+from santander_bot.core.alerts import AlertEngine, indicator_values, load_rules
+from santander_bot.core.watchlists import valid_user
+from santander_bot.core.gpw_calendar import CALENDAR
 
 # --- KONFIGURACJA STRONY ---
 st.set_page_config(
@@ -16,8 +31,33 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# --- REAL-TIME ENGINE (Auto-refresh co 30s) ---
-count = st_autorefresh(interval=30000, limit=None, key="market_data_refresh")
+# --- TELEMETRIA (OTLP + /metrics, raz na proces) ---
+@st.cache_resource
+def init_telemetry():
+    return setup_tracing("santander-quant-desk")
+
+init_telemetry()
+
+# --- PROFILER (SANTANDER_PROFILE=1, zapis do SANTANDER_PROFILE_DIR przy wyjściu) ---
+@st.cache_resource
+def init_profiler():
+    return start_profiler("santander-quant-desk") if profiling_requested() else None
+
+profiler = init_profiler()
+if profiler:
+    profiler.begin_cycle()  # Cykl pełnego runu - na wątku tej sesji, zamykany na końcu skryptu
+
+
+def profiled(fragment):
+    """Rerun fragmentu nie przechodzi przez początek skryptu - własny cykl profilera (w pełnym runie bez nowego)"""
+    if not profiler:
+        return fragment
+
+    @functools.wraps(fragment)
+    def run(*args, **kwargs):
+        with profiler.cycle():
+            return fragment(*args, **kwargs)
+    return run
 
 # --- PREMIUM UI CSS (Glassmorphism & Neon) ---
 st.markdown("""
@@ -108,235 +148,349 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# --- LISTA SPÓŁEK (WIG20 + mWIG40 Selection) ---
-TICKERS = [
-    "XTB.WA", "CDR.WA", "LPP.WA", "DNP.WA", "PCO.WA", "BFT.WA", "CCC.WA",
-    "PKO.WA", "PEO.WA", "KGH.WA", "ALE.WA", "KRU.WA", "JSW.WA", "CPS.WA",
-    "MBK.WA", "ALR.WA", "BDX.WA", "TEN.WA"
-]
-
-# --- SILNIK DANYCH ---
-@st.cache_data(ttl=25)  # Cache krótszy niż interwał odświeżania
-def get_market_data():
-    data_list = []
-    
-    # Initialize AI Oracle
-    oracle = AIOracleEngine()
-    
-    # Pobieranie batchowe
-    tickers_str = " ".join(TICKERS)
-    try:
-        df_bulk = yf.download(tickers_str, period="3mo", interval="1d", group_by='ticker', progress=False)
-    except Exception:
-        return pd.DataFrame()
-    
-    for ticker in TICKERS:
-        try:
-            df = df_bulk[ticker].copy()
-            if df.empty: continue
-            
-            # Usuwanie MultiIndex jeśli jest
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.droplevel(0)
-            
-            # Obliczenia wskaźników
-            df['SMA5'] = df['Close'].rolling(5).mean()
-            df['SMA10'] = df['Close'].rolling(10).mean()
-            df['SMA15'] = df['Close'].rolling(15).mean()
-            df['SMA20'] = df['Close'].rolling(20).mean()
-            
-            # RSI
-            delta = df['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-            rs = gain / loss
-            df['RSI'] = 100 - (100 / (1 + rs))
-            
-            last_row = df.iloc[-1]
-            prev_row = df.iloc[-2]
-            
-            # --- LOGIKA SCREENERA (WACHLARZ) ---
-            score = 0
-            price = last_row['Close']
-            s5, s10, s15, s20 = last_row['SMA5'], last_row['SMA10'], last_row['SMA15'], last_row['SMA20']
-            
-            if price > s5: score += 1
-            if s5 > s10: score += 2
-            if s10 > s15: score += 2
-            if s15 > s20: score += 2
-            
-            signal = "NEUTRAL"
-            if score >= 7: signal = "STRONG BUY 🚀"
-            elif score >= 4: signal = "BUY"
-            elif price < s20: signal = "SELL"
-
-            change_pct = ((price - prev_row['Close']) / prev_row['Close']) * 100
-            
-            # 🧠 AI ORACLE PREDICTION
-            ai_pred = oracle.predict(df)
-
-            data_list.append({
-                "Ticker": ticker.replace(".WA", ""),
-                "Price": round(price, 2),
-                "Change %": round(change_pct, 2),
-                "RSI": round(last_row['RSI'], 1),
-                "Signal": signal,
-                "Score": score,
-                "Volume": last_row['Volume'],
-                "History": df,
-                "AI_Prediction": ai_pred['prediction'],
-                "AI_Confidence": ai_pred['confidence'],
-                "AI_Prob_Up": ai_pred['probability_up'],
-                "AI_Prob_Down": ai_pred['probability_down']
-            })
-            
-        except Exception as e:
-            continue
-            
-    return pd.DataFrame(data_list)
+# --- SILNIK DANYCH (stale-while-revalidate, snapshot na dysku) ---
+@st.cache_resource
+def get_market_store():
+    return create_market_store()
 
-# --- INTERFEJS GŁÓWNY ---
+# Krocząca kowariancja/beta współdzielona przez sesje; kolejne snapshoty dogrywają tylko nowe świece
+@st.cache_resource
+def get_risk_engine():
+    return RollingRisk(window=RISK_WINDOW)
 
-# 1. Header
-col1, col2 = st.columns([6, 1])
-with col1:
-    st.title("⚡ SANTANDER QUANT DESK")
-    st.caption(f"LIVE MARKET DATA | LAST UPDATE: {datetime.now().strftime('%H:%M:%S')} | REFRESH: 30s")
-with col2:
-    if st.button("🔄 RELOAD"):
-        st.rerun()
+# Skaner par (kointegracja) - w procesie dashboardu jeden worker, bez puli procesów
+@st.cache_resource
+def get_pairs_scanner():
+    return PairsScanner(window=PAIRS_WINDOW, workers=1)
 
-# 2. Pobranie danych
-with st.spinner("Fetching market data..."):
-    df_market = get_market_data()
+# Długa historia dzienna (pary, wzorce) - jedno pobranie na wersję snapshotu, wspólne dla sesji
+@st.cache_resource
+def get_history_holder():
+    return {"signature": None, "panel": None, "lock": threading.Lock()}
 
-if df_market.empty:
-    st.error("Błąd pobierania danych. Spróbuj odświeżyć.")
-    st.stop()
+def history_panel(snapshot):
+    holder = get_history_holder()
+    with holder["lock"]:
+        if holder["signature"] != snapshot_signature(snapshot):
+            holder["panel"] = close_history(snapshot.value.tickers)
+            holder["signature"] = snapshot_signature(snapshot)
+        return holder["panel"]
+
+# Indeks podobnych formacji współdzielony przez sesje; przebudowa przy nowej wersji snapshotu
+@st.cache_resource
+def get_pattern_holder():
+    return {"signature": None, "index": None, "lock": threading.Lock()}
+
+def get_pattern_index(snapshot):
+    holder = get_pattern_holder()
+    with holder["lock"]:
+        if holder["signature"] != snapshot_signature(snapshot):
+            holder["index"] = PatternIndex.from_panel(history_panel(snapshot))  # Lata sesji, nie 3 miesiące
+            holder["signature"] = snapshot_signature(snapshot)
+        return holder["index"]
+
+# Silnik alertów współdzielony przez sesje; każdą wersję snapshotu ocenia raz
+@st.cache_resource
+def get_alert_engine():
+    return AlertEngine(load_rules()), {"signature": None, "lock": threading.Lock()}
+
+def sync_alerts(snapshot):
+    engine, fed = get_alert_engine()
+    signature = snapshot_signature(snapshot)
+    with fed["lock"]:  # Równoległe sesje: ta sama wersja snapshotu karmi silnik dokładnie raz
+        if fed["signature"] != signature:
+            fed["signature"] = signature
+            market = snapshot.value
+            for ticker in market.tickers:
+                history = market.history(ticker)
+                values = indicator_values(history)
+                if values:
+                    engine.observe(ticker, values, history.index[-1])
+    return engine
+
+# --- REAL-TIME ENGINE (fragmenty z własną kadencją zamiast rerunu całej strony) ---
+KPI_REFRESH = 30     # sekundy
+TABLE_REFRESH = 30
+CHART_REFRESH = 60
+ORACLE_REFRESH = 60
+RISK_REFRESH = 60
+RISK_WINDOW = 60     # sesje (zwroty dzienne)
+PAIRS_WINDOW = 250   # sesje (log-ceny) dla hedge ratio i testu kointegracji
+PAIRS_TOP = 15
+PATTERN_WINDOWS = (20, 40, 60, 120)  # sesje okna zapytania (dostępne tylko przy historii >= 2 okna + horyzont)
+PATTERN_K = 8
+PATTERN_HORIZON = 10  # sesje "co było dalej"
+
+def session_user():
+    """Nazwa z ?user= (etykieta zapisanej listy, bez uwierzytelnienia) albo None dla niepoprawnej"""
+    user = st.query_params.get("user")
+    return user if valid_user(user) else None
+
+def session_watchlist():
+    """Watchlista sesji (domyślnie zapisana lista użytkownika ?user= albo lista bazowa) - zgłaszana do sumy"""
+    state = st.session_state
+    if "watchlist" not in state:
+        state["session_id"] = uuid.uuid4().hex
+        user = session_user()
+        state["watchlist"] = (user and WATCHLISTS.load(user)) or WATCHLISTS.base
+    return WATCHLISTS.activate(state["session_id"], state["watchlist"])
+
+def shared_snapshot():
+    """Pełny snapshot (suma watchlist wszystkich sesji) - silniki współdzielone: ryzyko, alerty, wzorce"""
+    return get_market_store().get(block=False)
+
+def current_snapshot():
+    """
+    Widok snapshotu na watchlistę sesji dla bieżącego ticku fragmentu (nie blokuje, stary
+    snapshot wyzwala odświeżenie w tle); historie współdzielone ze snapshotem, bez kopii
+    """
+    snapshot = shared_snapshot()
+    if snapshot is None:
+        return None
+    watchlist = session_watchlist()
+    key = (snapshot.version, snapshot.created_at, watchlist)
+    view = st.session_state.get("_snapshot_view")
+    if view is None or view[0] != key:
+        view = st.session_state["_snapshot_view"] = (key, Snapshot(
+            snapshot.value.subset(watchlist), created_at=snapshot.created_at, version=snapshot.version))
+    return view[1]
+
+def snapshot_signature(snapshot):
+    return (snapshot.version, snapshot.created_at, tuple(snapshot.value.tickers))
+
+def cached_render(name, signature, build):
+    """Payload sekcji (figura, Styler, HTML) budowany od nowa tylko gdy zmieniły się dane wejściowe"""
+    cache = st.session_state.setdefault("_render_cache", {})
+    entry = cache.get(name)
+    if entry is None or entry[0] != signature:
+        entry = cache[name] = (signature, build())
+    return entry[1]
 
-df_sorted = df_market.sort_values(by=["Score", "Change %"], ascending=False)
-
-# 3. KPI Metrics (Top 3)
-top_picks = df_sorted.head(4)
-m1, m2, m3, m4 = st.columns(4)
-
-if len(top_picks) >= 3:
-    with m1:
-        st.metric(label=f"🏆 TOP PICK: {top_picks.iloc[0]['Ticker']}", 
-                  value=f"{top_picks.iloc[0]['Price']}", 
-                  delta=f"{top_picks.iloc[0]['Change %']}%")
-    with m2:
-        st.metric(label=f"🥈 RUNNER UP: {top_picks.iloc[1]['Ticker']}", 
-                  value=f"{top_picks.iloc[1]['Price']}", 
-                  delta=f"{top_picks.iloc[1]['Change %']}%")
-    with m3:
+def sorted_market(market):
+    return market.table.sort_values(by=["Score", "Change %"], ascending=False)
+
+# Stylizowanie Tabeli
+def color_signal(val):
+    color = '#ffffff'
+    if 'STRONG BUY' in val: color = '#00f260' # Neon Green
+    elif 'BUY' in val: color = '#90ee90'
+    elif 'SELL' in val: color = '#ff4b4b' # Neon Red
+    return f'color: {color}; font-weight: bold; text-shadow: 0 0 5px {color}40;'
+
+def color_change(val):
+    color = '#ff4b4b' if val < 0 else '#00f260'
+    return f'color: {color}'
+
+def color_ai_prediction(val):
+    if val == 'UP': return 'color: #00f260; font-weight: bold'
+    elif val == 'DOWN': return 'color: #ff4b4b; font-weight: bold'
+    return 'color: white'
+
+def color_beta(val):
+    if val > 1.2: return 'color: #ff4b4b; font-weight: bold'   # Agresywna
+    elif val < 0.8: return 'color: #00f260'                     # Defensywna
+    return 'color: white'
+
+@st.fragment(run_every=KPI_REFRESH)
+@profiled
+def kpi_section():
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return
+
+    def build():
+        df_market = snapshot.value.table
+        top_picks = sorted_market(snapshot.value).head(4)
+        if len(top_picks) < 3:
+            return []
         avg_rsi = df_market['RSI'].mean()
-        st.metric(label="MARKET SENTIMENT (RSI)", 
-                  value=f"{avg_rsi:.1f}", 
-                  delta="OVERBOUGHT" if avg_rsi > 70 else "OVERSOLD" if avg_rsi < 30 else "NEUTRAL",
-                  delta_color="inverse")
-    with m4:
         strong_buys = len(df_market[df_market['Signal'].str.contains("STRONG BUY")])
-        st.metric(label="STRONG SIGNALS", 
-                  value=f"{strong_buys}", 
-                  delta="ACTIVE OPPORTUNITIES")
-
-st.markdown("---")
+        return [
+            dict(label=f"🏆 TOP PICK: {top_picks.iloc[0]['Ticker']}",
+                 value=f"{top_picks.iloc[0]['Price']}",
+                 delta=f"{top_picks.iloc[0]['Change %']}%"),
+            dict(label=f"🥈 RUNNER UP: {top_picks.iloc[1]['Ticker']}",
+                 value=f"{top_picks.iloc[1]['Price']}",
+                 delta=f"{top_picks.iloc[1]['Change %']}%"),
+            dict(label="MARKET SENTIMENT (RSI)",
+                 value=f"{avg_rsi:.1f}",
+                 delta="OVERBOUGHT" if avg_rsi > 70 else "OVERSOLD" if avg_rsi < 30 else "NEUTRAL",
+                 delta_color="inverse"),
+            dict(label="STRONG SIGNALS",
+                 value=f"{strong_buys}",
+                 delta="ACTIVE OPPORTUNITIES"),
+        ]
 
-# 4. Layout: Tabela (Lewo) + Wykres (Prawo)
-col_left, col_right = st.columns([5, 7])
+    metrics = cached_render("kpi", snapshot_signature(snapshot), build)
+    for column, kwargs in zip(st.columns(4), metrics):
+        with column:
+            st.metric(**kwargs)
 
-with col_left:
-    st.subheader("📊 LIVE SCREENER")
-    
-    # Stylizowanie Tabeli
-    def color_signal(val):
-        color = '#ffffff'
-        if 'STRONG BUY' in val: color = '#00f260' # Neon Green
-        elif 'BUY' in val: color = '#90ee90'
-        elif 'SELL' in val: color = '#ff4b4b' # Neon Red
-        return f'color: {color}; font-weight: bold; text-shadow: 0 0 5px {color}40;'
-    
-    def color_change(val):
-        color = '#ff4b4b' if val < 0 else '#00f260'
-        return f'color: {color}'
-    
-    def color_ai_prediction(val):
-        if val == 'UP': return 'color: #00f260; font-weight: bold'
-        elif val == 'DOWN': return 'color: #ff4b4b; font-weight: bold'
-        return 'color: white'
-
-    # Przygotowanie DF do wyświetlenia
-    display_df = df_sorted[["Ticker", "Price", "Change %", "RSI", "Signal", "AI_Prediction", "AI_Confidence"]].copy()
-    display_df = display_df.rename(columns={
-        "AI_Prediction": "AI",
-        "AI_Confidence": "Conf%"
-    })
-    
-    st.dataframe(
-        display_df.style.map(color_signal, subset=['Signal'])
-                        .map(color_change, subset=['Change %'])
-                        .map(color_ai_prediction, subset=['AI'])
-                        .format({"Price": "{:.2f}", "Change %": "{:+.2f}", "RSI": "{:.1f}", "Conf%": "{:.0f}%"}),
-        height=700,
-        use_container_width=True,
-        hide_index=True
+    st.caption(
+        f"SNAPSHOT: {datetime.fromtimestamp(snapshot.created_at).strftime('%H:%M:%S')} ({snapshot.age:.0f}s)"
+        + (" | REFRESHING IN BACKGROUND" if get_market_store().refreshing else "")
+        + ("" if CALENDAR.is_open() else f" | GPW CLOSED - NEXT SESSION {CALENDAR.next_open():%d.%m %H:%M}")
     )
 
-with col_right:
-    # Wybór spółki z listy
-    selected_ticker = st.selectbox("🔍 SELECT ASSET:", df_sorted['Ticker'].tolist())
-    
-    # Pobranie historii dla wybranej spółki
-    stock_data = df_market[df_market['Ticker'] == selected_ticker].iloc[0]['History']
-    
-    # Rysowanie wykresu Plotly
-    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
-                        vertical_spacing=0.03, row_heights=[0.75, 0.25])
-
-    # Świece
-    fig.add_trace(go.Candlestick(
-        x=stock_data.index,
-        open=stock_data['Open'], high=stock_data['High'],
-        low=stock_data['Low'], close=stock_data['Close'],
-        name="Price",
-        increasing_line_color='#00f260', decreasing_line_color='#ff4b4b'
-    ), row=1, col=1)
-
-    # Średnie
-    fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data['SMA5'], line=dict(color='#ffff00', width=1), name='SMA 5'), row=1, col=1)
-    fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data['SMA20'], line=dict(color='#00ffff', width=2), name='SMA 20'), row=1, col=1)
-
-    # Wolumen
-    colors = ['#ff4b4b' if row['Open'] - row['Close'] >= 0 else '#00f260' for index, row in stock_data.iterrows()]
-    fig.add_trace(go.Bar(x=stock_data.index, y=stock_data['Volume'], marker_color=colors, name='Volume'), row=2, col=1)
-
-    # Layout Wykresu - Dark Theme
-    fig.update_layout(
-        title=dict(text=f"{selected_ticker} - TECHNICAL ANALYSIS", font=dict(color="white", size=20)),
-        xaxis_rangeslider_visible=False,
-        height=700,
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font=dict(color="white"),
-        margin=dict(l=10, r=10, t=40, b=10),
-        legend=dict(orientation="h", y=1, x=0, xanchor="left", yanchor="bottom"),
-        xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
-        yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # 🧠 AI ORACLE BOX
-    stock_row = df_market[df_market['Ticker'] == selected_ticker].iloc[0]
-    ai_pred = stock_row['AI_Prediction']
-    ai_conf = stock_row['AI_Confidence']
-    ai_up = stock_row['AI_Prob_Up']
-    ai_down = stock_row['AI_Prob_Down']
-    
-    confidence_level = "🔥 STRONG" if ai_conf > 70 else "⚡ MODERATE" if ai_conf > 60 else "💤 WEAK"
-    
-    st.markdown(f"""
+@st.fragment(run_every=KPI_REFRESH)
+@profiled
+def alerts_section():
+    snapshot = shared_snapshot()
+    if snapshot is None:
+        return
+
+    with stage("alerts.evaluate", source="dashboard"):
+        engine = sync_alerts(snapshot)
+
+    # Toast tylko dla alertów nowszych niż ostatnio widziane w tej sesji (spółki z jej watchlisty)
+    watchlist = set(session_watchlist())
+    recent = engine.recent(10, symbols=watchlist)
+    latest_id = recent[0].id if recent else 0
+    seen = st.session_state.setdefault("alerts_seen", latest_id)
+    for alert in reversed(engine.recent(5, after_id=seen, symbols=watchlist)):
+        st.toast(f"🔔 {alert.message}")
+    st.session_state["alerts_seen"] = max(seen, latest_id)
+
+    with st.expander(f"🔔 ALERTS ({len(recent)})", expanded=False):
+        if not recent:
+            st.caption("No alerts yet. Rules: " + " | ".join(r.text for r in engine.rules))
+        for alert in recent:
+            color = '#00f260' if alert.rule.op == '>' else '#ff4b4b'
+            when = datetime.fromtimestamp(alert.created_at).strftime('%H:%M:%S')
+            st.markdown(f"<span style='color:#888'>{when}</span> <span style='color:{color}'>{alert.message}</span>",
+                        unsafe_allow_html=True)
+
+@st.fragment(run_every=TABLE_REFRESH)
+@profiled
+def screener_section():
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return
+
+    def build():
+        # Przygotowanie DF do wyświetlenia
+        display_df = sorted_market(snapshot.value)[["Ticker", "Price", "Change %", "RSI", "Signal", "AI_Prediction", "AI_Confidence"]].copy()
+        display_df = display_df.rename(columns={
+            "AI_Prediction": "AI",
+            "AI_Confidence": "Conf%"
+        })
+        return (display_df.style.map(color_signal, subset=['Signal'])
+                                .map(color_change, subset=['Change %'])
+                                .map(color_ai_prediction, subset=['AI'])
+                                .format({"Price": "{:.2f}", "Change %": "{:+.2f}", "RSI": "{:.1f}", "Conf%": "{:.0f}%"}))
+
+    styled = cached_render("table", snapshot_signature(snapshot), build)
+    with stage("render.table"):
+        st.dataframe(
+            styled,
+            height=700,
+            use_container_width=True,
+            hide_index=True
+        )
+
+@st.fragment(run_every=CHART_REFRESH)
+@profiled
+def chart_section(selected_ticker):
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return
+
+    def build():
+        # Historia tylko dla wybranej spółki (tablice float32 -> DataFrame na żądanie)
+        stock_data = snapshot.value.history(selected_ticker)
+
+        # Rysowanie wykresu Plotly
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
+                            vertical_spacing=0.03, row_heights=[0.75, 0.25])
+
+        # Świece
+        fig.add_trace(go.Candlestick(
+            x=stock_data.index,
+            open=stock_data['Open'], high=stock_data['High'],
+            low=stock_data['Low'], close=stock_data['Close'],
+            name="Price",
+            increasing_line_color='#00f260', decreasing_line_color='#ff4b4b'
+        ), row=1, col=1)
+
+        # Średnie
+        fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data['SMA5'], line=dict(color='#ffff00', width=1), name='SMA 5'), row=1, col=1)
+        fig.add_trace(go.Scatter(x=stock_data.index, y=stock_data['SMA20'], line=dict(color='#00ffff', width=2), name='SMA 20'), row=1, col=1)
+
+        # Wolumen
+        colors = ['#ff4b4b' if row['Open'] - row['Close'] >= 0 else '#00f260' for index, row in stock_data.iterrows()]
+        fig.add_trace(go.Bar(x=stock_data.index, y=stock_data['Volume'], marker_color=colors, name='Volume'), row=2, col=1)
+
+        # Layout Wykresu - Dark Theme
+        fig.update_layout(
+            title=dict(text=f"{selected_ticker} - TECHNICAL ANALYSIS", font=dict(color="white", size=20)),
+            xaxis_rangeslider_visible=False,
+            height=700,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color="white"),
+            margin=dict(l=10, r=10, t=40, b=10),
+            legend=dict(orientation="h", y=1, x=0, xanchor="left", yanchor="bottom"),
+            xaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)'),
+            yaxis=dict(showgrid=True, gridcolor='rgba(255,255,255,0.1)')
+        )
+        return fig
+
+    with stage("render.chart", symbol=selected_ticker):
+        fig = cached_render("chart", snapshot_signature(snapshot) + (selected_ticker,), build)
+        event = st.plotly_chart(fig, use_container_width=True, on_select="rerun",
+                                selection_mode=("points", "box"), key=f"chart_{selected_ticker}")
+
+    # Klik / zaznaczenie na wykresie = okno zapytania sekcji wzorców (poza fragmentem - pełny rerun)
+    query = selected_window(selected_ticker, event)
+    if query is not None and query != st.session_state.get("pattern_query"):
+        st.session_state["pattern_query"] = query
+        st.rerun()
+
+def selected_window(ticker, event):
+    """(ticker, koniec, początek|None) z zaznaczenia na wykresie: ramka = zakres, punkt = koniec okna"""
+    selection = (event or {}).get("selection") or {}
+    if selection.get("box"):
+        x0, x1 = sorted(pd.Timestamp(x) for x in selection["box"][0]["x"])
+        return ticker, x1.isoformat(), x0.isoformat()
+    if selection.get("points"):
+        return ticker, pd.Timestamp(selection["points"][0]["x"]).isoformat(), None
+    return None
+
+@st.fragment(run_every=ORACLE_REFRESH)
+@profiled
+def oracle_section(selected_ticker):
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return
+
+    def build():
+        df_market = snapshot.value.table
+        rows = df_market[df_market['Ticker'] == selected_ticker]
+        if rows.empty:
+            return None
+        stock_row = rows.iloc[0]
+        ai_pred = stock_row['AI_Prediction']
+        ai_conf = stock_row['AI_Confidence']
+        ai_up = stock_row['AI_Prob_Up']
+        ai_down = stock_row['AI_Prob_Down']
+        
+        confidence_level = "🔥 STRONG" if ai_conf > 70 else "⚡ MODERATE" if ai_conf > 60 else "💤 WEAK"
+
+        # P(wzrost) per horyzont (AI_Up_<h>d); starszy snapshot / model online - bez wiersza
+        horizons = [(col[6:-1], stock_row[col]) for col in df_market.columns
+                    if col.startswith("AI_Up_") and pd.notna(stock_row[col])]
+        cells = "".join(
+            f'<div><div style="font-size: 0.8rem; color: #888;">{h}D ↗</div>'
+            f'<div style="font-size: 1.1rem; color: {"#00f260" if up > 50 else "#ff4b4b"};">{up:.0f}%</div></div>'
+            for h, up in horizons
+        )
+        horizon_row = "" if not horizons else f"""
+        <div style="display: flex; justify-content: space-between; margin-top: 10px; border-top: 1px solid rgba(0, 242, 96, 0.2); padding-top: 8px;">{cells}</div>"""
+
+        return f"""
     <div style="background: rgba(0, 242, 96, 0.05); border: 1px solid rgba(0, 242, 96, 0.2); border-radius: 10px; padding: 15px; margin-top: 10px;">
         <h3 style="margin: 0; color: #00f260;">🧠 AI ORACLE PREDICTION</h3>
         <div style="display: flex; justify-content: space-between; margin-top: 10px;">
@@ -352,10 +506,253 @@ with col_right:
                 <div style="font-size: 0.8rem; color: #888;">PROBABILITY</div>
                 <div style="font-size: 1.2rem; color: white;">↗ {ai_up:.0f}% | ↘ {ai_down:.0f}%</div>
             </div>
-        </div>
+        </div>{horizon_row}
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+    html = cached_render("oracle", snapshot_signature(snapshot) + (selected_ticker,), build)
+    if html:
+        st.markdown(html, unsafe_allow_html=True)
+
+@st.fragment(run_every=RISK_REFRESH)
+@profiled
+def risk_section():
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return
+
+    def build():
+        # Silnik liczy sumę watchlist (wspólny dla sesji), sesja bierze swoje wiersze
+        engine = get_risk_engine()
+        engine.sync(shared_snapshot().value.close_panel())
+        keep = [t for t in snapshot.value.tickers if t in engine.symbols]
+        table = engine.table()
+        table = table[table["Ticker"].isin(keep)].reset_index(drop=True)
+        corr = engine.correlation().loc[keep, keep]
+        styled = table.style.map(color_beta, subset=["Beta"]) \
+                            .format({"Beta": "{:.2f}", f"Corr {BENCHMARK}": "{:.2f}", "Vol %": "{:.1f}"})
+
+        import plotly.graph_objects as go
+
+        fig = go.Figure(go.Heatmap(
+            z=corr.to_numpy(), x=corr.columns, y=corr.index,
+            zmin=-1, zmax=1, colorscale="RdBu_r"
+        ))
+        fig.update_layout(
+            title=dict(text=f"CORRELATION ({RISK_WINDOW}D RETURNS)", font=dict(color="white", size=16)),
+            height=500,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color="white"),
+            margin=dict(l=10, r=10, t=40, b=10)
+        )
+        return styled, fig
+
+    styled, fig = cached_render("risk", snapshot_signature(snapshot), build)
+    col_beta, col_corr = st.columns([5, 7])
+    with col_beta:
+        with stage("render.table", panel="risk"):
+            st.dataframe(styled, height=500, use_container_width=True, hide_index=True)
+    with col_corr:
+        with stage("render.chart", panel="risk"):
+            st.plotly_chart(fig, use_container_width=True)
+
+def color_z(val):
+    if abs(val) >= ENTRY_Z: return 'color: #ff4b4b; font-weight: bold'  # Spread rozciągnięty - sygnał
+    return 'color: white'
+
+@st.fragment(run_every=RISK_REFRESH)
+@profiled
+def pairs_section():
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return
+
+    panel = history_panel(shared_snapshot())  # Snapshot ma ~3 miesiące, okno par to PAIRS_WINDOW sesji
+    panel = panel[[t for t in snapshot.value.tickers if t in panel.columns]]
+    if len(panel) < PAIRS_WINDOW:
+        st.info(f"Za krótka historia dla par: {len(panel)} z {PAIRS_WINDOW} sesji.")
+        return
+
+    def build():
+        table = get_pairs_scanner().scan(panel, top=PAIRS_TOP)
+        return table.style.map(color_z, subset=["Z"]) \
+                          .format({"Beta": "{:.2f}", "ADF t": "{:.2f}", "Half-life": "{:.1f}",
+                                   "Z": "{:+.2f}", "Corr": "{:.2f}"})
+
+    styled = cached_render("pairs", snapshot_signature(snapshot), build)
+    with stage("render.table", panel="pairs"):
+        st.dataframe(styled, use_container_width=True, hide_index=True)
+
+def patterns_section(selected_ticker):
+    snapshot = current_snapshot()
+    if snapshot is None:
+        return
+    index = get_pattern_index(shared_snapshot())
+    if selected_ticker not in index.tickers:
+        st.info("Brak historii dla wybranej spółki.")
+        return
+
+    query = st.session_state.get("pattern_query")
+    end, start = (query[1], query[2]) if query and query[0] == selected_ticker else (None, None)
+    if start is None:  # Ramka na wykresie sama wyznacza długość okna
+        # Dopasowanie kończy się przed początkiem zapytania: okno m wymaga co najmniej 2m sesji (+ horyzont)
+        windows = [w for w in PATTERN_WINDOWS if 2 * w + PATTERN_HORIZON <= index.sessions(selected_ticker)]
+        if not windows:
+            st.info(f"Za krótka historia dla wzorców: {index.sessions(selected_ticker)} sesji.")
+            return
+        if st.session_state.get("pattern_window") not in windows:
+            st.session_state.pop("pattern_window", None)
+        m = st.select_slider("WINDOW (SESSIONS)", options=windows, value=40 if 40 in windows else windows[-1],
+                             key="pattern_window")
+    try:
+        end_pos = index.locate(selected_ticker, end)
+        if start is not None:
+            m = max(5, end_pos - index.locate(selected_ticker, start) + 1)
+        matches = index.query(selected_ticker, end=end, m=m, k=PATTERN_K, horizon=PATTERN_HORIZON)
+    except ValueError as e:
+        st.info(str(e))
+        return
+
+    query_start = pd.Timestamp(index.stamps[end_pos - m + 1])
+    forward = matches[f"Next {PATTERN_HORIZON} %"].dropna()
+    outcome = f"median {forward.median():+.1f}% | up {int((forward > 0).sum())}/{len(forward)}" if len(forward) else "-"
+    st.caption(f"QUERY: {selected_ticker} {query_start:%Y-%m-%d} → {pd.Timestamp(index.stamps[end_pos]):%Y-%m-%d} "
+               f"({m} sessions) | NEXT {PATTERN_HORIZON}: {outcome} | zaznacz na wykresie inny punkt / zakres")
+    if matches.empty:
+        return
+
+    def build():
+        import plotly.graph_objects as go
+
+        fig = go.Figure()
+        for _, row in matches.iterrows():
+            path = index.path(int(row["Pos"]), m, PATTERN_HORIZON)
+            fig.add_trace(go.Scatter(y=path, mode="lines", line=dict(width=1), opacity=0.6,
+                                     name=f"{row['Ticker']} {row['End']:%Y-%m-%d}"))
+        fig.add_trace(go.Scatter(y=index.path(end_pos - m + 1, m), mode="lines",
+                                 line=dict(color="white", width=3), name=f"{selected_ticker} (query)"))
+        fig.add_vline(x=m - 1, line=dict(color="#888", dash="dot"))
+        fig.update_layout(
+            title=dict(text="SIMILAR PATTERNS (Z-NORMALIZED) + WHAT FOLLOWED", font=dict(color="white", size=16)),
+            height=400,
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color="white"),
+            margin=dict(l=10, r=10, t=40, b=10)
+        )
+        table = matches.drop(columns="Pos").style.format(
+            {"Start": "{:%Y-%m-%d}", "End": "{:%Y-%m-%d}", "Distance": "{:.2f}", f"Next {PATTERN_HORIZON} %": "{:+.1f}"})
+        return fig, table
+
+    fig, table = cached_render("patterns", snapshot_signature(snapshot) + (selected_ticker, end_pos, m), build)
+    col_fig, col_table = st.columns([7, 5])
+    with col_fig:
+        with stage("render.chart", panel="patterns"):
+            st.plotly_chart(fig, use_container_width=True)
+    with col_table:
+        with stage("render.table", panel="patterns"):
+            st.dataframe(table, height=400, use_container_width=True, hide_index=True)
+
+@st.fragment(run_every=KPI_REFRESH)
+@profiled
+def wait_for_data():
+    """Brak danych: ponawiaj pobranie w tle, pełny rerun gdy pojawi się snapshot"""
+    store = get_market_store()
+    if store.peek() is not None:
+        st.rerun()
+    store.refresh_async()
+
+# --- INTERFEJS GŁÓWNY ---
+
+# 1. Header
+col1, col2 = st.columns([6, 1])
+with col1:
+    st.title("⚡ SANTANDER QUANT DESK")
+    st.caption(f"LIVE MARKET DATA | KPI/TABLE: {KPI_REFRESH}s | CHART/AI: {CHART_REFRESH}s")
+with col2:
+    if st.button("🔄 RELOAD"):
+        get_market_store().refresh_async()
+        st.rerun()
+
+# 2. Watchlista sesji (?user=<nazwa> + SAVE zapamiętuje ją między wizytami; nazwa to nie logowanie)
+with st.expander("⭐ WATCHLIST", expanded=False):
+    current = session_watchlist()
+    options = list(dict.fromkeys(WATCHLISTS.base + tuple(load_universe()) + current))
+    chosen = st.multiselect("TICKERS", options, default=list(current), key="watchlist_editor")
+    if chosen and tuple(chosen) != current:
+        st.session_state["watchlist"] = tuple(chosen)
+        current = session_watchlist()
+    user = session_user()
+    if user and st.button(f"💾 SAVE AS '{user}'"):
+        try:
+            WATCHLISTS.save(user, current)
+        except ValueError as e:
+            st.warning(str(e))
+    elif st.query_params.get("user") and not user:
+        st.caption("Invalid ?user= name (letters, digits, '_', '.', '-'; max 32) - list is not saved")
+    st.caption(f"{len(current)} tickers | all sessions: {len(WATCHLISTS.union())} tickers, "
+               f"{WATCHLISTS.sessions()} active")
+
+# 3. Pobranie danych - ostatni dobry snapshot od razu, odświeżenie w tle
+market_store = get_market_store()
+snapshot = market_store.get(block=False)
+if snapshot is None:
+    # Tylko zimny start bez snapshotu na dysku
+    with st.spinner("Fetching market data..."):
+        snapshot = market_store.get()
+elif not market_store.is_current(snapshot.value):
+    # Nowe tickery z watchlisty: liczone tylko one i doklejane do wspólnego snapshotu
+    with st.spinner("Adding watchlist tickers..."):
+        snapshot = market_store.refresh()
+
+if snapshot is None or snapshot.value.empty:
+    st.error("Błąd pobierania danych. Spróbuj odświeżyć.")
+    wait_for_data()
+    st.stop()
+snapshot = current_snapshot()
+if snapshot.value.empty:
+    st.warning("Brak danych dla spółek z watchlisty.")
+    st.stop()
+
+# 4. KPI Metrics (Top 3)
+kpi_section()
+alerts_section()
 
-# 5. Stopka
+st.markdown("---")
+
+# 5. Layout: Tabela (Lewo) + Wykres (Prawo)
+col_left, col_right = st.columns([5, 7])
+
+with col_left:
+    st.subheader("📊 LIVE SCREENER")
+    screener_section()
+
+with col_right:
+    # Wybór spółki z listy (zmiana = pełny rerun; ticki odświeżają tylko fragmenty)
+    selected_ticker = st.selectbox("🔍 SELECT ASSET:", sorted_market(snapshot.value)['Ticker'].tolist(), key="selected_asset")
+    chart_section(selected_ticker)
+    
+    # 🧠 AI ORACLE BOX
+    oracle_section(selected_ticker)
+
+    # 🔁 Podobne formacje w historii całego uniwersum
+    st.subheader("🔁 SIMILAR PATTERNS")
+    patterns_section(selected_ticker)
+
+# 6. Panel ryzyka: beta / korelacja z WIG20 + macierz korelacji
+st.markdown("---")
+st.subheader(f"🧮 RISK vs {BENCHMARK}")
+risk_section()
+
+# 7. Pary: kointegracja (Engle-Granger), hedge ratio i z-score spreadu
+st.markdown("---")
+st.subheader(f"🔗 PAIRS ({PAIRS_WINDOW}D COINTEGRATION)")
+pairs_section()
+
+# 8. Stopka
 st.markdown("---")
 st.caption("© 2025 SANTANDER QUANT DESK | POWERED BY AI & STREAMLIT | DATA DELAYED 15 MIN")
+
+if profiler:
+    profiler.end_cycle()
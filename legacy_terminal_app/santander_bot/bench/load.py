@@ -0,0 +1,202 @@
+# santander_bot/bench/load.py
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import numpy as np
+from santander_bot.bench.st_client import StreamlitSession, wait_for_health
+from santander_bot.bench.startup import REPO_ROOT, _env, _free_port
+from santander_bot.core.replay import YF_FIXTURES_ENV, record_fixtures, write_synthetic_fixtures
+
+STAGE_COUNT = re.compile(r'santander_stage_duration_seconds_count\{stage="([^"]+)"\} (\d+)')
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def dashboard_symbols():
+    """Symbole Yahoo pobierane przez dashboard (TICKERS + WIG20) - z market_data.py"""
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    from market_data import BENCHMARK_TICKER, TICKERS
+    return TICKERS + [BENCHMARK_TICKER]
+
+
+def process_usage(pid):
+    """(sekundy CPU user+sys, RSS w MB) procesu z /proc (Linux - także kontener Railway)"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLK_TCK
+    with open(f"/proc/{pid}/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    return cpu, rss_kb / 1024
+
+
+def scrape_stage_counts(metrics_url):
+    """{stage: liczba wywołań} z endpointu /metrics dashboardu"""
+    with urllib.request.urlopen(metrics_url, timeout=5) as resp:
+        return {name: int(n) for name, n in STAGE_COUNT.findall(resp.read().decode())}
+
+
+class LoadLevel:
+    """Wyniki jednego poziomu: N sesji przez `duration` sekund"""
+
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.latencies = []   # sekundy od wysłania rerunu do script_finished
+        self.lateness = []    # opóźnienie startu rerunu fragmentu względem jego timera
+        self.full_reruns = 0
+        self.errors = 0
+
+    def report(self, cpu_s, wall_s, rss_mb, rss_base_mb, fetches):
+        def pct(values, q):
+            return round(float(np.percentile(values, q)), 3) if values else 0.0
+
+        return {
+            "sessions": self.sessions,
+            "reruns": len(self.latencies),
+            "full_reruns": self.full_reruns,
+            "errors": self.errors,
+            "p50_s": pct(self.latencies, 50),
+            "p95_s": pct(self.latencies, 95),
+            "p99_s": pct(self.latencies, 99),
+            "late_p95_s": pct(self.lateness, 95),
+            "cpu_pct": round(100 * cpu_s / wall_s, 1),
+            "cpu_s_per_session_min": round(cpu_s / self.sessions / (wall_s / 60), 3),
+            "rss_mb": round(rss_mb, 1),
+            "rss_mb_per_session": round((rss_mb - rss_base_mb) / self.sessions, 2),
+            "fetches": fetches,
+        }
+
+
+async def simulate_session(base_url, level, stop_at, ramp, timeout, rng):
+    """
+    Jedna "przeglądarka": pełny rerun po wejściu, potem reruny fragmentów według
+    ich timerów run_every (jak frontend Streamlit), aż do `stop_at`
+    """
+    await asyncio.sleep(rng.uniform(0, ramp))
+    session = None
+    try:
+        session = await StreamlitSession(base_url).connect()
+        _, total, _ = await session.rerun(timeout=timeout)
+        level.latencies.append(total)
+        level.full_reruns += 1
+        now = time.perf_counter()
+        due = {fid: now + interval for fid, interval in session.auto_reruns.items()}
+        while due:
+            fragment_id = min(due, key=due.get)
+            if due[fragment_id] > stop_at:
+                break
+            delay = due[fragment_id] - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            level.lateness.append(max(0.0, -delay))
+            _, total, _ = await session.rerun(timeout=timeout, fragment_id=fragment_id)
+            level.latencies.append(total)
+            due[fragment_id] += session.auto_reruns[fragment_id]
+    except Exception:
+        level.errors += 1
+    finally:
+        if session is not None:
+            await session.close()
+
+
+async def run_level(base_url, sessions, duration, ramp, timeout, seed):
+    level = LoadLevel(sessions)
+    rng = random.Random(seed)
+    stop_at = time.perf_counter() + duration
+    await asyncio.gather(*(simulate_session(base_url, level, stop_at, ramp, timeout, rng)
+                           for _ in range(sessions)))
+    return level
+
+
+def start_dashboard(fixtures, script=REPO_ROOT / "dashboard.py"):
+    """`streamlit run` z yfinance podmienionym na fixtures i /metrics na wolnym porcie"""
+    port, metrics_port = _free_port(), _free_port()
+    env = _env()
+    env.update({
+        YF_FIXTURES_ENV: fixtures,
+        "METRICS_PORT": str(metrics_port),
+        "SANTANDER_SNAPSHOT_PATH": os.path.join(tempfile.mkdtemp(prefix="santander-load-"), "snapshot.pkl"),
+    })
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(script), "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false",
+         "--server.fileWatcherType", "none"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=REPO_ROOT
+    )
+    return proc, f"http://127.0.0.1:{port}", f"http://127.0.0.1:{metrics_port}/metrics"
+
+
+def run(levels, duration=90, fixtures=None, ramp=5.0, timeout=120, slo_p95=2.0):
+    """Kolejne poziomy N sesji na jednym serwerze; zwraca listę raportów per poziom"""
+    if fixtures is None or not os.path.isdir(fixtures):
+        fixtures = write_synthetic_fixtures(fixtures or tempfile.mkdtemp(prefix="santander-fixtures-"),
+                                            dashboard_symbols())
+    proc, base_url, metrics_url = start_dashboard(fixtures)
+    reports = []
+    try:
+        wait_for_health(base_url, timeout=timeout)
+        # Rozgrzewka: zimny start (snapshot, cache zasobów) nie wlicza się do żadnego poziomu
+        warmup = asyncio.run(run_level(base_url, 1, 0, 0, timeout, seed=0))
+        print(f"Rozgrzewka: pełny rerun {warmup.latencies[0] if warmup.latencies else float('nan'):.2f}s")
+
+        for i, sessions in enumerate(levels):
+            cpu_base, rss_base = process_usage(proc.pid)
+            fetches_base = scrape_stage_counts(metrics_url).get("fetch.yfinance", 0)
+            start = time.perf_counter()
+            level = asyncio.run(run_level(base_url, sessions, duration, ramp, timeout, seed=i + 1))
+            wall = time.perf_counter() - start
+            cpu, rss = process_usage(proc.pid)
+            fetches = scrape_stage_counts(metrics_url).get("fetch.yfinance", 0) - fetches_base
+            reports.append(level.report(cpu - cpu_base, wall, rss, rss_base, fetches))
+            print_report(reports[-1:], header=i == 0)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    within = [r["sessions"] for r in reports if r["errors"] == 0 and r["p95_s"] <= slo_p95]
+    print(f"\nPojemność przy p95 <= {slo_p95}s: {max(within) if within else 0} sesji "
+          f"(ostatni poziom z zapasem na tym hoście)")
+    return reports
+
+
+def print_report(reports, header=True):
+    columns = [("sessions", "N", "d"), ("reruns", "reruns", "d"), ("p50_s", "p50 s", ".3f"),
+               ("p95_s", "p95 s", ".3f"), ("p99_s", "p99 s", ".3f"), ("late_p95_s", "late p95", ".3f"),
+               ("errors", "err", "d"), ("cpu_pct", "CPU %", ".1f"),
+               ("cpu_s_per_session_min", "CPU s/sess/min", ".3f"), ("rss_mb", "RSS MB", ".1f"),
+               ("rss_mb_per_session", "MB/sess", ".2f"), ("fetches", "fetches", "d")]
+    if header:
+        print("".join(f"{title:>{max(8, len(title) + 2)}}" for _, title, _ in columns))
+    for r in reports:
+        print("".join(f"{r[key]:>{max(8, len(title) + 2)}{fmt}}" for key, title, fmt in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test obciążeniowy dashboardu: N równoległych sesji Streamlit")
+    parser.add_argument("--sessions", default="1,5,10,25,50", help="poziomy N, po przecinku")
+    parser.add_argument("--duration", type=float, default=90, help="sekundy na poziom (fragmenty co 30/60 s)")
+    parser.add_argument("--fixtures", help=f"katalog fixtures yfinance ({YF_FIXTURES_ENV}); brak = syntetyczne")
+    parser.add_argument("--record", action="store_true", help="najpierw nagraj fixtures z yfinance do --fixtures")
+    parser.add_argument("--ramp", type=float, default=5.0, help="rozłożenie wejść sesji (s)")
+    parser.add_argument("--slo", type=float, default=2.0, help="próg p95 latencji rerunu (s) dla pojemności")
+    parser.add_argument("--json", help="zapisz raport do pliku JSON")
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.fixtures:
+            parser.error("--record wymaga --fixtures")
+        record_fixtures(args.fixtures, dashboard_symbols())
+        print(f"Nagrano fixtures: {args.fixtures}")
+
+    results = run([int(n) for n in args.sessions.split(",")], duration=args.duration,
+                  fixtures=args.fixtures, ramp=args.ramp, slo_p95=args.slo)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,138 @@
+# santander_bot/bench/soak.py
+import argparse
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from santander_bot.config import SYMBOLS
+from santander_bot.core.memory import MemoryMonitor
+from santander_bot.core.replay import ReplaySource, write_synthetic_session
+from santander_bot.core.tracing import stage
+from santander_bot.strategies.sharded import ShardedScreener, synthetic_history
+
+
+def write_sessions(path, days, freq, symbols=SYMBOLS):
+    """Katalog na każdą sesję (kolejne dni robocze) - osobny seed, żeby wykresy się zmieniały"""
+    dates = pd.bdate_range("2025-11-03", periods=days)
+    return [write_synthetic_session(f"{path}/{d:%Y-%m-%d}", symbols, day=f"{d:%Y-%m-%d}", freq=freq, seed=i)
+            for i, d in enumerate(dates)]
+
+
+def growth_slope(samples, since):
+    """Nachylenie (MB na minutę zegara) regresji liniowej próbek po `since`"""
+    points = [(t, mb) for t, mb in samples if t >= since]
+    if len(points) < 3:
+        return 0.0
+    t, mb = np.array(points).T
+    return float(np.polyfit((t - t[0]) / 60, mb, 1)[0])
+
+
+def run(days=3, freq="1min", ui_hz=4.0, screener_every=2.0, tickers=40, warmup_days=1,
+        sample_every=1.0, trace_every=20.0, trace_window=3.0, rss_budget_mb=40.0, size_budget_mb=2.0):
+    """
+    Soak: kolejne sesje z replay (speed 0) przez pełny SantanderTerminal - wątek danych
+    (DataManager + alerty), wątek screenera i pętla UI renderująca layout do bufora.
+    Pierwsze `warmup_days` sesji to rozgrzewka; potem wzrost RSS i struktur podsystemów
+    (`track`) musi zmieścić się w budżecie. Zwraca raport (dict) z polem `ok`.
+    """
+    from santander_bot.main import SantanderTerminal
+
+    sessions = write_sessions(tempfile.mkdtemp(prefix="santander-soak-"), days, freq)
+    monitor = MemoryMonitor(interval=sample_every, trace_every=trace_every, trace_window=trace_window).start()
+    terminal = SantanderTerminal(source=ReplaySource(sessions[0], speed=0), memory=monitor)
+    # Screener w jednym workerze na syntetycznej historii - bez sieci, ta sama ścieżka co w terminalu
+    terminal.screener = ShardedScreener(workers=1, fetch=partial(synthetic_history, periods=250))
+    universe = [f"T{i:03d}" for i in range(tickers)]
+    done = threading.Event()
+    progress = {"day": 0, "ticks": 0, "frames": 0, "screens": 0, "warm_at": None, "errors": 0}
+
+    def data_loop():
+        for day, path in enumerate(sessions):
+            if day == warmup_days:
+                monitor.reset_baseline()
+                progress["warm_at"] = time.time()
+            source = ReplaySource(path, speed=0)
+            terminal.dm.source = source
+            terminal.dm.update_loop()
+            progress["day"] = day + 1
+            progress["ticks"] += source.ticks
+        done.set()
+
+    def screener_loop():
+        while not done.is_set():
+            try:
+                with stage("update_screener"):
+                    results = terminal.screener.run_screener(tickers=universe, require_fan=False, with_pe=False)
+                with terminal.screener_lock:
+                    terminal.screener_results = results
+                progress["screens"] += 1
+            except Exception:
+                progress["errors"] += 1
+            done.wait(screener_every)
+
+    screen = Console(file=io.StringIO(), width=200, height=60, force_terminal=True)
+    started = time.perf_counter()
+    threading.Thread(target=data_loop, name="soak-data", daemon=True).start()
+    threading.Thread(target=screener_loop, name="soak-screener", daemon=True).start()
+    try:
+        while not done.is_set():
+            with stage("render.frame"):
+                screen.print(terminal.make_full_layout())
+            screen.file.seek(0)
+            screen.file.truncate()  # Bufor "ekranu" nie może sam rosnąć
+            progress["frames"] += 1
+            done.wait(1.0 / ui_hz)
+    finally:
+        terminal.screener.shutdown()
+        monitor.sample()
+        monitor.stop()
+
+    state = monitor.latest()
+    warm_at = progress["warm_at"] or started
+    report = {
+        "sessions": days,
+        "ticks": progress["ticks"],
+        "frames": progress["frames"],
+        "screens": progress["screens"],
+        "errors": progress["errors"],
+        "elapsed_s": round(time.perf_counter() - started, 1),
+        "rss_mb": round(state["rss_mb"], 1),
+        "rss_growth_mb": round(state["rss_growth_mb"], 2),
+        "rss_slope_mb_per_min": round(growth_slope([(t, rss) for t, rss, _ in monitor.samples], warm_at), 3),
+        "size_growth_mb": {k: round(v, 3) for k, v in state["size_growth_mb"].items()},
+        "retained_mb": {k: round(v, 3) for k, v in state["retained"].items()},
+        "trace_windows": state["windows"],
+        "rss_budget_mb": rss_budget_mb,
+        "size_budget_mb": size_budget_mb,
+    }
+    report["ok"] = (report["errors"] == 0 and report["rss_growth_mb"] <= rss_budget_mb
+                    and all(v <= size_budget_mb for v in report["size_growth_mb"].values()))
+    print(monitor.report())
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak: sesje replay w przyspieszeniu, asercja ograniczonej pamięci")
+    parser.add_argument("--days", type=int, default=3, help="liczba sesji (pierwsza = rozgrzewka)")
+    parser.add_argument("--freq", default="1min", help="krok nagrania sesji 9:00-17:00 (1min = 480 ticków / symbol)")
+    parser.add_argument("--ui-hz", type=float, default=4.0, help="klatki layoutu na sekundę (terminal: 1)")
+    parser.add_argument("--screener-every", type=float, default=2.0, help="przerwa między przebiegami screenera (s)")
+    parser.add_argument("--tickers", type=int, default=40, help="wielkość uniwersum screenera")
+    parser.add_argument("--rss-budget", type=float, default=40.0, help="maks. wzrost RSS po rozgrzewce (MB)")
+    parser.add_argument("--size-budget", type=float, default=2.0, help="maks. wzrost struktury podsystemu (MB)")
+    parser.add_argument("--json", help="zapisz raport do pliku JSON")
+    args = parser.parse_args()
+
+    result = run(days=args.days, freq=args.freq, ui_hz=args.ui_hz, screener_every=args.screener_every,
+                 tickers=args.tickers, rss_budget_mb=args.rss_budget, size_budget_mb=args.size_budget)
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    sys.exit(0 if result["ok"] else 1)
@@ -0,0 +1,80 @@
+# santander_bot/bench/st_client.py
+import asyncio
+import time
+import urllib.request
+from tornado.httpclient import HTTPRequest
+from tornado.websocket import websocket_connect
+
+
+class StreamlitSession:
+    """
+    Minimalny klient protokołu Streamlit (websocket /_stcore/stream)
+
+    Udaje przeglądarkę: wysyła BackMsg.rerun_script i czyta ForwardMsg aż do
+    script_finished - bez frontendu, więc można otworzyć setki sesji z jednego procesu.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.ws = None
+        self.auto_reruns = {}  # fragment_id -> interval (s), jak timery st.fragment(run_every) w przeglądarce
+
+    async def connect(self, timeout=30):
+        ws_url = self.base_url.replace("http", "ws", 1) + "/_stcore/stream"
+        self.ws = await asyncio.wait_for(
+            websocket_connect(HTTPRequest(ws_url), subprotocols=["streamlit"]), timeout
+        )
+        return self
+
+    async def rerun(self, timeout=120, fragment_id=None):
+        """Jeden rerun skryptu (albo fragmentu): (sekundy do pierwszej delty, sekundy do końca, liczba delt)"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+            msg.rerun_script.is_auto_rerun = True
+
+        start = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+
+        first_delta = None
+        deltas = 0
+        deadline = start + timeout
+        while True:
+            raw = await asyncio.wait_for(self.ws.read_message(), max(0.1, deadline - time.perf_counter()))
+            if raw is None:
+                raise ConnectionError("Streamlit zamknął websocket")
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta":
+                deltas += 1
+                if first_delta is None:
+                    first_delta = time.perf_counter() - start
+            elif kind == "auto_rerun":
+                self.auto_reruns[fwd.auto_rerun.fragment_id] = fwd.auto_rerun.interval
+            elif kind == "script_finished":
+                return first_delta, time.perf_counter() - start, deltas
+
+    async def close(self):
+        if self.ws is not None:
+            self.ws.close()
+            self.ws = None
+
+
+def wait_for_health(base_url, timeout=60):
+    """Czeka aż serwer Streamlit odpowie na /_stcore/health, zwraca czas oczekiwania"""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(base_url.rstrip("/") + "/_stcore/health", timeout=1) as resp:
+                if resp.status == 200:
+                    return time.perf_counter() - start
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"Streamlit nie wystartował w {timeout}s")
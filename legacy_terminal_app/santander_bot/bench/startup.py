@@ -0,0 +1,146 @@
+# santander_bot/bench/startup.py
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from santander_bot.bench.st_client import StreamlitSession, wait_for_health
+
+LEGACY_DIR = Path(__file__).resolve().parents[2]
+REPO_ROOT = LEGACY_DIR.parent
+DEFAULT_BUDGET = Path(__file__).with_name("startup_budget.json")
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+TERMINAL_RUNNER = (
+    "from santander_bot.main import SantanderTerminal\n"
+    "SantanderTerminal().make_full_layout()\n"
+    "print('FIRST_FRAME', flush=True)\n"
+)
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(LEGACY_DIR), str(REPO_ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def measure_import(module, top=8):
+    """python -X importtime: łączny czas importu modułu + najcięższe bezpośrednie zależności"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=_env(), cwd=REPO_ROOT
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} nie powiódł się:\n{proc.stderr[-2000:]}")
+
+    total = 0.0
+    children = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_s = int(match.group(2)) / 1e6
+        depth = (len(match.group(3)) - 1) // 2
+        name = match.group(4)
+        if depth == 0 and name == module:
+            total = cumulative_s
+        elif depth == 1:
+            children.append((cumulative_s, name))
+    return total, sorted(children, reverse=True)[:top]
+
+
+def measure_terminal_first_frame(runs=3):
+    """Od startu procesu do pierwszego zbudowanego layoutu (mediana z `runs`)"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-c", TERMINAL_RUNNER], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True, env=_env(), cwd=LEGACY_DIR)
+        for line in proc.stdout:
+            if line.startswith("FIRST_FRAME"):
+                samples.append(time.perf_counter() - start)
+                break
+        proc.kill()
+        proc.wait()
+    if not samples:
+        raise RuntimeError("Terminal nie wyrenderował pierwszej klatki")
+    return statistics.median(samples)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_dashboard_first_frame(script=REPO_ROOT / "dashboard.py", timeout=120):
+    """Zimny start `streamlit run`: (gotowość serwera, pierwsza delta od startu procesu, pełny rerun)"""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", str(script), "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=_env(), cwd=REPO_ROOT
+    )
+    try:
+        ready = wait_for_health(base_url, timeout=timeout)
+
+        async def first_session():
+            session = await StreamlitSession(base_url).connect()
+            connected = time.perf_counter()
+            try:
+                first_delta, finished, _ = await session.rerun(timeout=timeout)
+            finally:
+                await session.close()
+            return connected - start + (first_delta or finished), finished
+
+        first_frame, full_rerun = asyncio.run(first_session())
+        return ready, first_frame, full_rerun
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run(budget_path=DEFAULT_BUDGET, skip_dashboard=False):
+    with open(budget_path) as f:
+        budget = json.load(f)
+
+    checks = []  # (nazwa, zmierzone, budżet)
+    for module, limit in budget.get("imports_s", {}).items():
+        total, children = measure_import(module)
+        checks.append((f"import {module}", total, limit))
+        print(f"\nimport {module}: {total:.3f}s")
+        for cumulative, name in children:
+            print(f"  {cumulative:8.3f}s  {name}")
+
+    if "terminal_first_frame_s" in budget:
+        checks.append(("terminal first frame", measure_terminal_first_frame(), budget["terminal_first_frame_s"]))
+
+    if not skip_dashboard and "dashboard_first_frame_s" in budget:
+        ready, first_frame, full_rerun = measure_dashboard_first_frame()
+        print(f"\ndashboard: server ready {ready:.2f}s, first full rerun {full_rerun:.2f}s")
+        checks.append(("dashboard first frame", first_frame, budget["dashboard_first_frame_s"]))
+
+    print(f"\n{'CHECK':<34}{'MEASURED s':>12}{'BUDGET s':>10}  STATUS")
+    failed = False
+    for name, measured, limit in checks:
+        ok = measured <= limit
+        failed |= not ok
+        print(f"{name:<34}{measured:>12.3f}{limit:>10.3f}  {'OK' if ok else 'OVER BUDGET'}")
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startup benchmark z budżetem czasu (exit 1 = przekroczony)")
+    parser.add_argument("--budget", default=str(DEFAULT_BUDGET), help="plik JSON z budżetami")
+    parser.add_argument("--skip-dashboard", action="store_true", help="bez zimnego startu streamlit")
+    args = parser.parse_args()
+    sys.exit(0 if run(args.budget, skip_dashboard=args.skip_dashboard) else 1)
@@ -3,10 +3,29 @@
 # === KONFIGURACJA ===
 SYMBOLS = ["CDR", "LPP", "XTB", "PKN", "PEO", "DNP"]  # Spółki do śledzenia
 REFRESH_RATE = 5  # Sekundy
-MARKET_OPEN_HOUR = 9
+MARKET_OPEN_HOUR = 9    # Godziny sesji GPW; dni sesyjne i skrócone sesje: core/gpw_calendar.py
 MARKET_CLOSE_HOUR = 17
+EXCHANGE_TZ = "Europe/Warsaw"
 
 # Wskaźniki
 RSI_PERIOD = 14
 SMA_FAST = 5
 SMA_SLOW = 20
+
+# Funkcje opcjonalne: nazwy zmiennych tutaj, moduły (profiler, pamięć, gateway) importowane dopiero gdy włączone
+PROFILE_ENV = "SANTANDER_PROFILE"
+MEMORY_ENV = "SANTANDER_MEMORY"
+GATEWAY_ENV = "SANTANDER_GATEWAY"
+GATEWAY_ADDRESS = "127.0.0.1:8765"
+
+# Screener (pełny rynek: GPW_UNIVERSE_FILE, patrz strategies/universe.py)
+SCREENER_WORKERS = None  # None = os.cpu_count()
+
+# Alerty (SANTANDER_ALERTS_FILE nadpisuje): symbol|* WSKAŹNIK </> próg albo zdarzenie
+ALERT_RULES = [
+    "* RSI < 30",          # BUY (RSI) z get_signal
+    "* RSI > 70",          # SELL (RSI)
+    "* MACD cross_up",
+    "* MACD cross_down",
+    "* FAN start",         # Początek wachlarza SMA5 > SMA10 > SMA15 > SMA20
+]
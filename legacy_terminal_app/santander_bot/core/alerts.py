@@ -0,0 +1,254 @@
+# santander_bot/core/alerts.py
+import argparse
+import os
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+import numpy as np
+import pandas as pd
+from santander_bot.config import SMA_SLOW
+from santander_bot.core.tracing import stage
+from santander_bot.strategies.technical import TechnicalAnalyzer
+
+# Plik z regułami użytkownika (jedna reguła w linii), inaczej ALERT_RULES z config.py
+ALERTS_ENV = "SANTANDER_ALERTS_FILE"
+
+INDICATORS = ("CLOSE", "RSI", "MACD", "MACD_DIFF", "SMA_FAST", "SMA_SLOW", "FAN", "VOLUME")
+
+# Zdarzenia nazwane -> przecięcie progu (warunki z TechnicalAnalyzer.get_signal / check_fan_formation)
+EVENTS = {
+    ("MACD", "cross_up"): ("MACD_DIFF", ">", 0.0),
+    ("MACD", "cross_down"): ("MACD_DIFF", "<", 0.0),
+    ("FAN", "start"): ("FAN", ">", 0.5),
+    ("FAN", "end"): ("FAN", "<", 0.5),
+}
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """Przecięcie progu: `>` = z dołu w górę, `<` = z góry w dół; symbol '*' = każdy symbol"""
+    symbol: str
+    indicator: str
+    op: str
+    threshold: float
+    text: str = ""
+
+    @classmethod
+    def parse(cls, text: str) -> "AlertRule":
+        """'CDR RSI < 30', '* MACD cross_up', '* FAN start', 'PKN CLOSE > 61.5'"""
+        parts = text.split()
+        if len(parts) < 3:
+            raise ValueError(f"Niepoprawna reguła: {text!r}")
+        symbol, indicator, op = parts[0].upper(), parts[1].upper(), parts[2].lower()
+        if (indicator, op) in EVENTS:
+            indicator, op, threshold = EVENTS[(indicator, op)]
+        else:
+            op = {"cross_up": ">", "cross_down": "<"}.get(op, op)
+            if op not in (">", "<") or len(parts) != 4:
+                raise ValueError(f"Niepoprawna reguła: {text!r}")
+            threshold = float(parts[3])
+        if indicator not in INDICATORS:
+            raise ValueError(f"Nieznany wskaźnik {indicator!r} (dostępne: {', '.join(INDICATORS)})")
+        return cls(symbol, indicator, op, threshold, text.strip())
+
+
+@dataclass
+class Alert:
+    symbol: str
+    rule: AlertRule
+    value: float
+    previous: float
+    ts: object = None
+    id: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def message(self) -> str:
+        return f"{self.symbol}: {self.rule.text or self.rule.indicator} ({self.previous:.2f} → {self.value:.2f})"
+
+
+def indicator_values(df: pd.DataFrame) -> Dict[str, float]:
+    """Ostatnie wartości wskaźników z OHLCV (DataManager.get_data albo historia snapshotu)"""
+    if df.empty or len(df) < SMA_SLOW:
+        return {}
+    df = TechnicalAnalyzer.add_indicators(df[['Open', 'High', 'Low', 'Close', 'Volume']].copy())
+    close = df['Close'].to_numpy(dtype=np.float64)
+    sma = [close[-w:].mean() for w in (5, 10, 15, 20)]
+    last = df.iloc[-1]
+    return {
+        "CLOSE": float(close[-1]),
+        "RSI": float(last['RSI']),
+        "MACD": float(last['MACD']),
+        "MACD_DIFF": float(last['MACD'] - last['SIGNAL']),
+        "SMA_FAST": float(last['SMA_FAST']),
+        "SMA_SLOW": float(last['SMA_SLOW']),
+        "FAN": float(sma[0] > sma[1] > sma[2] > sma[3]),
+        "VOLUME": float(last['Volume']),
+    }
+
+
+class _ThresholdIndex:
+    """Posortowane progi jednego (symbol, wskaźnik): osobno dla `>` i `<`"""
+
+    def __init__(self):
+        self.up_thresholds, self.up_rules = [], []
+        self.down_thresholds, self.down_rules = [], []
+
+    def build(self, rules: List[AlertRule]):
+        for op, thresholds, bucket in ((">", self.up_thresholds, self.up_rules),
+                                       ("<", self.down_thresholds, self.down_rules)):
+            ordered = sorted((r for r in rules if r.op == op), key=lambda r: r.threshold)
+            thresholds[:] = [r.threshold for r in ordered]
+            bucket[:] = ordered
+        return self
+
+    def crossed(self, previous: float, value: float) -> List[AlertRule]:
+        """Reguły, których próg leży między poprzednią a obecną wartością - O(log R + trafienia)"""
+        if value > previous:  # `>`: previous <= próg < value
+            lo = bisect_left(self.up_thresholds, previous)
+            hi = bisect_left(self.up_thresholds, value)
+            return self.up_rules[lo:hi]
+        if value < previous:  # `<`: value < próg <= previous
+            lo = bisect_right(self.down_thresholds, value)
+            hi = bisect_right(self.down_thresholds, previous)
+            return self.down_rules[lo:hi]
+        return []
+
+
+class AlertEngine:
+    """
+    Strumieniowy silnik alertów
+
+    Reguły są kompilowane do indeksów progów per (symbol, wskaźnik); aktualizacja
+    symbolu sprawdza tylko wskaźniki, których wartość się zmieniła, a w nich tylko
+    progi leżące między starą i nową wartością (bisect). Pierwsza obserwacja
+    symbolu tylko ustawia stan - bez lawiny alertów po starcie.
+    """
+
+    def __init__(self, rules=(), history: int = 200):
+        self.rules: List[AlertRule] = []
+        self.alerts = deque(maxlen=history)
+        self.listeners: List[Callable[[Alert], None]] = []
+        self.evaluations = 0
+        self._index: Dict[tuple, _ThresholdIndex] = {}
+        self._by_key: Dict[tuple, List[AlertRule]] = {}
+        self._last: Dict[str, Dict[str, float]] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        for rule in rules:
+            self.add_rule(rule)
+
+    def add_rule(self, rule):
+        if isinstance(rule, str):
+            rule = AlertRule.parse(rule)
+        with self._lock:
+            self.rules.append(rule)
+            key = (rule.symbol, rule.indicator)
+            self._by_key.setdefault(key, []).append(rule)
+            self._index[key] = _ThresholdIndex().build(self._by_key[key])  # Tylko indeks tej pary
+        return rule
+
+    def subscribe(self, callback: Callable[[Alert], None]):
+        """Rejestruje callback(alert) - terminal, dashboard, webhook..."""
+        self.listeners.append(callback)
+
+    def observe(self, symbol: str, values: Dict[str, float], ts=None) -> List[Alert]:
+        """Nowe wartości wskaźników symbolu -> lista alertów (i powiadomienie listenerów)"""
+        fired = []
+        with self._lock:
+            last = self._last.setdefault(symbol, {})
+            for indicator, value in values.items():
+                previous = last.get(indicator)
+                if value is None or value != value:  # NaN
+                    continue
+                last[indicator] = value
+                if previous is None or previous == value:
+                    continue
+                for key in ((symbol, indicator), ("*", indicator)):
+                    index = self._index.get(key)
+                    if index is None:
+                        continue
+                    self.evaluations += 1
+                    for rule in index.crossed(previous, value):
+                        alert = Alert(symbol, rule, value, previous, ts, id=self._next_id)
+                        self._next_id += 1
+                        self.alerts.append(alert)
+                        fired.append(alert)
+        for alert in fired:
+            for callback in self.listeners:
+                callback(alert)
+        return fired
+
+    def on_update(self, dm, symbol: str):
+        """Listener DataManagera: wskaźniki z okna danych symbolu -> observe()"""
+        df = dm.get_data(symbol)
+        with stage("alerts.evaluate", symbol=symbol):
+            values = indicator_values(df)
+            if values:
+                self.observe(symbol, values, df.index[-1])
+
+    def attach(self, dm):
+        dm.subscribe(lambda symbol: self.on_update(dm, symbol))
+        return self
+
+    def recent(self, n: int = 10, after_id: int = 0, symbols=None) -> List[Alert]:
+        """Najnowsze alerty (od najnowszego), opcjonalnie tylko nowsze niż `after_id` / dla `symbols`"""
+        with self._lock:
+            return [a for a in reversed(self.alerts)
+                    if a.id > after_id and (symbols is None or a.symbol in symbols)][:n]
+
+
+def load_rules(path: str = None) -> List[str]:
+    """Reguły z pliku ($SANTANDER_ALERTS_FILE) albo domyślne ALERT_RULES z config.py"""
+    from santander_bot.config import ALERT_RULES
+
+    path = path or os.getenv(ALERTS_ENV)
+    if not path:
+        return list(ALERT_RULES)
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def benchmark_rules(n_rules: int = 5000, n_symbols: int = 100, ticks: int = 20000, seed: int = 0):
+    """Czas observe() na tick przy `n_rules` regułach (bez liczenia wskaźników)"""
+    rng = random.Random(seed)
+    symbols = [f"T{i:03d}" for i in range(n_symbols)]
+    ranges = {"RSI": (0, 100), "CLOSE": (10, 200), "MACD_DIFF": (-2, 2), "SMA_FAST": (10, 200)}
+    engine = AlertEngine()
+    for _ in range(n_rules):
+        indicator = rng.choice(list(ranges))
+        lo, hi = ranges[indicator]
+        symbol = "*" if rng.random() < 0.01 else rng.choice(symbols)
+        engine.add_rule(AlertRule(symbol, indicator, rng.choice("<>"), rng.uniform(lo, hi)))
+
+    state = {s: {k: (lo + hi) / 2 for k, (lo, hi) in ranges.items()} for s in symbols}
+    for s in symbols:
+        engine.observe(s, state[s])
+
+    updates = []
+    for _ in range(ticks):
+        s = rng.choice(symbols)
+        values = {k: min(hi, max(lo, v + rng.gauss(0, (hi - lo) * 0.01)))
+                  for (k, v), (lo, hi) in zip(state[s].items(), ranges.values())}
+        state[s] = values
+        updates.append((s, values))
+
+    start = time.perf_counter()
+    fired = sum(len(engine.observe(s, values)) for s, values in updates)
+    per_tick = (time.perf_counter() - start) / ticks
+    print(f"{n_rules} reguł, {n_symbols} symboli: {per_tick * 1e6:.1f} µs/tick, "
+          f"{fired} alertów w {ticks} tickach")
+    return per_tick
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark silnika alertów (µs na tick)")
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=20000)
+    args = parser.parse_args()
+    benchmark_rules(args.rules, args.symbols, args.ticks)
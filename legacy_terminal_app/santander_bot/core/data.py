@@ -2,21 +2,72 @@
 import threading
 import time
 import pandas as pd
-import yfinance as yf
-import requests
 from datetime import datetime
-from santander_bot.config import SYMBOLS, MARKET_OPEN_HOUR, MARKET_CLOSE_HOUR, REFRESH_RATE
+from santander_bot.config import SYMBOLS, REFRESH_RATE, EXCHANGE_TZ
+from santander_bot.core.gpw_calendar import CALENDAR
+from santander_bot.core.hedging import Cached, HedgedFetcher
+from santander_bot.core.tracing import stage
+
+def _local_time(ts):
+    """Znacznik czasu giełdy bez strefy (Stooq: datetime.now(), yfinance: Europe/Warsaw)"""
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert(EXCHANGE_TZ).tz_localize(None) if ts.tzinfo is not None else ts
+
 
 class DataManager:
-    def __init__(self):
+    def __init__(self, source=None):
         self.data_store = {sym: pd.DataFrame() for sym in SYMBOLS}
         self.lock = threading.Lock()
         self.running = True
+        self.source = source  # np. ReplaySource / GatewaySource - zastępuje Stooq/yfinance
+        self.listeners = []
+        self.calendar = CALENDAR
+        self.polled = {}  # symbol -> time.time() ostatniego odpytania upstream
+        # Wyścig Stooq / yfinance: główne = niższe p95, drugie startuje po p95 głównego
+        self.quotes = HedgedFetcher({"stooq": self.stooq_update, "yfinance": self.yfinance_update})
+
+    def subscribe(self, callback):
+        """Rejestruje callback(sym) wołany po każdej aktualizacji danych symbolu"""
+        self.listeners.append(callback)
+
+    def _notify(self, sym):
+        for callback in self.listeners:
+            callback(sym)
+
+    def append_bar(self, sym, bar, ts):
+        """Dopisuje świecę (klucze jak w get_stooq_price) do okna 100 ostatnich"""
+        new_row = pd.DataFrame([{
+            "Open": bar["open"],
+            "High": bar["high"],
+            "Low": bar["low"],
+            "Close": bar["close"],
+            "Volume": bar["volume"]
+        }], index=[ts])
+
+        with self.lock:
+            if sym in self.data_store:
+                self.data_store[sym] = pd.concat([self.data_store[sym], new_row]).tail(100)
+            else:
+                self.data_store[sym] = new_row
+        self._notify(sym)
+
+    def replace_history(self, sym, df):
+        """Historia (yfinance) w miejsce okna; świece nowsze niż jej koniec (żywe ze Stooq) zostają"""
+        with self.lock:
+            current = self.data_store.get(sym)
+            if current is not None and not current.empty and not df.empty:
+                last = _local_time(df.index[-1])
+                newer = current[[_local_time(ts) > last for ts in current.index]]
+                if not newer.empty:
+                    df = pd.concat([df, newer])
+            self.data_store[sym] = df.tail(100)
+        self._notify(sym)
 
     def get_stooq_price(self, ticker):
         try:
             url = f"https://stooq.pl/q/l/?s={ticker.lower()}.pl&f=sd2t2ohlcv&h&e=csv"
-            df = pd.read_csv(url)
+            with stage("fetch.stooq", symbol=ticker):
+                df = pd.read_csv(url)
             if not df.empty:
                 last = df.iloc[-1]
                 return {
@@ -32,50 +83,76 @@ class DataManager:
         return None
 
     def get_yfinance_data(self, ticker):
+        """
+        5 sesji świec 5m z BAR_STORE (odświeżanie przyrostowe, wspólne z widokami 15m/1h/1d)
+        + czy były pobrane z sieci (False = z pamięci BAR_STORE)
+        """
+        from santander_bot.core.resample import BAR_STORE  # yfinance dopiero przy pierwszym fallbacku
+
         try:
-            df = yf.download(f"{ticker}.WA", period="5d", interval="5m", progress=False)
-            if not df.empty:
-                # Fix for yfinance returning MultiIndex
-                if isinstance(df.columns, pd.MultiIndex):
-                    df.columns = df.columns.droplevel(1)
-                
-                df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-                return df
+            df = BAR_STORE.get(f"{ticker}.WA", period="5d", interval="5m")
+            return df, BAR_STORE.last_fetched
         except Exception:
             pass
-        return pd.DataFrame()
+        return pd.DataFrame(), True
+
+    def stooq_update(self, sym):
+        """("bar", bar, ts) ze Stooq, gdy notowanie jest dzisiejsze albo trwa sesja - inaczej None"""
+        stooq = self.get_stooq_price(sym)
+        now = datetime.now()
+        is_market_hours = self.calendar.is_open()
+        
+        # Sprawdź czy dane ze Stooq są dzisiejsze
+        is_today = stooq and now.strftime("%Y-%m-%d") in str(stooq["time"])
+
+        if stooq and (is_today or is_market_hours):
+            return "bar", stooq, now
+        return None
+
+    def yfinance_update(self, sym):
+        """("history", df, None) ze świec 5m albo None; z pamięci BAR_STORE - Cached (bez pomiaru latencji)"""
+        df, fetched = self.get_yfinance_data(sym)
+        if not df.empty:
+            update = ("history", df, None)
+            return update if fetched else Cached(update)
+        return None
+
+    def poll_symbol(self, sym):
+        """
+        Jedno odpytanie upstream dla symbolu: pierwsza poprawna odpowiedź z wyścigu
+        Stooq / yfinance (HedgedFetcher) albo None
+        """
+        _, update = self.quotes.fetch(sym)
+        return update
+
+    def should_poll(self, sym):
+        """Sesja / okno po zamknięciu, dane sprzed ostatniego zamknięcia albo pusty symbol (zimny start)"""
+        with self.lock:
+            empty = self.data_store.get(sym, pd.DataFrame()).empty
+        return empty or self.calendar.needs_refresh(self.polled.get(sym))
+
+    def apply_update(self, sym, update):
+        """Wynik poll_symbol (lokalny albo z gatewaya) -> data_store + listenerzy"""
+        if update is None:
+            return
+        kind, payload, ts = update
+        if kind == "bar":
+            self.append_bar(sym, payload, ts)
+        else:
+            self.replace_history(sym, payload)
 
     def update_loop(self):
+        if self.source is not None:
+            # Źródło zastępcze (replay, gateway) samo steruje tempem
+            self.source.run(self)
+            return
+
         while self.running:
             for sym in SYMBOLS:
-                # 1. Stooq (Live)
-                stooq = self.get_stooq_price(sym)
-                now = datetime.now()
-                is_market_hours = MARKET_OPEN_HOUR <= now.hour < MARKET_CLOSE_HOUR
-                
-                # Sprawdź czy dane ze Stooq są dzisiejsze
-                is_today = stooq and now.strftime("%Y-%m-%d") in str(stooq["time"])
-
-                if stooq and (is_today or is_market_hours):
-                    new_row = pd.DataFrame([{
-                        "Open": stooq["open"],
-                        "High": stooq["high"],
-                        "Low": stooq["low"],
-                        "Close": stooq["close"],
-                        "Volume": stooq["volume"]
-                    }], index=[now])
-                    
-                    with self.lock:
-                        if sym in self.data_store:
-                            self.data_store[sym] = pd.concat([self.data_store[sym], new_row]).tail(100)
-                        else:
-                            self.data_store[sym] = new_row
-                else:
-                    # 2. Fallback yfinance
-                    df = self.get_yfinance_data(sym)
-                    if not df.empty:
-                        with self.lock:
-                            self.data_store[sym] = df.tail(100)
+                if not self.should_poll(sym):
+                    continue
+                self.polled[sym] = time.time()
+                self.apply_update(sym, self.poll_symbol(sym))
             
             time.sleep(REFRESH_RATE)
 
@@ -0,0 +1,330 @@
+# santander_bot/core/gateway.py
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+import pandas as pd
+from santander_bot.config import GATEWAY_ADDRESS, GATEWAY_ENV, SYMBOLS, REFRESH_RATE
+from santander_bot.core.data import DataManager
+from santander_bot.core.gpw_calendar import CALENDAR
+from santander_bot.core.tracing import stage
+
+# Adres gatewaya dla klientów: "host:port" albo ścieżka gniazda unixowego
+DEFAULT_ADDRESS = GATEWAY_ADDRESS
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+CLIENT_QUEUE = 256      # wiadomości w kolejce klienta; wolny klient traci najstarsze
+UPSTREAM_SLOTS = 8      # równoległe pobrania upstream (wątki)
+
+
+def parse_address(address):
+    """'127.0.0.1:8765' -> ("tcp", (host, port)); '/run/santander.sock' -> ("unix", path)"""
+    if "/" in address or ":" not in address:
+        return "unix", address
+    host, port = address.rsplit(":", 1)
+    return "tcp", (host, int(port))
+
+
+def frame_to_wire(df):
+    """DataFrame OHLCV -> JSON-owalny słownik (indeks jako ns epoch + strefa)"""
+    index = pd.DatetimeIndex(df.index)
+    return {
+        "index": index.asi8.tolist(),
+        "tz": str(index.tz) if index.tz is not None else None,
+        "columns": list(df.columns),
+        "data": df.to_numpy(dtype=float).tolist(),
+    }
+
+
+def frame_from_wire(payload):
+    index = pd.DatetimeIndex(pd.to_datetime(payload["index"], unit="ns"))
+    if payload["tz"]:
+        index = index.tz_localize("UTC").tz_convert(payload["tz"])
+    return pd.DataFrame(payload["data"], index=index, columns=payload["columns"])
+
+
+def fetch_history(symbol, period="3mo", interval="1d"):
+    """Historia OHLCV jednego symbolu GPW z BAR_STORE (blokujące - wołane w wątku)"""
+    from santander_bot.core.resample import BAR_STORE
+
+    with stage("fetch.history", symbol=symbol, period=period, interval=interval, via="gateway"):
+        return BAR_STORE.get(f"{symbol}.WA", period=period, interval=interval)
+
+
+def _encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+class MarketGateway:
+    """
+    Lokalny gateway notowań (asyncio): jedyne miejsce, które odpytuje Stooq/yfinance
+
+    - poll: co `interval` jedno poll_symbol() na symbol (stałe `symbols` + subskrybowane),
+      wynik rozsyłany do wszystkich subskrybentów symbolu (zakodowany raz); poza sesją GPW
+      (CALENDAR) tylko symbole bez danych z ostatniego zamknięcia
+    - history: zapytania o historię deduplikowane - świeży cache (`history_ttl`)
+      albo wspólne zadanie w locie, więc N klientów = jedno pobranie upstream
+    - protokół: JSON w liniach (NDJSON) po TCP albo gnieździe unixowym
+        {"op": "subscribe", "symbols": [...]}                      -> push "bar" / "history"
+        {"op": "history", "id": 1, "symbols": [...], "period": "3mo", "interval": "1d"}
+        {"op": "stats", "id": 2}
+    """
+
+    def __init__(self, symbols=None, interval=REFRESH_RATE, history_ttl=30, poller=None,
+                 history_fetch=fetch_history):
+        self.symbols = set(SYMBOLS if symbols is None else symbols)
+        self.interval = interval
+        self.history_ttl = history_ttl
+        self.poller = poller or DataManager()  # Tylko metody poll_symbol, bez własnej pętli
+        self.history_fetch = history_fetch
+        self.stats = {"upstream": 0, "deduped": 0, "cached": 0, "pushed": 0, "dropped": 0, "errors": 0}
+        self.clients = 0
+        self._cache = {}        # klucz -> (monotonic, wartość)
+        self._inflight = {}     # klucz -> asyncio.Task
+        self._subscribers = {}  # symbol -> {asyncio.Queue}
+        self._last = {}         # symbol -> ostatnia wiadomość (dla nowych subskrybentów)
+        self._polled = {}       # symbol -> time.time() ostatniego poll
+        self._slots = None
+
+    # --- Pobrania upstream (dedupe) ---
+    async def fetch(self, key, ttl, fn, *args):
+        """Jedno pobranie upstream na klucz: świeży cache -> wspólne zadanie w locie -> nowe w wątku"""
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            self.stats["cached"] += 1
+            return cached[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_upstream(key, fn, *args))
+            self._inflight[key] = task
+        else:
+            self.stats["deduped"] += 1
+        return await asyncio.shield(task)  # Rozłączenie jednego klienta nie anuluje pobrania
+
+    async def _fetch_upstream(self, key, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(UPSTREAM_SLOTS)
+        try:
+            async with self._slots:
+                self.stats["upstream"] += 1
+                value = await asyncio.to_thread(fn, *args)
+            self._cache[key] = (time.monotonic(), value)
+            return value
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    # --- Poll + fan-out ---
+    async def poll_forever(self):
+        while True:
+            started = time.monotonic()
+            due = [sym for sym in self.symbols | set(self._subscribers)
+                   if sym not in self._last or CALENDAR.needs_refresh(self._polled.get(sym))]
+            await asyncio.gather(*(self.poll(sym) for sym in due))
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def poll(self, sym):
+        self._polled[sym] = time.time()
+        try:
+            update = await self.fetch(("poll", sym), self.interval, self.poller.poll_symbol, sym)
+        except Exception:
+            return
+        if update is None:
+            return
+
+        kind, payload, ts = update
+        if kind == "bar":
+            bar = {k: payload[k] for k in ("open", "high", "low", "close", "volume")}
+            message = {"type": "bar", "symbol": sym, "time": ts.isoformat(), "bar": bar}
+        else:
+            message = {"type": "history", "symbol": sym, "frame": frame_to_wire(payload)}
+        self.publish(sym, _encode(message))
+
+    def publish(self, sym, line):
+        if self._last.get(sym) == line:
+            return  # Nic nowego (np. ta sama historia poza sesją)
+        self._last[sym] = line
+        for queue in self._subscribers.get(sym, ()):
+            self._offer(queue, line)
+
+    def _offer(self, queue, line):
+        if queue.full():
+            queue.get_nowait()  # Wolny klient: liczy się najświeższy stan, nie pełna historia
+            self.stats["dropped"] += 1
+        queue.put_nowait(line)
+        self.stats["pushed"] += 1
+
+    # --- Klienci ---
+    async def _drain(self, queue, writer):
+        while True:
+            writer.write(await queue.get())
+            await writer.drain()
+
+    async def handle_client(self, reader, writer):
+        queue = asyncio.Queue(CLIENT_QUEUE)
+        subscribed = set()
+        sender = asyncio.create_task(self._drain(queue, writer))
+        self.clients += 1
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    continue
+                await self.dispatch(request, queue, subscribed)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients -= 1
+            for sym in subscribed:
+                self._subscribers[sym].discard(queue)
+                if not self._subscribers[sym]:
+                    del self._subscribers[sym]
+            sender.cancel()
+            writer.close()
+
+    async def dispatch(self, request, queue, subscribed):
+        op = request.get("op")
+        if op == "subscribe":
+            for sym in request.get("symbols", []):
+                self._subscribers.setdefault(sym, set()).add(queue)
+                subscribed.add(sym)
+                if sym in self._last:
+                    self._offer(queue, self._last[sym])
+                elif sym not in self.symbols:
+                    asyncio.create_task(self.poll(sym))  # Nowy symbol - nie czekaj na kolejną rundę
+
+        elif op == "history":
+            symbols = request.get("symbols", [])
+            period, interval = request.get("period", "3mo"), request.get("interval", "1d")
+            results = await asyncio.gather(*(
+                self.fetch(("history", sym, period, interval), self.history_ttl,
+                           self.history_fetch, sym, period, interval)
+                for sym in symbols
+            ), return_exceptions=True)
+            frames = {
+                sym: frame_to_wire(df) if isinstance(df, pd.DataFrame) and not df.empty else None
+                for sym, df in zip(symbols, results)
+            }
+            await queue.put(_encode({"type": "reply", "id": request.get("id"), "frames": frames}))
+
+        elif op == "stats":
+            await queue.put(_encode({
+                "type": "reply", "id": request.get("id"), "clients": self.clients,
+                "subscriptions": {sym: len(q) for sym, q in self._subscribers.items()}, **self.stats
+            }))
+
+    async def serve(self, address=DEFAULT_ADDRESS):
+        kind, target = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.unlink(target)  # Gniazdo po poprzednim procesie
+            server = await asyncio.start_unix_server(self.handle_client, path=target)
+        else:
+            server = await asyncio.start_server(self.handle_client, *target)
+        poller = asyncio.create_task(self.poll_forever())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            poller.cancel()
+
+
+# --- Klienci synchroniczni (dashboard, screener, terminal) ---
+def _connect(address, timeout=None):
+    kind, target = parse_address(address)
+    sock = socket.socket(socket.AF_UNIX if kind == "unix" else socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(target)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class GatewayClient:
+    """Zapytania request/response do gatewaya (połączenie na zapytanie - bezpieczne między wątkami)"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=60):
+        self.address = address
+        self.timeout = timeout
+
+    def request(self, op, **fields):
+        with _connect(self.address, self.timeout) as sock:
+            sock.sendall(_encode({"op": op, "id": 1, **fields}))
+            with sock.makefile("r", encoding="utf-8") as f:
+                for line in f:
+                    message = json.loads(line)
+                    if message.get("type") == "reply" and message.get("id") == 1:
+                        return message
+        raise ConnectionError(f"gateway {self.address} zamknął połączenie")
+
+    def history(self, symbols, period="3mo", interval="1d"):
+        """symbol -> DataFrame OHLCV (brakujące symbole pominięte)"""
+        reply = self.request("history", symbols=list(symbols), period=period, interval=interval)
+        return {sym: frame_from_wire(wire) for sym, wire in reply["frames"].items() if wire}
+
+    def stats(self):
+        return self.request("stats")
+
+
+def gateway_from_env():
+    """GatewayClient gdy ustawiono $SANTANDER_GATEWAY, inaczej None (pobranie bezpośrednie)"""
+    address = os.getenv(GATEWAY_ENV)
+    return GatewayClient(address) if address else None
+
+
+class GatewaySource:
+    """Źródło DataManagera: subskrypcja notowań z gatewaya zamiast własnego odpytywania"""
+
+    def __init__(self, address=DEFAULT_ADDRESS, symbols=None, retry=2.0):
+        self.address = address
+        self.symbols = symbols
+        self.retry = retry
+        self.messages = 0
+
+    def handle(self, dm, message):
+        sym = message["symbol"]
+        if message["type"] == "bar":
+            dm.apply_update(sym, ("bar", message["bar"], pd.Timestamp(message["time"])))
+        elif message["type"] == "history":
+            dm.apply_update(sym, ("history", frame_from_wire(message["frame"]), None))
+        self.messages += 1
+
+    def run(self, dm):
+        symbols = self.symbols or list(dm.data_store)
+        while dm.running:
+            try:
+                with _connect(self.address) as sock:
+                    sock.sendall(_encode({"op": "subscribe", "symbols": symbols}))
+                    with sock.makefile("r", encoding="utf-8") as f:
+                        for line in f:
+                            if not dm.running:
+                                return
+                            self.handle(dm, json.loads(line))
+            except OSError:
+                pass  # Gateway niedostępny / restart - ponów
+            time.sleep(self.retry)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokalny gateway notowań GPW (fan-out do wielu klientów)")
+    parser.add_argument("--listen", default=os.getenv(GATEWAY_ENV, DEFAULT_ADDRESS),
+                        help="host:port albo ścieżka gniazda unixowego")
+    parser.add_argument("--interval", type=float, default=REFRESH_RATE, help="kadencja poll per symbol (s)")
+    parser.add_argument("--history-ttl", type=float, default=30, help="ważność historii w cache (s)")
+    parser.add_argument("--symbols", default=",".join(SYMBOLS), help="symbole odpytywane zawsze")
+    args = parser.parse_args()
+
+    gateway = MarketGateway(symbols=args.symbols.split(","), interval=args.interval, history_ttl=args.history_ttl)
+    print(f"Gateway nasłuchuje na {args.listen} (poll co {args.interval}s)")
+    try:
+        asyncio.run(gateway.serve(args.listen))
+    except KeyboardInterrupt:
+        pass
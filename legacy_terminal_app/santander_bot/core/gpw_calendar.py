@@ -0,0 +1,201 @@
+# santander_bot/core/gpw_calendar.py
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+import pandas as pd
+from santander_bot.config import EXCHANGE_TZ, MARKET_OPEN_HOUR, MARKET_CLOSE_HOUR
+
+CALENDAR_ENV = "SANTANDER_GPW_CALENDAR"
+
+# Po zamknięciu (aukcja 17:00) dane dzienne jeszcze spływają (Stooq / opóźnienie Yahoo);
+# do końca tego okna odświeżamy jak w sesji, potem jedno ostatnie odświeżenie i cisza
+SETTLE_MINUTES = 20
+
+# Dni bez sesji spoza reguł (jednorazowe decyzje zarządu GPW)
+EXTRA_CLOSURES = {date(2018, 11, 12)}
+
+
+def easter(year: int) -> date:
+    """Niedziela Wielkanocna (algorytm Meeusa/Jonesa/Butchera, kalendarz gregoriański)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=64)
+def gpw_holidays(year: int) -> frozenset:
+    """Dni robocze bez sesji: święta ustawowe + Wigilia, Wielki Piątek i Sylwester (kalendarz GPW)"""
+    sunday = easter(year)
+    days = {
+        date(year, 1, 1), date(year, 1, 6),
+        sunday - timedelta(days=2),   # Wielki Piątek
+        sunday + timedelta(days=1),   # Poniedziałek Wielkanocny
+        date(year, 5, 1), date(year, 5, 3),
+        sunday + timedelta(days=60),  # Boże Ciało
+        date(year, 8, 15), date(year, 11, 1), date(year, 11, 11),
+        date(year, 12, 24), date(year, 12, 25), date(year, 12, 26), date(year, 12, 31),
+    }
+    return frozenset(days | {d for d in EXTRA_CLOSURES if d.year == year})
+
+
+def load_overrides(path: str = None) -> Tuple[set, Dict[date, Tuple[int, int]]]:
+    """
+    Plik `SANTANDER_GPW_CALENDAR`: linia "RRRR-MM-DD closed" (dodatkowy dzień wolny)
+    albo "RRRR-MM-DD HH:MM" (sesja skrócona - godzina zamknięcia); # = komentarz
+    """
+    path = path or os.getenv(CALENDAR_ENV)
+    closed, half_days = set(), {}
+    if not path or not os.path.exists(path):
+        return closed, half_days
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            day, _, rule = line.partition(" ")
+            day = date.fromisoformat(day)
+            rule = rule.strip().lower()
+            if rule == "closed":
+                closed.add(day)
+            else:
+                hour, minute = rule.split(":")
+                half_days[day] = (int(hour), int(minute))
+    return closed, half_days
+
+
+class GPWCalendar:
+    """
+    Offline kalendarz sesji GPW (Europe/Warsaw): weekendy, święta liczone regułami
+    (Wielkanoc -> Wielki Piątek, Poniedziałek Wielkanocny, Boże Ciało), dni z pliku
+    `SANTANDER_GPW_CALENDAR` i sesje skrócone (`half_days`: dzień -> godzina zamknięcia)
+
+    `needs_refresh(last)` to jedyna decyzja dla pollingu, screenera i snapshotów: w sesji
+    i przez SETTLE_MINUTES po zamknięciu zawsze True, potem True tylko raz - dla danych
+    sprzed ostatniego zamknięcia (+ SETTLE_MINUTES).
+    """
+
+    def __init__(self, closed=(), half_days=None, tz: str = EXCHANGE_TZ,
+                 open_time=(MARKET_OPEN_HOUR, 0), close_time=(MARKET_CLOSE_HOUR, 0),
+                 settle_minutes: int = SETTLE_MINUTES):
+        self.closed = set(closed)
+        self.half_days = dict(half_days or {})
+        self.tz = tz
+        self.open_time = open_time
+        self.close_time = close_time
+        self.settle = pd.Timedelta(minutes=settle_minutes)
+
+    @classmethod
+    def from_env(cls):
+        closed, half_days = load_overrides()
+        return cls(closed, half_days)
+
+    # --- Dni ---
+    def _now(self, now=None) -> pd.Timestamp:
+        if now is None:
+            return pd.Timestamp.now(tz=self.tz)
+        if isinstance(now, (int, float)):
+            return pd.Timestamp(now, unit="s", tz="UTC").tz_convert(self.tz)
+        now = pd.Timestamp(now)
+        return now.tz_localize(self.tz) if now.tzinfo is None else now.tz_convert(self.tz)
+
+    def is_session_day(self, day) -> bool:
+        day = day.date() if isinstance(day, datetime) else day
+        return day.weekday() < 5 and day not in gpw_holidays(day.year) and day not in self.closed
+
+    def session_bounds(self, day) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """(otwarcie, zamknięcie) sesji w dniu `day` albo None"""
+        day = day.date() if isinstance(day, datetime) else day
+        if not self.is_session_day(day):
+            return None
+        close = self.half_days.get(day, self.close_time)
+        start = pd.Timestamp(datetime(day.year, day.month, day.day, *self.open_time)).tz_localize(self.tz)
+        end = pd.Timestamp(datetime(day.year, day.month, day.day, *close)).tz_localize(self.tz)
+        return start, end
+
+    def sessions(self, start, end) -> pd.DatetimeIndex:
+        """Dni sesyjne w [start, end]"""
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+        return pd.DatetimeIndex([d for d in days if self.is_session_day(d.date())])
+
+    # --- Chwile ---
+    def is_open(self, now=None) -> bool:
+        now = self._now(now)
+        bounds = self.session_bounds(now.date())
+        return bounds is not None and bounds[0] <= now < bounds[1]
+
+    def last_close(self, now=None) -> pd.Timestamp:
+        """Ostatnie zamknięcie sesji <= now"""
+        now = self._now(now)
+        day = now.date()
+        for _ in range(30):
+            bounds = self.session_bounds(day)
+            if bounds is not None and bounds[1] <= now:
+                return bounds[1]
+            day -= timedelta(days=1)
+        raise ValueError(f"Brak sesji w 30 dniach przed {now}")
+
+    def next_open(self, now=None) -> pd.Timestamp:
+        """Najbliższe otwarcie sesji > now (albo bieżącej, gdy `now` przed 9:00)"""
+        now = self._now(now)
+        day = now.date()
+        for _ in range(30):
+            bounds = self.session_bounds(day)
+            if bounds is not None and bounds[0] > now:
+                return bounds[0]
+            day += timedelta(days=1)
+        raise ValueError(f"Brak sesji w 30 dniach po {now}")
+
+    def needs_refresh(self, last, now=None) -> bool:
+        """
+        Czy dane z chwili `last` (epoch s / Timestamp / None) mogą być nieaktualne: trwa sesja
+        albo okno po zamknięciu, albo `last` sprzed ostatniego zamknięcia + SETTLE
+        """
+        if last is None:
+            return True
+        now = self._now(now)
+        if self.is_open(now):
+            return True
+        settled = self.last_close(now) + self.settle
+        if now < settled:
+            return True
+        return self._now(last) < settled
+
+    def seconds_until_open(self, now=None) -> float:
+        now = self._now(now)
+        return 0.0 if self.is_open(now) else (self.next_open(now) - now).total_seconds()
+
+
+# Wspólny kalendarz procesu (DataManager, screener, snapshoty dashboardu / API, gateway)
+CALENDAR = GPWCalendar.from_env()
+
+
+def benchmark_calendar(checks: int = 100_000):
+    """Koszt needs_refresh (wołane przy każdym ticku pollera) + zestawienie roku"""
+    year = pd.Timestamp.now(tz=EXCHANGE_TZ).year
+    sessions = CALENDAR.sessions(f"{year}-01-01", f"{year}-12-31")
+    print(f"{year}: {len(sessions)} sesji, święta w dni robocze: "
+          f"{sorted(d.isoformat() for d in gpw_holidays(year) if d.weekday() < 5)}")
+    now = time.time()
+    start = time.perf_counter()
+    for i in range(checks):
+        CALENDAR.needs_refresh(now - 60, now)
+    elapsed = time.perf_counter() - start
+    print(f"needs_refresh: {1e6 * elapsed / checks:.1f} µs | teraz otwarta: {CALENDAR.is_open()} | "
+          f"następne otwarcie: {CALENDAR.next_open()} | ostatnie zamknięcie: {CALENDAR.last_close()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kalendarz sesji GPW: sesje roku + koszt needs_refresh")
+    parser.add_argument("--checks", type=int, default=20_000)
+    args = parser.parse_args()
+    benchmark_calendar(args.checks)
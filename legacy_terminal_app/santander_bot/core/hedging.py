@@ -0,0 +1,207 @@
+# santander_bot/core/hedging.py
+import argparse
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict
+import numpy as np
+from santander_bot.core.tracing import stage
+
+MIN_SAMPLES = 5          # mniej próbek = opóźnienie hedge'a domyślne
+DEFAULT_HEDGE_DELAY = 1.0
+MAX_ERROR_RATE = 0.5     # źródło częściej puste/błędne nie jest wybierane na główne
+
+
+class Cached:
+    """
+    Odpowiedź źródła bez zapytania sieciowego (np. z BAR_STORE): wygrywa wyścig jak każda inna,
+    ale nie trafia do statystyk latencji - p95 porównuje tylko prawdziwe pobrania
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class LatencyTracker:
+    """Kroczące okno latencji udanych odpowiedzi + odsetek odpowiedzi pustych/błędnych"""
+
+    def __init__(self, window: int = 200):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+
+    def observe(self, seconds: float, ok: bool):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(seconds)
+
+    def quantile(self, q: float):
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        return float(np.quantile(self.latencies, q))
+
+    @property
+    def error_rate(self) -> float:
+        return 1 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class HedgedFetcher:
+    """
+    Wyścig źródeł notowań z hedgingiem
+
+    - źródło główne: najniższe p95 spośród źródeł z odsetkiem błędów <= MAX_ERROR_RATE;
+      źródło bez MIN_SAMPLES próbek ustępuje zmierzonym (bez historii - kolejność konfiguracji);
+      ranking liczony przy każdym zapytaniu
+    - odpowiedzi opakowane w Cached nie są mierzone (nie było zapytania sieciowego)
+    - zapytanie idzie do głównego; gdy nie odpowie w jego p95 (albo odpowie pusto),
+      startuje kolejne źródło - wygrywa pierwsza poprawna (nie-None) odpowiedź
+    - przegrane zapytania kończą się w tle i też trafiają do statystyk
+    """
+
+    def __init__(self, sources: Dict[str, Callable], timeout: float = 10.0, window: int = 200,
+                 default_delay: float = DEFAULT_HEDGE_DELAY, workers: int = 8):
+        self.sources = dict(sources)
+        self.timeout = timeout
+        self.default_delay = default_delay
+        self.trackers = {name: LatencyTracker(window) for name in self.sources}
+        self.wins = Counter()
+        self.calls = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="hedge")
+
+    def ranking(self):
+        order = list(self.sources)
+        with self._lock:
+            def score(name):
+                tracker = self.trackers[name]
+                p95 = tracker.quantile(0.95)
+                return tracker.error_rate > MAX_ERROR_RATE, p95 if p95 is not None else float("inf"), order.index(name)
+            return sorted(order, key=score)
+
+    def hedge_delay(self, name) -> float:
+        with self._lock:
+            p95 = self.trackers[name].quantile(0.95)
+        return self.default_delay if p95 is None else min(p95, self.timeout)
+
+    def _record(self, name, started, future):
+        result = future.result() if future.exception() is None else None
+        if isinstance(result, Cached):
+            return
+        ok = result is not None
+        with self._lock:
+            self.trackers[name].observe(time.perf_counter() - started, ok)
+
+    def fetch(self, key):
+        """(źródło, wynik) pierwszej poprawnej odpowiedzi albo (None, None) po `timeout`"""
+        order = self.ranking()
+        pending = {}
+
+        def launch(name):
+            started = time.perf_counter()
+            future = self._pool.submit(self.sources[name], key)
+            future.add_done_callback(lambda f: self._record(name, started, f))
+            pending[future] = name
+
+        with stage("fetch.quote", symbol=str(key), primary=order[0]) as span:
+            with self._lock:  # Gateway: równoległe pollery dzielą jeden fetcher
+                self.calls += 1
+            deadline = time.perf_counter() + self.timeout
+            launch(order[0])
+            launched = 1
+            hedge_at = time.perf_counter() + self.hedge_delay(order[0])
+            while pending:
+                more = launched < len(order)
+                until = min(hedge_at, deadline) if more else deadline
+                done, _ = wait(pending, timeout=max(0.0, until - time.perf_counter()), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    result = future.result() if future.exception() is None else None
+                    if isinstance(result, Cached):
+                        result = result.value
+                    if result is not None:
+                        with self._lock:
+                            self.wins[name] += 1
+                        span.set_attribute("source", name)
+                        span.set_attribute("hedged", launched > 1)
+                        return name, result
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if more and (now >= hedge_at or not pending):
+                    launch(order[launched])
+                    launched += 1
+                    with self._lock:
+                        self.hedges += 1
+                    hedge_at = now + self.hedge_delay(order[launched - 1])
+            span.set_attribute("source", "none")
+            return None, None
+
+    def stats(self) -> dict:
+        with self._lock:
+            sources = {
+                name: {
+                    "samples": len(t.outcomes),
+                    "p50_s": t.quantile(0.50),
+                    "p95_s": t.quantile(0.95),
+                    "error_rate": round(t.error_rate, 3),
+                    "wins": self.wins[name],
+                }
+                for name, t in self.trackers.items()
+            }
+            calls, hedges = self.calls, self.hedges
+        return {"calls": calls, "hedges": hedges, "primary": self.ranking()[0], "sources": sources}
+
+
+def _simulated_source(median, tail_p, tail_s, fail_p, rng):
+    """Źródło z latencją lognormalną, rzadkim ogonem `tail_s` i pustymi odpowiedziami"""
+    lock = threading.Lock()
+
+    def fetch(key):
+        with lock:
+            latency = median * rng.lognormvariate(0, 0.3)
+            if rng.random() < tail_p:
+                latency = tail_s
+            failed = rng.random() < fail_p
+        time.sleep(latency)
+        return None if failed else key
+    return fetch
+
+
+def benchmark_hedging(requests: int = 300, seed: int = 0):
+    """Ogon latencji: sekwencyjny fallback (jak stary poll_symbol) vs hedging, ten sam profil źródeł"""
+    def profile():
+        rng = random.Random(seed)
+        return {"stooq": _simulated_source(0.010, 0.05, 0.5, 0.02, rng),
+                "yfinance": _simulated_source(0.025, 0.01, 0.3, 0.0, rng)}
+
+    def pct(values):
+        return " ".join(f"p{q}={1000 * np.percentile(values, q):.1f}ms" for q in (50, 95, 99))
+
+    sources = profile()
+    sequential = []
+    for i in range(requests):
+        start = time.perf_counter()
+        if sources["stooq"](i) is None:
+            sources["yfinance"](i)
+        sequential.append(time.perf_counter() - start)
+
+    fetcher = HedgedFetcher(profile(), timeout=5.0)
+    hedged = []
+    for i in range(requests):
+        start = time.perf_counter()
+        fetcher.fetch(i)
+        hedged.append(time.perf_counter() - start)
+
+    print(f"sekwencyjnie: {pct(sequential)}")
+    print(f"hedging:      {pct(hedged)}  (hedge w {fetcher.hedges / fetcher.calls:.0%} zapytań)")
+    print(fetcher.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark hedgingu źródeł notowań (symulowane latencje)")
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    benchmark_hedging(args.requests)
@@ -0,0 +1,278 @@
+# santander_bot/core/memory.py
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from santander_bot.config import MEMORY_ENV
+from santander_bot.core.tracing import add_metrics_collector, meter, remove_metrics_collector
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+
+# Plik (względem pakietu) -> podsystem; alokacja liczy się do najbliższej ramki z pakietu,
+# więc DataFrame zbudowany przez pandas w append_bar trafia do "data", nie do "other"
+SUBSYSTEMS = (
+    ("core/data.py", "data"),
+    ("core/replay.py", "data"),
+    ("core/gateway.py", "data"),
+    ("core/hedging.py", "data"),
+    ("core/resample.py", "bars"),
+    ("core/alerts.py", "alerts"),
+    ("strategies/", "screener"),
+    ("ui/", "ui"),
+    ("main.py", "ui"),
+)
+PASSTHROUGH = ("core/tracing.py",)  # stage() / /metrics - alokacja liczy się do wołającego
+
+
+def rss_mb():
+    """Bieżący RSS procesu w MB (/proc; bez /proc - szczytowy ru_maxrss)"""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmRSS:")) / 1024
+    except (OSError, StopIteration):
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / (MB if sys.platform == "darwin" else 1024)
+
+
+def frame_bytes(df):
+    """Głęboki rozmiar DataFrame (None / pusty = 0)"""
+    return 0 if df is None else int(df.memory_usage(index=True, deep=True).sum())
+
+
+def subsystem_of(filename):
+    """Podsystem dla pliku źródłowego albo None, gdy plik jest spoza pakietu"""
+    if not filename.startswith(PACKAGE_DIR):
+        return None
+    rel = filename[len(PACKAGE_DIR) + 1:].replace(os.sep, "/")
+    if rel.startswith(PASSTHROUGH):
+        return None
+    if rel == "core/memory.py":
+        return "monitor"
+    for prefix, name in SUBSYSTEMS:
+        if rel.startswith(prefix):
+            return name
+    return "other"
+
+
+class MemoryMonitor:
+    """
+    Pamięć terminala próbkowana w wątku tła
+
+    - co `interval` s: RSS + rozmiary struktur podsystemów zarejestrowanych przez `track()`
+      (data_store, BAR_STORE, wyniki screenera...) - tanie, działa cały czas
+    - co `trace_every` s okno tracemalloc długości `trace_window` s: alokacje z okna, które
+      przeżyły do jego końca, grupowane per podsystem (najbliższa ramka z pakietu) i per linia.
+      tracemalloc spowalnia alokujący kod kilka-kilkanaście razy, stąd okna zamiast ciągłego
+      śledzenia; trace_every=0 wyłącza (albo ciągłe śledzenie, gdy tracemalloc już działa)
+    - wzrost liczony względem pierwszej próbki (`reset_baseline` po rozgrzewce)
+    - gauge w /metrics (santander_memory_*) i w OTel, `summary()` dla nagłówka TUI
+    """
+
+    def __init__(self, interval=10.0, trace_every=300.0, trace_window=5.0, nframes=10, top=10, history=720):
+        self.interval = interval
+        self.trace_every = trace_every
+        self.trace_window = trace_window
+        self.nframes = nframes
+        self.top = top
+        self.samples = deque(maxlen=history)  # (t, rss MB, śledzone MB)
+        self.tracked = {}                     # podsystem -> callable() -> bajty
+        self.sizes = {}                       # podsystem -> MB (ostatnia próbka)
+        self.retained = {}                    # podsystem -> MB przeżyłe z ostatniego okna
+        self.allocators = []                  # [(plik:linia, podsystem, MB)]
+        self.windows = 0
+        self.baseline = None
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._gauge = None
+        self._own_trace = False
+
+    def track(self, name, sizer):
+        """Rejestruje rozmiar struktury podsystemu: sizer() -> bajty"""
+        with self._lock:
+            self.tracked[name] = sizer
+        return self
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        add_metrics_collector(self.render_prometheus)
+        if self._gauge is None:
+            self._gauge = meter.create_observable_gauge(
+                "santander.memory.rss", callbacks=[self._observe], unit="MB",
+                description="RSS procesu terminala")
+        self.sample()
+        self._thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + self.trace_window + 5)
+        remove_metrics_collector(self.render_prometheus)
+        self._end_window(record=False)
+
+    def _run(self):
+        next_sample = time.monotonic() + self.interval
+        next_window = time.monotonic() + min(self.trace_every, self.interval) if self.trace_every else None
+        window_end = None
+        while self._running:
+            now = time.monotonic()
+            if window_end is not None and now >= window_end:
+                self._end_window()
+                window_end = None
+            if next_window is not None and window_end is None and now >= next_window:
+                self._begin_window()
+                window_end = now + self.trace_window
+                next_window = now + self.trace_every
+            if now >= next_sample:
+                self.sample()
+                next_sample = now + self.interval
+            wake = min(t for t in (next_sample, next_window, window_end) if t is not None)
+            time.sleep(max(0.05, min(1.0, wake - time.monotonic())))
+
+    def _begin_window(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self._own_trace = True
+
+    def _end_window(self, record=True):
+        if not tracemalloc.is_tracing():
+            return
+        if record:
+            self.attribute(tracemalloc.take_snapshot())
+        if self._own_trace:
+            tracemalloc.stop()
+            self._own_trace = False
+
+    def attribute(self, snapshot):
+        """Żywe alokacje ze snapshotu tracemalloc -> MB per podsystem + top linii"""
+        subsystems, allocators = Counter(), Counter()
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        for stat in snapshot.statistics("traceback"):
+            site, name = "-", "other"
+            for frame in reversed(stat.traceback):  # od najnowszej ramki
+                found = subsystem_of(frame.filename)
+                if found is not None:
+                    site = f"{os.path.relpath(frame.filename, PACKAGE_DIR)}:{frame.lineno}"
+                    name = found
+                    break
+            subsystems[name] += stat.size
+            allocators[(site, name)] += stat.size
+        with self._lock:
+            self.retained = {name: size / MB for name, size in subsystems.most_common()}
+            self.allocators = [(site, name, size / MB) for (site, name), size in allocators.most_common(self.top)]
+            self.windows += 1
+
+    def sample(self):
+        """Jedna próbka: RSS, śledzona sterta (gdy okno trwa) i rozmiary struktur podsystemów"""
+        with self._lock:
+            tracked = list(self.tracked.items())
+        sizes = {}
+        for name, sizer in tracked:
+            try:
+                sizes[name] = sizer() / MB
+            except Exception:
+                continue  # Struktura w trakcie podmiany - następna próbka
+        traced = tracemalloc.get_traced_memory()[0] / MB if tracemalloc.is_tracing() else 0.0
+        with self._lock:
+            self.samples.append((time.time(), rss_mb(), traced))
+            self.sizes = dict(sorted(sizes.items(), key=lambda kv: -kv[1]))
+            if self.baseline is None:
+                self.baseline = self._state()
+        return self.latest()
+
+    def _state(self):
+        _, rss, traced = self.samples[-1]
+        return {"rss_mb": rss, "traced_mb": traced, "sizes": dict(self.sizes)}
+
+    def reset_baseline(self):
+        """Bieżąca próbka jako punkt odniesienia wzrostu (np. po rozgrzewce)"""
+        self.sample()
+        with self._lock:
+            self.baseline = self._state()
+
+    def latest(self):
+        with self._lock:
+            if not self.samples:
+                return None
+            state = self._state()
+            base = self.baseline or state
+            state["rss_growth_mb"] = state["rss_mb"] - base["rss_mb"]
+            state["size_growth_mb"] = {name: size - base["sizes"].get(name, 0.0) for name, size in state["sizes"].items()}
+            state["retained"] = dict(self.retained)
+            state["top"] = list(self.allocators)
+            state["windows"] = self.windows
+            return state
+
+    def summary(self, subsystems=3):
+        """Jedna linia do nagłówka: RSS (wzrost), największe podsystemy, lider ostatniego okna"""
+        state = self.latest()
+        if state is None:
+            return "MEM -"
+        text = f"RSS {state['rss_mb']:.0f} MB ({state['rss_growth_mb']:+.0f})"
+        if state["sizes"]:
+            text += " | " + " · ".join(f"{name} {size:.1f}" for name, size in list(state["sizes"].items())[:subsystems])
+        if state["top"]:
+            site, name, size = state["top"][0]
+            text += f" | alloc {name} {size:.1f} MB @ {site}"
+        return text
+
+    def report(self):
+        """Tabela podsystemów i top alokatorów (zamknięcie terminala, benchmark soak)"""
+        state = self.latest()
+        if state is None:
+            return ""
+        lines = [f"RSS {state['rss_mb']:.1f} MB ({state['rss_growth_mb']:+.1f}), "
+                 f"okna tracemalloc: {state['windows']}",
+                 f"{'SUBSYSTEM':<12}{'MB':>10}{'GROWTH MB':>12}{'RETAINED MB':>14}"]
+        for name in dict.fromkeys([*state["sizes"], *state["retained"]]):
+            lines.append(f"{name:<12}{state['sizes'].get(name, 0.0):>10.2f}"
+                         f"{state['size_growth_mb'].get(name, 0.0):>+12.2f}{state['retained'].get(name, 0.0):>14.2f}")
+        lines.append("")
+        lines.append("TOP ALLOCATORS (retained z ostatniego okna, MB)")
+        for site, name, size in state["top"]:
+            lines.append(f"{size:8.2f}  {name:<10}{site}")
+        return "\n".join(lines)
+
+    def render_prometheus(self):
+        state = self.latest()
+        if state is None:
+            return ""
+        lines = [
+            "# TYPE santander_memory_rss_bytes gauge",
+            f"santander_memory_rss_bytes {state['rss_mb'] * MB:.0f}",
+            "# TYPE santander_memory_subsystem_bytes gauge",
+        ]
+        lines.extend(f'santander_memory_subsystem_bytes{{subsystem="{name}"}} {size * MB:.0f}'
+                     for name, size in state["sizes"].items())
+        lines.append("# TYPE santander_memory_retained_bytes gauge")
+        lines.extend(f'santander_memory_retained_bytes{{subsystem="{name}"}} {size * MB:.0f}'
+                     for name, size in state["retained"].items())
+        return "\n".join(lines) + "\n"
+
+    def _observe(self, options):
+        from opentelemetry.metrics import Observation
+        latest = self.latest()
+        return [Observation(latest["rss_mb"])] if latest else []
+
+
+def memory_requested(argv=None):
+    """--memory w argv lub SANTANDER_MEMORY=1"""
+    argv = sys.argv if argv is None else argv
+    return "--memory" in argv or os.getenv(MEMORY_ENV, "").lower() in ("1", "true", "yes")
+
+
+def start_memory_monitor():
+    """Tworzy i uruchamia monitor (SANTANDER_MEMORY_INTERVAL, _TRACE_EVERY, _TRACE_WINDOW)"""
+    return MemoryMonitor(
+        interval=float(os.getenv("SANTANDER_MEMORY_INTERVAL", "10")),
+        trace_every=float(os.getenv("SANTANDER_MEMORY_TRACE_EVERY", "300")),
+        trace_window=float(os.getenv("SANTANDER_MEMORY_TRACE_WINDOW", "5")),
+    ).start()
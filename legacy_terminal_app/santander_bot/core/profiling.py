@@ -0,0 +1,211 @@
+# santander_bot/core/profiling.py
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from santander_bot.config import PROFILE_ENV
+from santander_bot.core.tracing import add_stage_listener
+
+
+class SamplingProfiler:
+    """
+    Lekki profiler próbkujący stosy wszystkich wątków (sys._current_frames)
+
+    - stosy zapisywane w formacie "folded" (flamegraph.pl / speedscope / inferno)
+    - czasy etapów stage() (wall + CPU) agregowane per cykl odświeżania
+    - cykle otwierane per wątek: równoległe sesje dashboardu (każdy run / rerun fragmentu
+      na własnym wątku) nie mieszają się; etapy wątków bez cyklu (odświeżanie danych w tle)
+      trafiają do osobnego wpisu "background" zamykanego razem z dowolnym cyklem
+    """
+
+    def __init__(self, service="santander-bot", hz=100, output_dir="profiles", flush_every=60):
+        self.service = service
+        self.interval = 1.0 / hz
+        self.output_dir = output_dir
+        self.flush_every = flush_every
+        self.stacks = Counter()
+        self.samples = 0
+        self.cycles = []  # [{stage: [calls, wall, cpu]}, ...]
+        self._open = {}  # thread ident -> ({stage: [calls, wall, cpu]}, (wall0, cpu0))
+        self._background = self._new_stages()
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    # --- Próbkowanie stosów ---
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        add_stage_listener(self.record_stage)
+        self._thread = threading.Thread(target=self._sample_loop, name="santander-profiler", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        if not self._running:
+            return None
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5 * self.interval + 1)  # Ostatnia próbka przed zapisem
+        self.end_all()
+        return self.write()
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        last_flush = time.monotonic()
+        while self._running:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            folded = [self._fold(names.get(thread_id, str(thread_id)), frame)
+                      for thread_id, frame in sys._current_frames().items() if thread_id != own_id]
+            with self._lock:  # write()/summary() czytają kopię pod tym samym lockiem
+                self.stacks.update(folded)
+                self.samples += 1
+
+            if self.flush_every and time.monotonic() - last_flush > self.flush_every:
+                self.write()  # Zapis okresowy - SIGKILL kontenera nie zgubi profilu
+                last_flush = time.monotonic()
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _fold(thread_name, frame):
+        parts = []
+        while frame is not None:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        parts.append(thread_name)
+        return ";".join(reversed(parts))
+
+    # --- Etapy i cykle ---
+    @staticmethod
+    def _new_stages():
+        return defaultdict(lambda: [0, 0.0, 0.0])
+
+    def record_stage(self, name, wall, cpu):
+        with self._lock:
+            current = self._open.get(threading.get_ident())
+            entry = (current[0] if current else self._background)[name]
+            entry[0] += 1
+            entry[1] += wall
+            entry[2] += cpu
+
+    def in_cycle(self):
+        """Czy bieżący wątek ma otwarty cykl"""
+        with self._lock:
+            return threading.get_ident() in self._open
+
+    def begin_cycle(self):
+        """Zamyka poprzedni cykl wątku (jeśli otwarty) i otwiera nowy"""
+        self.end_cycle()
+        alive = {t.ident for t in threading.enumerate()}
+        with self._lock:
+            for ident in [i for i in self._open if i not in alive]:
+                del self._open[ident]  # Przerwany run (st.stop / rerun) - cykl bez końca, odrzucony
+            self._open[threading.get_ident()] = (self._new_stages(), (time.perf_counter(), time.thread_time()))
+
+    def end_cycle(self):
+        """Zamyka cykl bieżącego wątku (+ zebrane dotąd etapy tła jako osobny wpis)"""
+        with self._lock:
+            current = self._open.pop(threading.get_ident(), None)
+            if current is None:
+                return
+            stages, (wall0, cpu0) = current
+            stages["cycle"] = [1, time.perf_counter() - wall0, time.thread_time() - cpu0]
+            self.cycles.append(dict(stages))
+            self._flush_background()
+
+    def end_all(self):
+        """Zamyka cykle wszystkich wątków (stop / zapis przy wyjściu)"""
+        with self._lock:
+            now = time.perf_counter()
+            for stages, (wall0, _) in self._open.values():
+                stages["cycle"] = [1, now - wall0, 0.0]  # CPU innego wątku niedostępne
+                self.cycles.append(dict(stages))
+            self._open.clear()
+            self._flush_background()
+
+    def _flush_background(self):
+        if self._background:
+            self.cycles.append({f"{name} [background]": v for name, v in self._background.items()})
+            self._background = self._new_stages()
+
+    @contextmanager
+    def cycle(self):
+        """Cykl odświeżania; wewnątrz już otwartego cyklu wątku (fragment w pełnym runie) - bez nowego"""
+        if self.in_cycle():
+            yield
+            return
+        self.begin_cycle()
+        try:
+            yield
+        finally:
+            self.end_cycle()
+
+    # --- Raport ---
+    def summary(self):
+        """Tabela: etap, wywołania, śr./p95 wall per cykl, śr. CPU per cykl"""
+        with self._lock:
+            cycles = list(self.cycles)
+            stacks, samples = dict(self.stacks), self.samples
+
+        per_stage = defaultdict(list)
+        for c in cycles:
+            for name, (calls, wall, cpu) in c.items():
+                per_stage[name].append((calls, wall, cpu))
+
+        lines = [
+            f"{self.service} | cycles: {len(cycles)} | stack samples: {samples}",
+            f"{'STAGE':<24}{'CALLS':>8}{'CYCLES':>8}{'WALL/CYC ms':>13}{'P95 ms':>10}{'CPU/CYC ms':>12}{'TOTAL s':>10}",
+        ]
+        rows = sorted(per_stage.items(), key=lambda kv: -sum(w for _, w, _ in kv[1]))
+        for name, values in rows:
+            walls = sorted(w for _, w, _ in values)
+            p95 = walls[min(len(walls) - 1, int(0.95 * len(walls)))]
+            lines.append(
+                f"{name:<24}{sum(c for c, _, _ in values):>8}{len(values):>8}"
+                f"{1000 * sum(walls) / len(walls):>13.2f}{1000 * p95:>10.2f}"
+                f"{1000 * sum(cpu for _, _, cpu in values) / len(values):>12.2f}{sum(walls):>10.2f}"
+            )
+
+        leaf = Counter()
+        for stack, count in stacks.items():
+            leaf[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaf.values()) or 1
+        lines.append("")
+        lines.append("TOP FRAMES (self samples)")
+        for frame, count in leaf.most_common(15):
+            lines.append(f"{100 * count / total:6.1f}%  {frame}")
+        return "\n".join(lines)
+
+    def write(self):
+        """Zapisuje <service>-<pid>.folded + .txt, zwraca ścieżkę bazową"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{self.service}-{os.getpid()}")
+        with self._lock:
+            stacks = dict(self.stacks)
+        with open(base + ".folded", "w") as f:
+            for stack, count in stacks.items():
+                f.write(f"{stack} {count}\n")
+        with open(base + ".txt", "w") as f:
+            f.write(self.summary() + "\n")
+        return base
+
+
+def profiling_requested(argv=None):
+    """--profile w argv lub SANTANDER_PROFILE=1"""
+    argv = sys.argv if argv is None else argv
+    return "--profile" in argv or os.getenv(PROFILE_ENV, "").lower() in ("1", "true", "yes")
+
+
+def start_profiler(service="santander-bot"):
+    """Tworzy i uruchamia profiler (SANTANDER_PROFILE_HZ, SANTANDER_PROFILE_DIR)"""
+    return SamplingProfiler(
+        service=service,
+        hz=float(os.getenv("SANTANDER_PROFILE_HZ", "100")),
+        output_dir=os.getenv("SANTANDER_PROFILE_DIR", "profiles"),
+    ).start()
@@ -0,0 +1,263 @@
+# santander_bot/core/replay.py
+import argparse
+import heapq
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from santander_bot.core.tracing import add_stage_listener, remove_stage_listener
+
+# Katalog z nagranymi odpowiedziami yfinance (<dir>/<interval>/<SYMBOL>.csv) zamiast sieci
+YF_FIXTURES_ENV = "SANTANDER_YF_FIXTURES"
+FIXTURE_INTERVALS = (("5m", "60d"), ("1d", "1y"))
+
+# Nazwy kolumn w eksportach Stooq -> format yfinance
+STOOQ_COLUMNS = {
+    "Data": "Date", "Otwarcie": "Open", "Najwyzszy": "High",
+    "Najnizszy": "Low", "Zamkniecie": "Close", "Wolumen": "Volume"
+}
+
+
+def load_ohlcv_csv(path):
+    """Wczytuje CSV z OHLCV (yfinance `to_csv` albo eksport Stooq)"""
+    df = pd.read_csv(path)
+    df = df.rename(columns=STOOQ_COLUMNS)
+    time_col = next(c for c in ("Datetime", "Date", "time", df.columns[0]) if c in df.columns)
+    df.index = pd.to_datetime(df.pop(time_col))
+    return df[['Open', 'High', 'Low', 'Close', 'Volume']].sort_index()
+
+
+class ReplaySource:
+    """
+    Źródło danych odtwarzające nagrane notowania zamiast Stooq/yfinance
+
+    path:
+      - katalog z plikami <SYM>.csv (OHLCV) albo
+      - plik .jsonl ze snapshotami {"symbol", "time", "open", "high", "low", "close", "volume"}
+    speed: mnożnik czasu rzeczywistego (60 = minuta na sekundę), 0 = tak szybko jak się da
+    """
+
+    def __init__(self, path, speed=1.0, symbols=None):
+        self.path = path
+        self.speed = speed
+        self.symbols = symbols
+        self.ticks = 0
+        self.started = None
+        self.finished = None
+
+    def _csv_streams(self):
+        for name in sorted(os.listdir(self.path)):
+            sym, ext = os.path.splitext(name)
+            if ext.lower() != ".csv" or (self.symbols and sym not in self.symbols):
+                continue
+            yield self._csv_ticks(sym, load_ohlcv_csv(os.path.join(self.path, name)))
+
+    @staticmethod
+    def _csv_ticks(sym, df):
+        # Osobna funkcja: generator musi związać `sym` teraz, nie przy leniwym odczycie w heapq.merge
+        for ts, o, h, l, c, v in zip(df.index, df['Open'].to_numpy(), df['High'].to_numpy(),
+                                     df['Low'].to_numpy(), df['Close'].to_numpy(), df['Volume'].to_numpy()):
+            yield ts, sym, {"open": o, "high": h, "low": l, "close": c, "volume": v}
+
+    def _jsonl_stream(self):
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                if self.symbols and rec["symbol"] not in self.symbols:
+                    continue
+                yield pd.Timestamp(rec["time"]), rec["symbol"], rec
+
+    def iter_ticks(self):
+        """(timestamp, symbol, bar) w kolejności czasowej dla wszystkich symboli"""
+        if os.path.isdir(self.path):
+            return heapq.merge(*self._csv_streams(), key=lambda tick: tick[0])
+        return self._jsonl_stream()
+
+    def run(self, dm):
+        """Wpycha notowania do DataManagera z zadanym tempem (wywoływane z update_loop)"""
+        self.started = time.perf_counter()
+        first_ts = None
+        for ts, sym, bar in self.iter_ticks():
+            if not dm.running:
+                break
+            if self.speed and self.speed > 0:
+                if first_ts is None:
+                    first_ts = ts
+                due = self.started + (ts - first_ts).total_seconds() / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            dm.append_bar(sym, bar, ts)
+            self.ticks += 1
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        end = self.finished or time.perf_counter()
+        return end - self.started if self.started else 0.0
+
+
+class ReplayStats:
+    """Zbiera czasy compute.indicators / render.chart per tick z etapów stage()"""
+
+    def __init__(self):
+        self.indicator_times = []
+        self.render_times = []
+
+    def __call__(self, name, wall, cpu):
+        if name == "compute.indicators":
+            self.indicator_times.append(wall)
+        elif name == "render.chart":
+            self.render_times.append(wall)
+
+    def report(self, source):
+        def pct(values, q):
+            return 1000 * float(np.percentile(values, q)) if values else 0.0
+
+        return {
+            "ticks": source.ticks,
+            "elapsed_s": round(source.elapsed, 3),
+            "ticks_per_s": round(source.ticks / source.elapsed, 1) if source.elapsed else 0.0,
+            "indicator_ms_p50": round(pct(self.indicator_times, 50), 3),
+            "indicator_ms_p95": round(pct(self.indicator_times, 95), 3),
+            "render_ms_p50": round(pct(self.render_times, 50), 3),
+            "render_ms_p95": round(pct(self.render_times, 95), 3),
+        }
+
+
+def run_replay_benchmark(path, speed=0, render=True, symbols=None):
+    """
+    Odtwarza nagranie przez DataManager; każdy tick przelicza wskaźniki i rysuje wykres
+    symbolu (jak pętla UI). Zwraca słownik z przepustowością i czasami per tick.
+    """
+    from santander_bot.core.data import DataManager
+    from santander_bot.strategies.technical import TechnicalAnalyzer
+    from santander_bot.ui.terminal import TerminalUI
+
+    source = ReplaySource(path, speed=speed, symbols=symbols)
+    dm = DataManager(source=source)
+    ui = TerminalUI(dm)
+    stats = ReplayStats()
+
+    if render:
+        dm.subscribe(ui.draw_chart)  # draw_chart liczy też wskaźniki
+    else:
+        dm.subscribe(lambda sym: TechnicalAnalyzer.add_indicators(dm.get_data(sym)))
+
+    add_stage_listener(stats)
+    try:
+        dm.update_loop()
+    finally:
+        remove_stage_listener(stats)
+    return stats.report(source)
+
+
+def write_synthetic_session(path, symbols, day="2025-11-20", freq="1min", seed=42):
+    """Generuje nagranie jednej sesji (9:00-17:00) dla testów obciążeniowych"""
+    os.makedirs(path, exist_ok=True)
+    index = pd.date_range(f"{day} 09:00", f"{day} 17:00", freq=freq, inclusive="left")
+    rng = np.random.default_rng(seed)
+    for sym in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+        open_ = np.concatenate([[close[0]], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.001, len(index))) * close
+        pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Volume": rng.integers(100, 10_000, len(index)),
+        }, index=pd.Index(index, name="Datetime")).to_csv(os.path.join(path, f"{sym}.csv"))
+    return path
+
+
+class FixtureDownload:
+    """
+    Nagrane świece w miejsce yf.download (wołane przez BarStore, patrz YF_FIXTURES_ENV)
+
+    Indeks jest przesuwany o pełne tygodnie, tak by ostatnia nagrana sesja wypadła
+    w bieżącym tygodniu - nagranie sprzed miesięcy wygląda jak świeże dane.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.calls = 0
+        self._frames = {}
+
+    def _load(self, symbol, interval):
+        key = (symbol, interval)
+        if key not in self._frames:
+            file = os.path.join(self.path, interval, f"{symbol}.csv")
+            df = None
+            if os.path.exists(file):
+                from santander_bot.config import EXCHANGE_TZ
+
+                df = pd.read_csv(file, index_col=0)
+                index = pd.to_datetime(df.index, utc=interval != "1d")
+                if index.tz is not None:
+                    index = index.tz_convert(EXCHANGE_TZ)
+                weeks = max(0, (pd.Timestamp.now(tz=index.tz) - index[-1]).days // 7)
+                df.index = index + pd.Timedelta(weeks=weeks)
+                df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
+            self._frames[key] = df
+        return self._frames[key]
+
+    def __call__(self, symbols, period, interval):
+        from santander_bot.core.resample import slice_period
+
+        self.calls += 1
+        frames = {s: self._load(s, interval) for s in symbols}
+        return {s: slice_period(df, period) for s, df in frames.items() if df is not None}
+
+
+def _write_fixture(path, interval, symbol, df):
+    os.makedirs(os.path.join(path, interval), exist_ok=True)
+    df.to_csv(os.path.join(path, interval, f"{symbol}.csv"))
+
+
+def record_fixtures(path, symbols):
+    """Nagrywa z yfinance świece 5m (60 dni) i dzienne (1 rok) - po jednym batchu na interwał"""
+    from santander_bot.core.resample import download_yfinance
+
+    for interval, period in FIXTURE_INTERVALS:
+        for symbol, df in download_yfinance(symbols, period, interval).items():
+            _write_fixture(path, interval, symbol, df)
+    return path
+
+
+def write_synthetic_fixtures(path, symbols, days=42, sessions=252, seed=42):
+    """Fixtures bez sieci: 5m z ostatnich `days` sesji + dzienne z `sessions` sesji, sklejone bez skoku ceny"""
+    from santander_bot.core.resample import resample_bars, synthetic_bars
+
+    rng = np.random.default_rng(seed)
+    for symbol in symbols:
+        intraday = synthetic_bars(symbol, days, seed=seed)
+        recent = resample_bars(intraday, "1d")
+        older_index = pd.bdate_range(end=recent.index[0] - pd.offsets.BDay(1), periods=sessions - len(recent))
+        close = intraday['Open'].iloc[0] * np.exp(-np.cumsum(rng.normal(0, 0.015, len(older_index)))[::-1])
+        open_ = close * (1 + rng.normal(0, 0.005, len(close)))
+        older = pd.DataFrame({"Open": open_, "High": np.maximum(open_, close) * 1.01,
+                              "Low": np.minimum(open_, close) * 0.99, "Close": close,
+                              "Volume": rng.integers(10_000, 1_000_000, len(close)).astype(float)},
+                             index=older_index)
+        _write_fixture(path, "5m", symbol, intraday)
+        _write_fixture(path, "1d", symbol, pd.concat([older, recent]))
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay nagranych notowań + pomiar przepustowości")
+    parser.add_argument("path", help="katalog <SYM>.csv albo plik .jsonl")
+    parser.add_argument("--speed", type=float, default=0, help="mnożnik czasu rzeczywistego, 0 = max")
+    parser.add_argument("--no-render", action="store_true", help="tylko wskaźniki, bez rysowania")
+    parser.add_argument("--synthetic", action="store_true", help="najpierw wygeneruj sesję do `path`")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from santander_bot.config import SYMBOLS
+        write_synthetic_session(args.path, SYMBOLS)
+
+    print(json.dumps(run_replay_benchmark(args.path, speed=args.speed, render=not args.no_render), indent=2))
@@ -0,0 +1,463 @@
+# santander_bot/core/resample.py
+import argparse
+import functools
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List
+import numpy as np
+import pandas as pd
+from santander_bot.config import EXCHANGE_TZ
+from santander_bot.core.gpw_calendar import CALENDAR
+from santander_bot.core.replay import YF_FIXTURES_ENV
+from santander_bot.core.tracing import stage
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+# Interwał bazowy: najdrobniejszy przechowywany; 60 dni = limit Yahoo dla świec 5m
+BASE_INTERVAL = "5m"
+BASE_DAYS = 60
+RULES = {"5m": "5min", "15m": "15min", "30m": "30min", "1h": "1h", "1d": "1D"}
+
+
+def period_start(period: str, anchor) -> pd.Timestamp:
+    """Początek okresu w stylu yfinance ('5d' = 5 sesji, '3mo', '1y', 'ytd') liczony od `anchor`"""
+    anchor = pd.Timestamp(anchor).normalize()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return anchor.replace(month=1, day=1)
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if match is None:
+        raise ValueError(f"Nieznany okres: {period!r}")
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return anchor - pd.offsets.BDay(max(0, n - 1))
+    return anchor - {"wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}[unit]
+
+
+def slice_period(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    if df.empty:
+        return df
+    start = period_start(period, df.index[-1])
+    return df if start is None else df[df.index >= start]
+
+
+def session_dates(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Data sesji (bez strefy) dla świec śróddziennych - jak indeks dziennych świec yfinance"""
+    if index.tz is not None:
+        index = index.tz_convert(EXCHANGE_TZ).tz_localize(None)
+    return index.normalize()
+
+
+def resample_bars(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """Świece bazowe -> `interval`; kubełki bez transakcji pomijane"""
+    if df.empty:
+        return df[OHLCV]
+    if interval == "1d":
+        df = df.set_axis(session_dates(df.index))
+    out = df[OHLCV].resample(RULES[interval], label="left", closed="left").agg(AGG)
+    return out.dropna(subset=["Close"])
+
+
+def bucket_label(ts: pd.Timestamp, interval: str) -> pd.Timestamp:
+    """Etykieta kubełka `interval`, do którego wpada świeca bazowa `ts`"""
+    if interval == "1d":
+        if ts.tz is not None:
+            ts = ts.tz_convert(EXCHANGE_TZ).tz_localize(None)
+        return ts.normalize()
+    return ts.floor(RULES[interval])
+
+
+def first_change(old: pd.DataFrame, new: pd.DataFrame):
+    """Pierwszy znacznik czasu, od którego `new` różni się od zapisanych świec `old` (None = bez zmian)"""
+    n = min(len(old), len(new))
+    a, b = old.to_numpy(dtype=np.float64)[:n], new.to_numpy(dtype=np.float64)[:n]
+    same = (old.index[:n] == new.index[:n]) & ((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+    k = n if same.all() else int(np.argmin(same))
+    if k < len(new):
+        return new.index[k]
+    return old.index[k] if k < len(old) else None
+
+
+def _bucket_row(bars: np.ndarray):
+    """OHLCV jednego kubełka z wierszy [Open, High, Low, Close, Volume] (jak AGG, bez pandas)"""
+    bars = bars[~np.isnan(bars[:, 3])]
+    if not len(bars):
+        return None
+    return [bars[0, 0], np.nanmax(bars[:, 1]), np.nanmin(bars[:, 2]), bars[-1, 3], np.nansum(bars[:, 4])]
+
+
+@functools.lru_cache(maxsize=None)
+def _fixture_download(path):
+    from santander_bot.core.replay import FixtureDownload
+    return FixtureDownload(path)
+
+
+def download_yfinance(symbols: List[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+    """Jeden batch yfinance -> {symbol: OHLCV} (symbole jak w Yahoo, np. 'CDR.WA')"""
+    import yfinance as yf
+
+    bulk = yf.download(" ".join(symbols), period=period, interval=interval, group_by='ticker', progress=False)
+    if bulk.empty:
+        return {}
+    if isinstance(bulk.columns, pd.MultiIndex):
+        available = set(bulk.columns.get_level_values(0))
+        frames = {s: bulk[s] for s in symbols if s in available}
+    else:
+        frames = {symbols[0]: bulk} if len(symbols) == 1 else {}
+    return {s: df[OHLCV].dropna(how="all") for s, df in frames.items()}
+
+
+def download_bars(symbols: List[str], period: str, interval: str) -> Dict[str, pd.DataFrame]:
+    """Pobranie upstream dla BarStore: yfinance albo nagrania z $SANTANDER_YF_FIXTURES (testy obciążeniowe)"""
+    fixtures = os.getenv(YF_FIXTURES_ENV)
+    with stage("fetch.yfinance", tickers=len(symbols), period=period, interval=interval, via="bars",
+               fixtures=bool(fixtures)):
+        if fixtures:
+            return _fixture_download(fixtures)(symbols, period, interval)
+        return download_yfinance(symbols, period, interval)
+
+
+class BarStore:
+    """
+    Wiele interwałów z jednego przechowywanego interwału bazowego (5m)
+
+    - widoki 15m / 30m / 1h / 1d liczone z bazy, cache'owane i aktualizowane
+      przyrostowo: nowe świece bazowe przeliczają tylko kubełki od pierwszej zmienionej
+    - odświeżenie (co `ttl` s) pobiera tylko świece od ostatniej znanej, jednym batchem
+    - dzienne świece starsze niż baza (BASE_DAYS) z jednorazowego pobrania dziennego;
+      świece wypadające z bazy są do niego doklejane
+    - bazę 5m trzymają tylko symbole z widokiem śróddziennym; symbol czytany wyłącznie
+      dziennie (screener, dashboard) pobiera same dzienne - bez 60 dni świec 5m
+    - interwały spoza RULES przechodzą bezpośrednio do `download`
+    """
+
+    def __init__(self, download: Callable = download_bars, base_interval: str = BASE_INTERVAL,
+                 base_days: int = BASE_DAYS, ttl: float = 30, calendar=None):
+        self.download = download
+        self.base_interval = base_interval
+        self.base_days = base_days
+        self.ttl = ttl
+        self.calendar = calendar  # GPWCalendar: poza sesją świeże = pobrane po ostatnim zamknięciu
+        self.fetches = 0
+        self.fetched_bars = 0
+        self._base: Dict[str, pd.DataFrame] = {}
+        self._daily: Dict[str, pd.DataFrame] = {}       # dzienne sprzed bazy
+        self._daily_from: Dict[str, pd.Timestamp] = {}  # od kiedy dzienne są pobrane
+        self._aggregates: Dict[str, Dict[str, pd.DataFrame]] = {}
+        self._refreshed: Dict[str, float] = {}
+        self._refreshed_at: Dict[str, float] = {}       # time.time() - dla kalendarza
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()  # Tylko rezerwacja symboli - pobranie już bez blokady
+        self._inflight: Dict[str, threading.Event] = {}  # symbol -> koniec trwającego pobrania
+        self._intraday = set()               # Symbole z widokiem śróddziennym (trzymają bazę 5m)
+        self._base_fetched = set()           # ... i te, dla których bazę już pobierano
+        self._local = threading.local()      # Czy ostatnie history() tego wątku pobierało z sieci
+
+    # --- Zasilanie ---
+    def append(self, symbol: str, bars: pd.DataFrame):
+        """
+        Nowe świece bazowe (nadpisują zachodzące, np. niedomkniętą ostatnią); agregaty
+        przeliczane od pierwszej faktycznie zmienionej świecy - zwykle jeden kubełek
+        """
+        if bars.empty:
+            return
+        bars = bars[OHLCV].sort_index()
+        with self._lock:
+            base = self._base.get(symbol)
+            if base is None or base.empty:
+                base, since = bars, bars.index[0]
+            else:
+                pos = base.index.searchsorted(bars.index[0])
+                since = first_change(base.iloc[pos:], bars)
+                if since is None:
+                    return
+                base = pd.concat([base.iloc[:pos], bars])
+            self._base[symbol] = base
+            aggregates = self._aggregates.setdefault(symbol, {})
+            for interval, frame in aggregates.items():
+                aggregates[interval] = self._update_aggregate(frame, base, since, interval)
+            self._trim(symbol)
+
+    def _update_aggregate(self, frame, base, since, interval):
+        label = bucket_label(since, interval)
+        start = label.tz_localize(EXCHANGE_TZ) if interval == "1d" and base.index.tz is not None else label
+        tail = base.iloc[base.index.searchsorted(start):]
+        keep = frame.iloc[:frame.index.searchsorted(label)]
+        if bucket_label(tail.index[-1], interval) != label:
+            return pd.concat([keep, resample_bars(tail, interval)])  # Kilka kubełków naraz
+        row = _bucket_row(tail.to_numpy(dtype=np.float64))
+        if row is None:
+            return keep
+        if len(keep) == len(frame) - 1 and frame.index[-1] == label:
+            frame.iloc[-1] = row  # Niedomknięty kubełek - nadpisanie w miejscu
+            return frame
+        return pd.concat([keep, pd.DataFrame([row], index=pd.DatetimeIndex([label]), columns=OHLCV)])
+
+    def _trim(self, symbol):
+        """Baza trzyma `base_days` dni; starsze sesje przechodzą do dziennych"""
+        base = self._base[symbol]
+        horizon = base.index[-1] - pd.Timedelta(days=self.base_days)
+        if base.index[0] >= horizon:
+            return
+        cutoff = bucket_label(horizon, "1d")
+        start = cutoff.tz_localize(EXCHANGE_TZ) if base.index.tz is not None else cutoff
+        pos = base.index.searchsorted(start)
+        if pos == 0:
+            return
+        folded = resample_bars(base.iloc[:pos], "1d")
+        daily = self._daily.get(symbol)
+        self._daily[symbol] = folded if daily is None or daily.empty else \
+            pd.concat([daily, folded[~folded.index.isin(daily.index)]]).sort_index()
+        self._base[symbol] = base = base.iloc[pos:]
+        for interval, frame in self._aggregates[symbol].items():
+            first = bucket_label(base.index[0], interval)
+            self._aggregates[symbol][interval] = frame.iloc[frame.index.searchsorted(first):]
+
+    def refresh(self, symbols: List[str], period: str = None, force: bool = False):
+        """
+        Dociąga świece (stare > ttl) i brakujące dzienne dla `period`
+
+        Baza 5m tylko dla symboli z widokiem śróddziennym (`_wants_base`); pozostałe dostają
+        wprost dzienne. Pobrania bez blokady magazynu: symbole pobierane właśnie przez inny
+        wątek są pomijane, a po jego zakończeniu sprawdzane ponownie.
+        """
+        pending = list(dict.fromkeys(symbols))
+        while pending:
+            with self._fetch_lock:
+                claimed = [s for s in pending if s not in self._inflight]
+                waiting = {self._inflight[s] for s in pending if s in self._inflight}
+                done = threading.Event()
+                for s in claimed:
+                    self._inflight[s] = done
+            try:
+                self._refresh_claimed(claimed, period, force)
+            finally:
+                with self._fetch_lock:
+                    for s in claimed:
+                        del self._inflight[s]
+                done.set()
+            for event in waiting:
+                event.wait()
+            pending, force = [s for s in pending if s not in claimed], False
+
+    def _refresh_claimed(self, symbols, period, force):
+        now = time.monotonic()
+        stale = [s for s in symbols if force or (s in self._intraday and s not in self._base_fetched)
+                 or (now - self._refreshed.get(s, -np.inf) >= self.ttl
+                     and (self.calendar is None or self.calendar.needs_refresh(self._refreshed_at.get(s))))]
+        wanted = period_start(period, pd.Timestamp.now()) if period is not None else None
+        groups: Dict[str, List[str]] = {}
+        for s in [s for s in stale if self._wants_base(s)]:
+            groups.setdefault(self._gap_period(s), []).append(s)
+        for gap, group in groups.items():
+            self._fetch(group, gap, self.base_interval)
+            self._base_fetched.update(group)
+
+        # Bez świec 5m (symbol tylko dzienny albo indeks bez śróddziennych): sama końcówka dziennych
+        groups = {}
+        for s in stale:
+            base = self._base.get(s)
+            if (base is None or base.empty) and not self._needs_daily(s, wanted, period is not None):
+                groups.setdefault(self._daily_gap_period(s), []).append(s)
+        for gap, group in groups.items():
+            self._merge_daily(self._fetch(group, gap, "1d"))
+        for s in stale:
+            self._refreshed[s] = now
+            self._refreshed_at[s] = time.time()
+
+        if period is not None:
+            need = [s for s in symbols if self._needs_daily(s, wanted, True)]
+            if need:
+                self._merge_daily(self._fetch(need, period, "1d"))
+                for s in need:
+                    self._daily_from[s] = wanted
+
+    def _merge_daily(self, frames):
+        with self._lock:
+            for s, df in frames.items():
+                self._daily[s] = pd.concat([self._daily.get(s, df.iloc[:0]), df]).pipe(
+                    lambda d: d[~d.index.duplicated(keep="last")]).sort_index()
+
+    def _fetch(self, symbols, period, interval):
+        frames = self.download(symbols, period, interval)
+        self._local.fetched = True
+        with self._lock:
+            self.fetches += 1
+            self.fetched_bars += sum(len(df) for df in frames.values())
+        if interval == self.base_interval:
+            for s, df in frames.items():
+                self.append(s, df)
+        return frames
+
+    def _gap_period(self, symbol):
+        """Najkrótszy okres yfinance pokrywający świece od ostatniej przechowywanej"""
+        base = self._base.get(symbol)
+        if base is None or base.empty:
+            return f"{self.base_days}d"
+        last = base.index[-1]
+        gap = pd.Timestamp.now(tz=last.tz) - last
+        for period, days in (("1d", 1), ("5d", 5), ("1mo", 28)):
+            if gap < pd.Timedelta(days=days):
+                return period
+        return f"{self.base_days}d"
+
+    def _daily_gap_period(self, symbol):
+        """Jak _gap_period, ale dla samych dziennych (symbol bez bazy 5m)"""
+        daily = self._daily.get(symbol)
+        if daily is None or daily.empty:
+            return "3mo"
+        gap = pd.Timestamp.now().normalize() - session_dates(daily.index[-1:])[0]
+        for period, days in (("5d", 5), ("1mo", 28), ("3mo", 85)):
+            if gap < pd.Timedelta(days=days):
+                return period
+        return "1y"
+
+    def _wants_base(self, symbol):
+        """Baza 5m tylko dla symboli, o które pytano w interwale śróddziennym (albo już ją mających)"""
+        return symbol in self._intraday or symbol in self._base
+
+    def _needs_daily(self, symbol, wanted, requested):
+        """Czy dzienne za `period` trzeba pobrać w całości (brak albo pokrywają krótszy okres)"""
+        if not requested:
+            return False
+        base = self._base.get(symbol)
+        if base is not None and not base.empty and wanted is not None \
+                and wanted >= session_dates(base.index[:1])[0]:
+            return False
+        if not self._wants_base(symbol) and self._daily.get(symbol) is None:
+            return True
+        covered = self._daily_from.get(symbol)
+        return covered is None or wanted is None or wanted < covered
+
+    # --- Odczyt ---
+    def get(self, symbol: str, period: str = "3mo", interval: str = "1d") -> pd.DataFrame:
+        return self.history([symbol], period, interval).get(symbol, pd.DataFrame(columns=OHLCV))
+
+    def history(self, symbols: List[str], period: str = "3mo", interval: str = "1d") -> Dict[str, pd.DataFrame]:
+        """{symbol: OHLCV} za `period` w `interval` - pobrania tylko gdy dane są starsze niż ttl"""
+        symbols = list(symbols)
+        self._local.fetched = False
+        if interval not in RULES or pd.Timedelta(RULES[interval]) < pd.Timedelta(RULES[self.base_interval]):
+            frames = self.download(symbols, period, interval)
+            self._local.fetched = True
+            self.fetches += 1
+            return frames
+        if interval != "1d":
+            self._intraday.update(symbols)
+        self.refresh(symbols, period if interval == "1d" else None)
+        with stage("compute.resample", symbols=len(symbols), period=period, interval=interval):
+            with self._lock:
+                frames = {s: self._view(s, interval) for s in symbols}
+            return {s: slice_period(df, period).copy() for s, df in frames.items() if not df.empty}
+
+    @property
+    def last_fetched(self) -> bool:
+        """Czy ostatnie history()/get() w bieżącym wątku pobierało dane z sieci (False = z pamięci)"""
+        return getattr(self._local, "fetched", False)
+
+    def _view(self, symbol, interval):
+        base = self._base.get(symbol, pd.DataFrame(columns=OHLCV))
+        if interval == self.base_interval or base.empty:
+            frame = base  # Bez bazy (symbol tylko dzienny) nie ma czego agregować ani cache'ować
+        else:
+            aggregates = self._aggregates.setdefault(symbol, {})
+            if interval not in aggregates:
+                aggregates[interval] = resample_bars(base, interval)
+            frame = aggregates[interval]
+        if interval != "1d":
+            return frame
+        daily = self._daily.get(symbol)
+        if daily is None or daily.empty:
+            return frame
+        if frame.empty:
+            return daily
+        return pd.concat([daily[daily.index < frame.index[0]], frame])
+
+    def info(self) -> dict:
+        with self._lock:
+            bars = sum(len(df) for df in self._base.values())
+            cached = sum(len(a) for a in self._aggregates.values())
+        return {"symbols": len(self._base), "base_bars": bars, "aggregates": cached,
+                "fetches": self.fetches, "fetched_bars": self.fetched_bars}
+
+    def nbytes(self) -> int:
+        """Pamięć baz, dziennych i agregatów (monitor pamięci)"""
+        with self._lock:
+            frames = [*self._base.values(), *self._daily.values(),
+                      *(df for views in self._aggregates.values() for df in views.values())]
+        return sum(int(df.memory_usage(index=True).sum()) for df in frames)
+
+
+# Wspólny magazyn procesu (DataManager, screener, dashboard, gateway)
+BAR_STORE = BarStore(calendar=CALENDAR)
+
+
+def synthetic_bars(symbol: str, days: int = BASE_DAYS, end=None, seed: int = 0) -> pd.DataFrame:
+    """Świece 5m sesji GPW 9:00-17:00 (do benchmarku bez sieci)"""
+    rng = np.random.default_rng(abs(hash((symbol, seed))) % 2**32)
+    sessions = pd.bdate_range(end=end or pd.Timestamp.now().normalize(), periods=days)
+    index = pd.DatetimeIndex([d + pd.Timedelta(hours=9, minutes=5 * i) for d in sessions for i in range(96)])
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index))))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({"Open": open_, "High": np.maximum(open_, close) * 1.001,
+                         "Low": np.minimum(open_, close) * 0.999, "Close": close,
+                         "Volume": rng.integers(100, 10_000, len(index)).astype(float)},
+                        index=index.tz_localize(EXCHANGE_TZ))
+
+
+def benchmark_resample(n_symbols: int = 40, days: int = BASE_DAYS, polls: int = 48):
+    """
+    Pobrania na zestaw widoków 5m/15m/1h/1d oraz koszt odświeżenia: poll w stylu
+    yfinance period='1d' (wszystkie dzisiejsze świece, nowa na końcu) -> przyrostowe
+    agregaty vs pełny resample bazy
+    """
+    symbols = [f"T{i:03d}.WA" for i in range(n_symbols)]
+    full = {s: synthetic_bars(s, days) for s in symbols}
+    today = full[symbols[0]].index[-96]
+    cursor = {"bars": len(full[symbols[0]]) - polls}
+    downloads = []
+
+    def fake_download(syms, period, interval):
+        downloads.append((len(syms), period, interval))
+        if interval == "1d":
+            return {s: resample_bars(full[s], "1d").iloc[:-1] for s in syms}
+        frames = {s: full[s].iloc[:cursor["bars"]] for s in syms}
+        return frames if period != "1d" else {s: df[df.index >= today] for s, df in frames.items()}
+
+    store = BarStore(download=fake_download, ttl=np.inf)
+    for interval, period in (("1d", "3mo"), ("5m", "5d"), ("15m", "1mo"), ("1h", "1mo"), ("1d", "6mo")):
+        store.history(symbols, period, interval)
+    print(f"Widoki 5m/15m/1h/1d dla {n_symbols} symboli: {len(downloads)} pobrania {downloads}")
+
+    start = time.perf_counter()
+    for _ in range(polls):
+        cursor["bars"] += 1
+        store.refresh(symbols, force=True)
+    incremental = (time.perf_counter() - start) / (polls * n_symbols)
+
+    start = time.perf_counter()
+    for s in symbols[:5]:
+        for interval in ("15m", "1h", "1d"):
+            resample_bars(store._base[s], interval)
+    recompute = (time.perf_counter() - start) / 5
+
+    for s in symbols[:3]:
+        for interval in ("15m", "1h", "1d"):
+            expected = resample_bars(full[s], interval)
+            got = store._aggregates[s][interval]
+            assert np.allclose(got.to_numpy(), expected.loc[got.index].to_numpy()), interval
+    print(f"Poll 1d (5m): przyrostowo {incremental * 1000:.2f} ms/symbol (15m+1h+1d), "
+          f"pełny resample {recompute * 1000:.2f} ms/symbol; {store.info()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark magazynu świec wieloczasowych (BarStore)")
+    parser.add_argument("--symbols", type=int, default=40)
+    parser.add_argument("--days", type=int, default=BASE_DAYS)
+    parser.add_argument("--polls", type=int, default=48)
+    args = parser.parse_args()
+    benchmark_resample(args.symbols, args.days, args.polls)
@@ -0,0 +1,144 @@
+# santander_bot/core/snapshot.py
+import os
+import pickle
+import threading
+import time
+
+
+class Snapshot:
+    """Niezmienny wynik loadera + moment wyliczenia"""
+
+    def __init__(self, value, created_at=None, version=0):
+        self.value = value
+        self.created_at = created_at or time.time()
+        self.version = version
+
+    @property
+    def age(self):
+        return time.time() - self.created_at
+
+
+class SnapshotStore:
+    """
+    Stale-while-revalidate dla kosztownego loadera (pobranie + wskaźniki + model)
+
+    - get() zwraca od razu ostatni dobry snapshot; gdy jest starszy niż `ttl`,
+      odświeżenie startuje w tle (jedno naraz - single flight)
+    - blokuje tylko zimny start, gdy nie ma nic w pamięci ani na dysku
+    - nieudany/pusty wynik loadera nie nadpisuje ostatniego dobrego snapshotu
+    - ostatni snapshot ląduje na dysku (`path`), więc nowy proces startuje "ciepły"
+    - `schedule(created_at)` (np. CALENDAR.needs_refresh) = False: snapshot aktualny mimo
+      wieku - poza sesją GPW zero pobrań i przeliczeń, serwowany ostatni
+    - `is_current(value)` = False: wynik niekompletny (np. nowy ticker z watchlisty) -
+      odświeżenie od razu, niezależnie od `ttl` i `schedule`
+    """
+
+    def __init__(self, loader, ttl=25, path=None, is_valid=None, schedule=None, is_current=None):
+        self.loader = loader
+        self.ttl = ttl
+        self.path = path
+        self.is_valid = is_valid or (lambda value: value is not None)
+        self.schedule = schedule or (lambda created_at: True)
+        self.is_current = is_current or (lambda value: True)
+        self.last_error = None
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._refreshing = threading.Event()
+        self._disk_mtime = None
+        self._disk_checked = 0.0
+        self._load_from_disk()
+
+    @property
+    def refreshing(self):
+        return self._refreshing.is_set()
+
+    def peek(self):
+        """Ostatni snapshot bez wyzwalania odświeżenia (None = zimny start)"""
+        return self._snapshot
+
+    def get(self, block=True):
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.refresh() if block else None
+        if self._stale(snapshot):
+            self.refresh_async()
+        return snapshot
+
+    def expired(self, snapshot):
+        """Dane mogły się zmienić od wyliczenia (wiek > ttl i kalendarz pozwala)"""
+        return snapshot.age > self.ttl and self.schedule(snapshot.created_at)
+
+    def _stale(self, snapshot):
+        return self.expired(snapshot) or not self.is_current(snapshot.value)
+
+    def refresh(self):
+        """Synchroniczne odświeżenie; równoległe wywołania czekają na jedno wspólne"""
+        with self._refresh_lock:
+            current = self._snapshot
+            if current is not None and not self._stale(current):
+                return current  # Ktoś właśnie odświeżył albo rynek zamknięty
+            self._refreshing.set()
+            try:
+                value = self.loader()
+                if self.is_valid(value):
+                    version = current.version + 1 if current else 1
+                    self._snapshot = Snapshot(value, version=version)
+                    self.last_error = None
+                    self._save_to_disk(self._snapshot)
+            except Exception as e:
+                self.last_error = e
+            finally:
+                self._refreshing.clear()
+            return self._snapshot
+
+    def sync_from_disk(self, every=1.0):
+        """
+        Przejmuje nowszy snapshot zapisany przez inny proces (dashboard, API) zamiast liczyć
+        własny; plik sprawdzany najwyżej raz na `every` s. True, gdy snapshot się zmienił.
+        """
+        now = time.monotonic()
+        if not self.path or now - self._disk_checked < every:
+            return False
+        self._disk_checked = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._disk_mtime:
+            return False
+        current = self._snapshot
+        self._load_from_disk()
+        return self._snapshot is not current
+
+    def refresh_async(self):
+        if self._refreshing.is_set() or self._refresh_lock.locked():
+            return
+        threading.Thread(target=self.refresh, name="snapshot-refresh", daemon=True).start()
+
+    def _load_from_disk(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, "rb") as f:
+                snapshot = pickle.load(f)
+            self._disk_mtime = mtime
+            current = self._snapshot
+            if (isinstance(snapshot, Snapshot) and self.is_valid(snapshot.value)
+                    and (current is None or snapshot.created_at > current.created_at)):
+                self._snapshot = snapshot
+        except Exception:
+            pass  # Uszkodzony/niezgodny plik - zwykły zimny start
+
+    def _save_to_disk(self, snapshot):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)  # Atomowo - czytelnik nie zobaczy połowy pliku
+            self._disk_mtime = os.path.getmtime(self.path)
+        except OSError:
+            pass
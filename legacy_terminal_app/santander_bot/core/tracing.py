@@ -1,26 +1,51 @@
 import os
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from opentelemetry.instrumentation.requests import RequestsInstrumentor
-from opentelemetry.sdk.resources import Resource
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+# Tylko lekkie API na starcie - SDK, eksportery (gRPC) i instrumentacja ładowane w setup_tracing()
+from opentelemetry import trace, metrics
+
+# Granice kubełków histogramu latencji (sekundy) - od pojedynczego wskaźnika do pełnego pobrania
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _otlp_exporters():
+    """Span + metric exporter zgodne z OTEL_EXPORTER_OTLP_PROTOCOL (grpc domyślnie)"""
+    if os.getenv("OTEL_EXPORTER_OTLP_PROTOCOL", "grpc").startswith("http"):
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+    else:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+    return OTLPSpanExporter(), OTLPMetricExporter()
+
 
 def setup_tracing(service_name="santander-bot"):
     """
-    Sets up OpenTelemetry tracing.
+    Sets up OpenTelemetry tracing and stage latency metrics.
     """
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from opentelemetry.instrumentation.requests import RequestsInstrumentor
+    from opentelemetry.sdk.resources import Resource
+
     resource = Resource.create(attributes={
         "service.name": service_name
     })
 
     provider = TracerProvider(resource=resource)
-    
+    metric_readers = []
+
     # OTLP Exporter - expects a collector at localhost:4317 by default
     # or configured via OTEL_EXPORTER_OTLP_ENDPOINT
     try:
-        otlp_exporter = OTLPSpanExporter()
+        otlp_exporter, otlp_metric_exporter = _otlp_exporters()
         provider.add_span_processor(BatchSpanProcessor(otlp_exporter))
+        metric_readers.append(PeriodicExportingMetricReader(otlp_metric_exporter))
     except Exception:
         pass # Fail silently if OTLP not available/configured
 
@@ -30,10 +55,193 @@ def setup_tracing(service_name="santander-bot"):
         provider.add_span_processor(BatchSpanProcessor(ConsoleSpanExporter()))
 
     trace.set_tracer_provider(provider)
-    
+    metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=metric_readers))
+
     # Auto-instrument requests library
     RequestsInstrumentor().instrument()
-    
+
+    # In-process endpoint /metrics (tylko gdy ustawiono METRICS_PORT)
+    start_metrics_server()
+
     return trace.get_tracer(service_name)
 
 tracer = trace.get_tracer("santander-bot")
+meter = metrics.get_meter("santander-bot")
+
+_stage_duration = meter.create_histogram(
+    "santander.stage.duration",
+    unit="s",
+    description="Czas trwania etapów fetch/compute/render"
+)
+
+
+class LatencyHistogram:
+    """Histogram latencji o stałych kubełkach (format Prometheus)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds, error=False):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        if error:
+            self.errors += 1
+
+    def quantile(self, q):
+        """Przybliżony kwantyl - górna granica kubełka"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """Lokalny rejestr histogramów per etap - źródło dla endpointu /metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, stage_name, seconds, error=False):
+        with self._lock:
+            hist = self._histograms.get(stage_name)
+            if hist is None:
+                hist = self._histograms[stage_name] = LatencyHistogram()
+            hist.observe(seconds, error)
+
+    def snapshot(self):
+        """{stage: {'count', 'sum', 'errors', 'p50', 'p95', 'p99'}}"""
+        with self._lock:
+            return {
+                name: {
+                    'count': h.count,
+                    'sum': h.sum,
+                    'errors': h.errors,
+                    'p50': h.quantile(0.50),
+                    'p95': h.quantile(0.95),
+                    'p99': h.quantile(0.99),
+                }
+                for name, h in self._histograms.items()
+            }
+
+    def render_prometheus(self):
+        lines = [
+            "# HELP santander_stage_duration_seconds Czas trwania etapu",
+            "# TYPE santander_stage_duration_seconds histogram",
+        ]
+        errors = []
+        with self._lock:
+            for name, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f'santander_stage_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'santander_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {h.count}')
+                lines.append(f'santander_stage_duration_seconds_sum{{stage="{name}"}} {h.sum:.6f}')
+                lines.append(f'santander_stage_duration_seconds_count{{stage="{name}"}} {h.count}')
+                errors.append(f'santander_stage_errors_total{{stage="{name}"}} {h.errors}')
+        lines.append("# TYPE santander_stage_errors_total counter")
+        lines.extend(errors)
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+_stage_listeners = []
+_metrics_collectors = []
+
+
+def add_stage_listener(listener):
+    """Rejestruje callback(name, wall_s, cpu_s) wołany po każdym etapie"""
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener):
+    if listener in _stage_listeners:
+        _stage_listeners.remove(listener)
+
+
+def add_metrics_collector(collector):
+    """Rejestruje callable() -> tekst Prometheus dopisywany do /metrics (np. gauge pamięci)"""
+    _metrics_collectors.append(collector)
+
+
+def remove_metrics_collector(collector):
+    if collector in _metrics_collectors:
+        _metrics_collectors.remove(collector)
+
+
+def render_metrics():
+    """Histogramy etapów + wszystkie zarejestrowane kolektory"""
+    return METRICS.render_prometheus() + "".join(collector() for collector in list(_metrics_collectors))
+
+
+@contextmanager
+def stage(name, **attributes):
+    """
+    Span + pomiar latencji dla etapu hot-path (fetch.*, compute.*, model.*, render.*)
+
+    Czas trafia do histogramu OTel (eksport OTLP) i do lokalnego rejestru METRICS.
+    """
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+    error = False
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        try:
+            yield span
+        except Exception:
+            error = True
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            cpu = time.thread_time() - cpu_start
+            METRICS.observe(name, wall, error)
+            _stage_duration.record(wall, {"stage": name, "error": error})
+            for listener in _stage_listeners:
+                listener(name, wall, cpu)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Nie śmiecimy w TUI
+
+
+_metrics_server = None
+
+
+def start_metrics_server(port=None, host="0.0.0.0"):
+    """Uruchamia endpoint /metrics w wątku tła (port z METRICS_PORT, brak = wyłączony)"""
+    global _metrics_server
+    if _metrics_server is not None:
+        return _metrics_server
+
+    port = port if port is not None else os.getenv("METRICS_PORT")
+    if port is None or port == "":
+        return None
+
+    try:
+        _metrics_server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+    except OSError:
+        return None  # Port zajęty (np. drugi proces) - metryki nadal idą przez OTLP
+    threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+    return _metrics_server
@@ -0,0 +1,112 @@
+# santander_bot/core/watchlists.py
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from santander_bot.strategies.universe import normalize_ticker
+
+WATCHLISTS_ENV = "SANTANDER_WATCHLISTS"
+DEFAULT_WATCHLISTS_PATH = os.path.expanduser("~/.cache/santander/watchlists.json")
+IDLE_TTL = 900  # s bez renderu sesji -> jej watchlista wypada z sumy
+# Nazwa z ?user= to tylko etykieta zapisu, nie uwierzytelnienie - kto zna nazwę, nadpisze listę
+USER_PATTERN = re.compile(r"[A-Za-z0-9_.-]{1,32}")
+MAX_USERS = 1000        # zapisanych list w pliku
+MAX_WATCHLIST = 200     # tickerów na listę
+
+
+def valid_user(user) -> bool:
+    return isinstance(user, str) and USER_PATTERN.fullmatch(user) is not None
+
+
+def normalize_watchlist(tickers: Iterable[str]) -> Tuple[str, ...]:
+    """Tickery bez sufiksu .WA, wielkie litery, bez duplikatów (kolejność zachowana)"""
+    return tuple(dict.fromkeys(normalize_ticker(t) for t in tickers if t and t.strip()))
+
+
+class WatchlistRegistry:
+    """
+    Watchlisty użytkowników + suma aktywnych list dla wspólnego pipeline'u danych
+
+    - `base`: lista liczona zawsze (domyślna watchlista dashboardu, API)
+    - sesja zgłasza swoją listę przy każdym renderze (`activate`); po `idle_ttl` s ciszy
+      wypada z sumy - kolejne pełne odświeżenie już jej tickerów nie liczy
+    - `union()` = base + aktywne listy; nakładające się listy nie zmieniają sumy, więc
+      kolejny użytkownik z podobną listą nie kosztuje ani pobrania, ani przeliczenia
+    - listy zapisane per użytkownik w JSON ($SANTANDER_WATCHLISTS), wspólne dla procesów;
+      nazwa wg USER_PATTERN, najwyżej MAX_USERS list po MAX_WATCHLIST tickerów
+    """
+
+    def __init__(self, base: Iterable[str], path: str = None, idle_ttl: float = IDLE_TTL):
+        self.base = normalize_watchlist(base)
+        self.path = path or os.getenv(WATCHLISTS_ENV, DEFAULT_WATCHLISTS_PATH)
+        self.idle_ttl = idle_ttl
+        self._active: Dict[str, Tuple[Tuple[str, ...], float]] = {}  # sesja -> (lista, ostatni render)
+        self._lock = threading.Lock()
+
+    # --- Zapisane listy ---
+    def _read(self) -> Dict[str, List[str]]:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, user: str) -> Optional[Tuple[str, ...]]:
+        """Zapisana lista użytkownika albo None (również dla niepoprawnej nazwy)"""
+        if not valid_user(user):
+            return None
+        saved = self._read().get(user)
+        return normalize_watchlist(saved) if saved else None
+
+    def save(self, user: str, tickers: Iterable[str]) -> Tuple[str, ...]:
+        """Zapis listy użytkownika; ValueError dla niepoprawnej nazwy, za długiej listy albo pełnego rejestru"""
+        if not valid_user(user):
+            raise ValueError(f"Invalid user name (expected {USER_PATTERN.pattern})")
+        watchlist = normalize_watchlist(tickers)
+        if len(watchlist) > MAX_WATCHLIST:
+            raise ValueError(f"Watchlist too long ({len(watchlist)} > {MAX_WATCHLIST} tickers)")
+        with self._lock:
+            saved = self._read()
+            if user not in saved and len(saved) >= MAX_USERS:
+                raise ValueError(f"Watchlist registry full ({MAX_USERS} users)")
+            saved[user] = list(watchlist)
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(saved, f, indent=1)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass  # Brak zapisu - lista działa do końca sesji
+        return watchlist
+
+    # --- Aktywne sesje ---
+    def activate(self, session: str, tickers: Iterable[str]) -> Tuple[str, ...]:
+        watchlist = normalize_watchlist(tickers)
+        with self._lock:
+            self._active[session] = (watchlist, time.monotonic())
+        return watchlist
+
+    def release(self, session: str):
+        with self._lock:
+            self._active.pop(session, None)
+
+    def union(self) -> List[str]:
+        """base + listy aktywnych sesji (kolejność: base, potem pierwsze wystąpienie)"""
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            for session in [s for s, (_, seen) in self._active.items() if seen < cutoff]:
+                del self._active[session]
+            lists = [watchlist for watchlist, _ in self._active.values()]
+        return list(dict.fromkeys(self.base + tuple(t for watchlist in lists for t in watchlist)))
+
+    def missing(self, computed: Iterable[str]) -> List[str]:
+        """Tickery z sumy, których nie ma w `computed` (np. MarketSnapshot.requested)"""
+        computed = set(computed)
+        return [t for t in self.union() if t not in computed]
+
+    def sessions(self) -> int:
+        with self._lock:
+            return len(self._active)
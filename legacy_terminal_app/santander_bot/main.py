@@ -1,35 +1,70 @@
 # santander_bot/main.py
+import argparse
 import time
 import sys
 import os
+from contextlib import nullcontext
 from rich.live import Live
 from rich.console import Console
 from rich.layout import Layout
-from santander_bot.config import SYMBOLS
+from santander_bot.config import (SYMBOLS, SCREENER_WORKERS, PROFILE_ENV, MEMORY_ENV, GATEWAY_ENV,
+                                  GATEWAY_ADDRESS as DEFAULT_ADDRESS)
 from santander_bot.core.data import DataManager
 from santander_bot.ui.terminal import TerminalUI
-from santander_bot.strategies.screener import ScreenerEngine
+from santander_bot.strategies.sharded import ShardedScreener
+from santander_bot.strategies.universe import load_universe
 from santander_bot.ui.screener_panel import ScreenerPanel
-from santander_bot.core.tracing import setup_tracing, tracer
+from santander_bot.ui.alerts_panel import AlertsPanel
+from santander_bot.core.tracing import setup_tracing, stage
+from santander_bot.core.gpw_calendar import CALENDAR
+# Profiler, monitor pamięci, replay, gateway i alerty importowane leniwie - tylko gdy włączone (bench/startup.py)
 import threading
 
 console = Console()
 
 class SantanderTerminal:
-    def __init__(self):
-        self.dm = DataManager()
+    def __init__(self, source=None, memory=None):
+        from santander_bot.core.alerts import AlertEngine, load_rules
+
+        self.dm = DataManager(source=source)
+        self.memory = memory  # MemoryMonitor (--memory) - RSS i sterta per podsystem w nagłówku
         self.ui = TerminalUI(self.dm)
-        self.screener = ScreenerEngine()
+        self.alerts = AlertEngine(load_rules()).attach(self.dm)  # Ocena reguł przy każdej aktualizacji danych
+        self.screener = ShardedScreener(workers=SCREENER_WORKERS)
+        self.universe = load_universe()
         self.screener_results = None
         self.screener_lock = threading.Lock()
+        if memory is not None:
+            self.track_memory(memory)
+
+    def track_memory(self, memory):
+        """Rozmiary struktur wątków danych / screenera dla monitora pamięci"""
+        from santander_bot.core.memory import frame_bytes
+        from santander_bot.core.resample import BAR_STORE
+
+        def data_bytes():
+            with self.dm.lock:
+                frames = list(self.dm.data_store.values())
+            return sum(frame_bytes(df) for df in frames)
+
+        def screener_bytes():
+            with self.screener_lock:
+                return frame_bytes(self.screener_results)
+
+        memory.track("data", data_bytes).track("bars", BAR_STORE.nbytes).track("screener", screener_bytes)
     
     def update_screener(self):
-        """Aktualizuj screener co 60 sekund (background)"""
+        """Aktualizuj screener co 60 sekund (background) - poza sesją tylko raz po zamknięciu"""
+        last_run = None
         while True:
+            if not CALENDAR.needs_refresh(last_run):
+                time.sleep(60)
+                continue
+            last_run = time.time()
             try:
-                with tracer.start_as_current_span("update_screener"):
+                with stage("update_screener"):
                     console.print("[dim]Uruchamianie screenera...[/]")
-                    results = self.screener.run_screener(max_pe=15.0, require_fan=True)
+                    results = self.screener.run_screener(tickers=self.universe, max_pe=15.0, require_fan=True)
                     with self.screener_lock:
                         self.screener_results = results
                     console.print(f"[dim green]✓ Screener: {len(results)} spółek znaleziono[/]")
@@ -48,6 +83,8 @@ class SantanderTerminal:
         
         # Header
         header_text = f"[bold gold1]SANTANDER TERMINAL PRO 2025 - GARP SCREENER[/]\n{datetime.now().strftime('%H:%M:%S')}"
+        if self.memory is not None:
+            header_text += f"  [dim]{self.memory.summary()}[/]"
         
         # Screener panel
         with self.screener_lock:
@@ -56,6 +93,8 @@ class SantanderTerminal:
             else:
                 screener_panel = Panel("[yellow]Screener ładuje dane...[/]", title="📊 Screener")
         
+        alerts_panel = AlertsPanel.create_table(self.alerts.recent(10))
+        
         # Charts layout
         charts_layout = Layout()
         charts = [self.ui.draw_chart(s) for s in SYMBOLS]
@@ -69,23 +108,57 @@ class SantanderTerminal:
             bottom.split_row(*charts[3:])
             charts_layout.split_column(top, bottom)
         
+        top_row = Layout(size=16)
+        top_row.split_row(Layout(screener_panel, ratio=3), Layout(alerts_panel, ratio=2))
+        
         # Final layout
         layout.split_column(
             Layout(Panel(Align.center(header_text), style="white on black"), size=3),
-            Layout(screener_panel, size=16),  # Screener table
+            top_row,                           # Screener table + alerty
             Layout(charts_layout, ratio=1)     # Charts grid
         )
         
         return layout
 
+def env_flag(name):
+    """SANTANDER_PROFILE=1 itp. - bez importu modułu funkcji"""
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Santander Terminal Pro + GARP Screener")
+    parser.add_argument("--profile", action="store_true", help="profiler próbkujący (jak SANTANDER_PROFILE=1)")
+    parser.add_argument("--memory", action="store_true", help="monitor pamięci: RSS + tracemalloc per podsystem (jak SANTANDER_MEMORY=1)")
+    parser.add_argument("--replay", metavar="PATH", help="odtwarzaj nagranie (katalog <SYM>.csv lub .jsonl) zamiast Stooq/yfinance")
+    parser.add_argument("--speed", type=float, default=1.0, help="tempo replay (mnożnik czasu rzeczywistego, 0 = max)")
+    parser.add_argument("--gateway", nargs="?", const=DEFAULT_ADDRESS, default=os.getenv(GATEWAY_ENV),
+                        metavar="ADDR", help=f"notowania z lokalnego gatewaya (domyślnie {DEFAULT_ADDRESS}, jak {GATEWAY_ENV})")
+    return parser.parse_args(argv)
+
 def main():
+    args = parse_args()
     console.print("[bold cyan]🔥 Inicjalizacja Santander Terminal Pro + GARP Screener...[/]")
     
-    # 0. Setup Tracing
+    # 0. Setup Tracing (+ opcjonalny profiler: --profile / SANTANDER_PROFILE=1)
     setup_tracing()
+    profiler = memory = None
+    if args.profile or env_flag(PROFILE_ENV):
+        from santander_bot.core.profiling import start_profiler
+        profiler = start_profiler()
+    cycle = profiler.cycle if profiler else nullcontext
+    if args.memory or env_flag(MEMORY_ENV):
+        from santander_bot.core.memory import start_memory_monitor
+        memory = start_memory_monitor()
 
     # 1. Init Terminal
-    terminal = SantanderTerminal()
+    source = None
+    if args.replay:
+        from santander_bot.core.replay import ReplaySource
+        source = ReplaySource(args.replay, speed=args.speed)
+    elif args.gateway:
+        from santander_bot.core.gateway import GatewaySource
+        os.environ[GATEWAY_ENV] = args.gateway  # Screener (także workery puli) pyta gateway
+        source = GatewaySource(args.gateway)
+    terminal = SantanderTerminal(source=source, memory=memory)
     
     # 2. Start data feed
     terminal.dm.start()
@@ -99,10 +172,19 @@ def main():
     try:
         with Live(terminal.make_full_layout(), refresh_per_second=1, screen=True) as live:
             while True:
-                live.update(terminal.make_full_layout())
+                with cycle(), stage("render.frame"):
+                    live.update(terminal.make_full_layout())
                 time.sleep(1)
     except KeyboardInterrupt:
         console.print("\n[red]🛑 Terminal zamknięty. May the trend be with you! 🚀[/]")
+        if args.replay:
+            console.print(f"[dim]Replay: {source.ticks} ticków w {source.elapsed:.1f}s[/]")
+        if memory:
+            memory.stop()
+            console.print(f"[dim]{memory.report()}[/]")
+        if profiler:
+            base = profiler.stop()
+            console.print(f"[dim]Profil zapisany: {base}.folded, {base}.txt[/]")
         sys.exit(0)
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+# santander_bot/strategies/backtest.py
+import argparse
+import time
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from santander_bot.config import RSI_PERIOD
+from santander_bot.core.tracing import stage
+
+TRADING_DAYS = 252
+
+
+# --- Wskaźniki na całym panelu [T, N] (oś 0 = czas, NaN = brak notowania) ---
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Średnia krocząca przez sumy skumulowane; NaN gdy w oknie brakuje notowania"""
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    out = np.full_like(x, np.nan)
+    window_sum = csum[window - 1:].copy()
+    window_sum[1:] -= csum[:-window]
+    window_count = ccount[window - 1:].copy()
+    window_count[1:] -= ccount[:-window]
+    out[window - 1:] = np.where(window_count == window, window_sum / window, np.nan)
+    return out
+
+
+def ema(x: np.ndarray, span: int) -> np.ndarray:
+    """EMA jak pandas ewm(adjust=False): start od pierwszej wartości, brak notowania = poprzednia EMA"""
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(x)
+    prev = x[0].copy()
+    for t in range(len(x)):  # Pętla po czasie, wektor po wszystkich spółkach naraz
+        row = x[t]
+        prev = np.where(np.isnan(prev), row, np.where(np.isnan(row), prev, prev + alpha * (row - prev)))
+        out[t] = prev
+    return out
+
+
+def rsi(close: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """RSI na prostych średnich zysków/strat (jak TechnicalAnalyzer.add_indicators)"""
+    delta = np.full_like(close, np.nan)
+    delta[1:] = close[1:] - close[:-1]
+    gain = rolling_mean(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)), period)
+    loss = rolling_mean(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + gain / loss)
+
+
+def hold_between(entry: np.ndarray, exit: np.ndarray) -> np.ndarray:
+    """
+    Pozycja stanowa bez pętli: 1 od sygnału wejścia do sygnału wyjścia
+    (ostatnie zdarzenie wygrywa - forward fill indeksów zdarzeń po osi czasu)
+    """
+    T = len(entry)
+    rows = np.arange(T)[:, None]
+    last_entry = np.maximum.accumulate(np.where(entry, rows, -1), axis=0)
+    last_exit = np.maximum.accumulate(np.where(exit & ~entry, rows, -1), axis=0)
+    return (last_entry > last_exit).astype(np.float64)
+
+
+# --- Reguły: te same warunki co ostatni wiersz w UI, ale dla każdej sesji ---
+def rule_positions(close: np.ndarray) -> Dict[str, np.ndarray]:
+    """reguła -> pozycja [T, N] (1 = long po zamknięciu sesji t, 0 = gotówka)"""
+    with stage("compute.indicators", source="backtest", tickers=close.shape[1], sessions=close.shape[0]):
+        sma5, sma10 = rolling_mean(close, 5), rolling_mean(close, 10)
+        sma15, sma20 = rolling_mean(close, 15), rolling_mean(close, 20)
+        rsi_ = rsi(close)
+        macd = ema(close, 12) - ema(close, 26)
+        signal = ema(macd, 9)
+
+    diff = macd - signal
+    prev_diff = np.vstack([np.full((1, close.shape[1]), np.nan), diff[:-1]])
+    cross_up = (prev_diff < 0) & (diff > 0)
+    cross_down = (prev_diff > 0) & (diff < 0)
+
+    # TechnicalAnalyzer.get_signal: BUY (RSI) / STRONG BUY (RSI + przecięcie MACD), SELL przy RSI > 70
+    rsi_buy, rsi_sell = rsi_ < 30, rsi_ > 70
+
+    # Dashboard: score wachlarza 0-7 (>= 4 BUY, >= 7 STRONG BUY, cena < SMA20 = SELL)
+    score = ((close > sma5) * 1 + (sma5 > sma10) * 2 + (sma10 > sma15) * 2 + (sma15 > sma20) * 2)
+    sell = close < sma20
+
+    # ScreenerEngine.check_fan_formation: SMA5 > SMA10 > SMA15 > SMA20
+    fan = (sma5 > sma10) & (sma10 > sma15) & (sma15 > sma20)
+
+    return {
+        "technical_rsi": hold_between(rsi_buy, rsi_sell),
+        "technical_strong": hold_between(rsi_buy & cross_up, rsi_sell | cross_down),
+        "fan_score_buy": hold_between(score >= 4, sell),
+        "fan_score_strong": hold_between(score >= 7, sell),
+        "fan_formation": fan.astype(np.float64),
+    }
+
+
+class Backtester:
+    """
+    Wektorowy backtest reguł sygnałowych na panelu [sesje x spółki]
+
+    - sygnał liczony na zamknięciu sesji t, pozycja trzymana od sesji t+1 (bez look-ahead)
+    - koszt `cost_bps` od każdej zmiany pozycji (wejście i wyjście osobno)
+    - portfel: równe sloty 1/N na spółkę, niewykorzystany slot = gotówka (0%)
+    """
+
+    def __init__(self, close: pd.DataFrame, cost_bps: float = 10.0):
+        self.close = close.sort_index()
+        self.cost = cost_bps / 10_000
+        self.dates = self.close.index
+        self.tickers = list(self.close.columns)
+
+    @classmethod
+    def from_histories(cls, histories: Dict[str, pd.DataFrame], cost_bps: float = 10.0):
+        """{ticker: OHLCV} -> panel zamknięć wyrównany po datach (outer join)"""
+        close = pd.DataFrame({t: df['Close'] for t, df in histories.items() if not df.empty})
+        return cls(close, cost_bps=cost_bps)
+
+    def run(self, rules: List[str] = None) -> Dict[str, dict]:
+        """reguła -> {'equity': pd.Series, 'stats': dict, 'ticker_returns': pd.Series}"""
+        close = self.close.to_numpy(dtype=np.float64)
+        with stage("backtest.run", tickers=close.shape[1], sessions=close.shape[0]):
+            positions = rule_positions(close)
+            returns = np.zeros_like(close)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns[1:] = close[1:] / close[:-1] - 1
+            returns = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+            results = {}
+            for name, pos in positions.items():
+                if rules and name not in rules:
+                    continue
+                results[name] = self._simulate(pos, returns)
+        return results
+
+    def _simulate(self, pos: np.ndarray, returns: np.ndarray) -> dict:
+        held = np.zeros_like(pos)
+        held[1:] = pos[:-1]  # Pozycja z zamknięcia t-1 zarabia zwrot sesji t
+        turnover = np.abs(np.diff(held, axis=0, prepend=0.0))
+        net = held * returns - turnover * self.cost  # [T, N]
+
+        portfolio = net.mean(axis=1)
+        equity = np.cumprod(1 + portfolio)
+
+        # Transakcje: kolejne odcinki held == 1 w każdej kolumnie -> suma log-zwrotów odcinka
+        entries = (held == 1) & (np.vstack([np.zeros((1, held.shape[1])), held[:-1]]) == 0)
+        trade_id = np.cumsum(entries, axis=0) * held
+        ids = (trade_id + np.arange(held.shape[1]) * (held.shape[0] + 1)).astype(np.int64)
+        in_trade = held == 1
+        trade_pnl = np.bincount(ids[in_trade], weights=np.log1p(net[in_trade]))
+        trade_pnl = trade_pnl[np.bincount(ids[in_trade]) > 0]
+
+        return {
+            "equity": pd.Series(equity, index=self.dates),
+            "stats": self._stats(portfolio, equity, held, trade_pnl),
+            "ticker_returns": pd.Series(np.prod(1 + net, axis=0) - 1, index=self.tickers),
+        }
+
+    @staticmethod
+    def _stats(portfolio, equity, held, trade_pnl) -> dict:
+        years = len(portfolio) / TRADING_DAYS
+        vol = portfolio.std() * np.sqrt(TRADING_DAYS)
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+        return {
+            "total_return": float(equity[-1] - 1),
+            "cagr": float(equity[-1] ** (1 / years) - 1) if years > 0 and equity[-1] > 0 else 0.0,
+            "volatility": float(vol),
+            "sharpe": float(portfolio.mean() * TRADING_DAYS / vol) if vol > 0 else 0.0,
+            "max_drawdown": float(drawdown.min()),
+            "exposure": float(held.mean()),
+            "trades": int(len(trade_pnl)),
+            "win_rate": float((trade_pnl > 0).mean()) if len(trade_pnl) else 0.0,
+            "avg_trade": float(np.expm1(trade_pnl).mean()) if len(trade_pnl) else 0.0,
+        }
+
+    @staticmethod
+    def summary(results: Dict[str, dict]) -> pd.DataFrame:
+        """Tabela statystyk: wiersz = reguła"""
+        return pd.DataFrame({name: r["stats"] for name, r in results.items()}).T
+
+
+def download_histories(tickers: List[str], period: str = "5y") -> Dict[str, pd.DataFrame]:
+    """Dzienne OHLCV całego uniwersum jednym batchem yfinance"""
+    import yfinance as yf
+
+    with stage("fetch.yfinance", tickers=len(tickers), period=period):
+        bulk = yf.download(" ".join(f"{t}.WA" for t in tickers), period=period, interval="1d",
+                           group_by='ticker', progress=False)
+    available = set(bulk.columns.get_level_values(0))
+    return {t: bulk[f"{t}.WA"].dropna(how="all") for t in tickers if f"{t}.WA" in available}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wektorowy backtest reguł screenera / TechnicalAnalyzer")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="N syntetycznych spółek zamiast yfinance")
+    parser.add_argument("--years", type=float, default=5, help="długość historii (lata)")
+    parser.add_argument("--cost-bps", type=float, default=10.0, help="koszt transakcji (bps od zmiany pozycji)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.synthetic:
+        from santander_bot.strategies.sharded import synthetic_history
+        periods = int(args.years * TRADING_DAYS)
+        histories = {f"T{i:03d}": synthetic_history(f"T{i:03d}", periods=periods) for i in range(args.synthetic)}
+    else:
+        from santander_bot.strategies.universe import load_universe
+        histories = download_histories(load_universe(), period=f"{int(np.ceil(args.years))}y")
+    loaded = time.perf_counter()
+
+    backtester = Backtester.from_histories(histories, cost_bps=args.cost_bps)
+    results = backtester.run()
+    done = time.perf_counter()
+
+    pd.set_option("display.width", 160)
+    print(Backtester.summary(results).round(3))
+    print(f"\n{len(backtester.tickers)} spółek x {len(backtester.dates)} sesji: "
+          f"dane {loaded - start:.2f}s, backtest {done - loaded:.2f}s")
@@ -0,0 +1,226 @@
+# santander_bot/strategies/pairs.py
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+from santander_bot.core.tracing import stage
+from santander_bot.strategies.risk import BENCHMARK
+
+# Wartości krytyczne Engle-Granger (MacKinnon, 2 zmienne, ze stałą) dla statystyki t testu DF reszt
+EG_CRITICAL = {0.01: -3.90, 0.05: -3.34, 0.10: -3.04}
+ENTRY_Z = 2.0
+
+# Kolumny wyniku workera (float64): wiersz = uporządkowana para (y = i, x = j)
+FIELDS = ("i", "j", "Beta", "ADF t", "Half-life", "Z", "Corr")
+
+
+def log_prices(close_panel: pd.DataFrame, window: int, exclude=(BENCHMARK,)) -> pd.DataFrame:
+    """Ostatnie `window` sesji log-cen; spółki bez pełnej historii w oknie są pomijane"""
+    panel = close_panel.drop(columns=[c for c in exclude if c in close_panel.columns])
+    panel = panel.sort_index().ffill().iloc[-window:]
+    panel = panel.loc[:, panel.notna().all() & (panel > 0).all()]
+    return np.log(panel)
+
+
+def pair_block(logp: np.ndarray, lo: int, hi: int, max_t: float) -> np.ndarray:
+    """
+    Statystyki par (y = i z [lo, hi), x = każde j) z trzech macierzy Grama - bez pętli po parach
+
+    Spread s = y - beta x - alpha (OLS z T sesji); statystyki DF reszt (ds_t = g s_{t-1} + e)
+    są kombinacjami kwadratowymi sum L'L, D'L, D'D (L = log-ceny wycentrowane bez ostatniej
+    sesji, D = ich przyrosty), więc blok kosztuje kilka mnożeń macierzy (BLAS).
+    Zwraca tylko pary z ADF t < max_t.
+    """
+    T = len(logp)
+    c = logp - logp.mean(axis=0)
+    L, D = c[:-1], np.diff(c, axis=0)
+    rows = slice(lo, hi)
+
+    S = c[:, rows].T @ c            # sum c_i c_j (poziomy)
+    A = L[:, rows].T @ L            # sum l_i l_j
+    B = D[:, rows].T @ L            # sum d_i l_j
+    B_t = L[:, rows].T @ D          # sum l_i d_j
+    C = D[:, rows].T @ D            # sum d_i d_j
+    s_jj, a_jj = (c * c).sum(axis=0), (L * L).sum(axis=0)
+    b_jj, c_jj = (D * L).sum(axis=0), (D * D).sum(axis=0)
+    i_idx = np.arange(lo, hi)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        beta = S / s_jj
+        lag2 = a_jj[i_idx, None] - 2 * beta * A + beta ** 2 * a_jj                        # sum s_{t-1}^2
+        cross = b_jj[i_idx, None] - beta * (B + B_t) + beta ** 2 * b_jj                   # sum ds_t s_{t-1}
+        diff2 = c_jj[i_idx, None] - 2 * beta * C + beta ** 2 * c_jj                       # sum ds_t^2
+        gamma = cross / lag2
+        ssr = np.maximum(diff2 - gamma * cross, 0.0)
+        t_stat = gamma / np.sqrt(ssr / (T - 2) / lag2)
+        resid_sd = np.sqrt(np.maximum(s_jj[i_idx, None] - beta * S, 0.0) / T)
+        z = (c[-1, rows][:, None] - beta * c[-1]) / resid_sd
+        half_life = np.where(gamma < 0, -np.log(2) / np.log1p(gamma), np.inf)
+        d_mean = D.mean(axis=0)
+        cov_d = C - (T - 1) * np.outer(d_mean[rows], d_mean)
+        var_d = c_jj - (T - 1) * d_mean ** 2
+        corr = cov_d / np.sqrt(np.outer(var_d[rows], var_d))
+
+    t_stat[i_idx - lo, i_idx] = np.nan  # para (i, i)
+    ii, jj = np.nonzero(t_stat < max_t)
+    return np.column_stack([ii + lo, jj, beta[ii, jj], t_stat[ii, jj], half_life[ii, jj],
+                            z[ii, jj], corr[ii, jj]])
+
+
+def _scan_block(shm_name, shape, lo, hi, max_t):
+    """Worker: log-ceny z pamięci współdzielonej, wynik (kandydaci) - mała tablica"""
+    shm = SharedMemory(name=shm_name)
+    try:
+        logp = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        result = pair_block(logp, lo, hi, max_t)
+        del logp
+    finally:
+        shm.close()
+    return result
+
+
+class PairsScanner:
+    """
+    Skaner par / kointegracji (Engle-Granger) dla całego uniwersum
+
+    - wszystkie N(N-1) uporządkowane pary: hedge ratio OLS, z-score bieżącego spreadu,
+      statystyka t testu DF reszt, half-life powrotu do średniej, korelacja zwrotów
+    - liczone blokami wierszy macierzy par (pair_block, mnożenia macierzy); przy workers > 1
+      bloki idą do puli procesów (spawn), log-ceny raz w pamięci współdzielonej
+    - para nieuporządkowana bierze kierunek regresji z niższym ADF t
+    """
+
+    def __init__(self, window: int = 250, workers: int = 1, block: int = 128,
+                 max_t: float = EG_CRITICAL[0.10]):
+        self.window = window
+        self.workers = workers or os.cpu_count() or 1
+        self.block = block
+        self.max_t = max_t
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def scan_array(self, logp: np.ndarray) -> np.ndarray:
+        """Kandydaci [k, len(FIELDS)] ze wszystkich bloków"""
+        n = logp.shape[1]
+        bounds = list(range(0, n, self.block)) + [n]
+        blocks = list(zip(bounds[:-1], bounds[1:]))
+        if self.workers == 1 or len(blocks) == 1:
+            parts = [pair_block(logp, lo, hi, self.max_t) for lo, hi in blocks]
+        else:
+            shm = SharedMemory(create=True, size=max(1, logp.nbytes))
+            try:
+                np.ndarray(logp.shape, dtype=np.float64, buffer=shm.buf)[:] = logp
+                pool = self._get_pool()
+                futures = [pool.submit(_scan_block, shm.name, logp.shape, lo, hi, self.max_t)
+                           for lo, hi in blocks]
+                parts = [future.result() for future in futures]
+            finally:
+                shm.close()
+                shm.unlink()
+        return np.vstack(parts) if parts else np.empty((0, len(FIELDS)))
+
+    def scan(self, close_panel: pd.DataFrame, top: int = 20) -> pd.DataFrame:
+        """
+        Ranking par: najniższy ADF t (najsilniejsza kointegracja), sygnał z |Z| >= ENTRY_Z.
+        Panel krótszy niż `window` sesji = pusty wynik (okno nie jest po cichu skracane).
+        """
+        logp = log_prices(close_panel, self.window)
+        symbols = list(logp.columns)
+        with stage("compute.pairs", symbols=len(symbols), pairs=len(symbols) * (len(symbols) - 1) // 2):
+            if len(logp) < max(30, self.window) or len(symbols) < 2:
+                return pd.DataFrame(columns=["Pair", "Beta", "ADF t", "Half-life", "Z", "Corr", "Signal"])
+            arr = self.scan_array(np.ascontiguousarray(logp.to_numpy(dtype=np.float64)))
+
+        df = pd.DataFrame(arr, columns=FIELDS)
+        df = df.sort_values("ADF t")
+        i, j = df["i"].astype(int), df["j"].astype(int)
+        df = df[~pd.DataFrame({"a": np.minimum(i, j), "b": np.maximum(i, j)}).duplicated().to_numpy()].head(top)
+        y = [symbols[k] for k in df["i"].astype(int)]
+        x = [symbols[k] for k in df["j"].astype(int)]
+        signal = np.where(df["Z"] >= ENTRY_Z, [f"SHORT {a} / LONG {b}" for a, b in zip(y, x)],
+                          np.where(df["Z"] <= -ENTRY_Z, [f"LONG {a} / SHORT {b}" for a, b in zip(y, x)], "-"))
+        return pd.DataFrame({
+            "Pair": [f"{a}/{b}" for a, b in zip(y, x)],
+            "Beta": df["Beta"].to_numpy(),
+            "ADF t": df["ADF t"].to_numpy(),
+            "Half-life": df["Half-life"].to_numpy(),
+            "Z": df["Z"].to_numpy(),
+            "Corr": df["Corr"].to_numpy(),
+            "Signal": signal,
+        })
+
+
+def pair_reference(y: np.ndarray, x: np.ndarray):
+    """Jedna para pętlą (lstsq + DF reszt) - kontrola poprawności pair_block"""
+    design = np.column_stack([x, np.ones_like(x)])
+    (beta, alpha), *_ = np.linalg.lstsq(design, y, rcond=None)
+    s = y - beta * x - alpha
+    lag, ds = s[:-1], np.diff(s)
+    gamma = (ds @ lag) / (lag @ lag)
+    ssr = ((ds - gamma * lag) ** 2).sum()
+    return beta, gamma / np.sqrt(ssr / (len(s) - 2) / (lag @ lag)), s[-1] / s.std()
+
+
+def synthetic_panel(n_symbols: int, periods: int = 250, cointegrated: int = 10, seed: int = 0) -> pd.DataFrame:
+    """Błądzenia losowe + `cointegrated` par z mean-reverting spreadem (AR(1))"""
+    rng = np.random.default_rng(seed)
+    logp = np.cumsum(rng.normal(0, 0.02, (periods, n_symbols)), axis=0) + 4
+    for k in range(min(cointegrated, n_symbols // 2)):
+        spread = np.zeros(periods)
+        for t in range(1, periods):
+            spread[t] = 0.8 * spread[t - 1] + rng.normal(0, 0.01)
+        logp[:, 2 * k + 1] = 0.5 + 1.2 * logp[:, 2 * k] + spread
+    index = pd.bdate_range(end="2025-11-20", periods=periods)
+    return pd.DataFrame(np.exp(logp), index=index, columns=[f"T{i:03d}" for i in range(n_symbols)])
+
+
+def benchmark_pairs(sizes=(50, 200, 500), workers=(1,), window: int = 250, loop_pairs: int = 2000):
+    """Czas skanu vs liczba spółek i workerów; pętla po parach (pair_reference) dla porównania"""
+    print(f"{'SYMBOLS':>8}{'PAIRS':>10}{'WORKERS':>9}{'SECONDS':>10}{'µs/PAIR':>10}{'FOUND':>7}")
+    for n in sizes:
+        panel = synthetic_panel(n, window)
+        for w in workers:
+            scanner = PairsScanner(window=window, workers=w)
+            scanner.scan(panel.iloc[:, :min(n, 2 * scanner.block)])  # rozgrzewka puli (spawn)
+            start = time.perf_counter()
+            result = scanner.scan(panel, top=10**9)
+            elapsed = time.perf_counter() - start
+            scanner.shutdown()
+            pairs = n * (n - 1) // 2
+            found = sum(pair in set(result["Pair"]) for k in range(10) for pair in (f"T{2*k:03d}/T{2*k+1:03d}",
+                                                                                   f"T{2*k+1:03d}/T{2*k:03d}"))
+            print(f"{n:>8}{pairs:>10}{w:>9}{elapsed:>10.3f}{1e6 * elapsed / pairs:>10.2f}{found:>6}/10")
+
+    logp = np.log(synthetic_panel(100, window).to_numpy())
+    pairs = [(i, j) for i in range(100) for j in range(100) if i != j][:loop_pairs]
+    start = time.perf_counter()
+    reference = [pair_reference(logp[:, i], logp[:, j]) for i, j in pairs]
+    loop = (time.perf_counter() - start) / len(pairs)
+    block = pair_block(logp, 0, 100, np.inf)
+    lookup = {(int(r[0]), int(r[1])): r for r in block}
+    error = max(abs(lookup[p][3] - ref[1]) for p, ref in zip(pairs, reference))
+    print(f"pętla po parach: {1e6 * loop:.1f} µs/para (uporządkowaną); max |Δ ADF t| vs pair_block: {error:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark skanera par / kointegracji")
+    parser.add_argument("--symbols", default="50,200,500", help="wielkości uniwersum, np. 50,200,500")
+    parser.add_argument("--workers", default="1", help="lista liczby workerów, np. 1,2,4")
+    parser.add_argument("--window", type=int, default=250, help="okno sesji (log-ceny)")
+    args = parser.parse_args()
+    benchmark_pairs(tuple(int(n) for n in args.symbols.split(",")),
+                    tuple(int(w) for w in args.workers.split(",")), args.window)
@@ -0,0 +1,234 @@
+# santander_bot/strategies/patterns.py
+import argparse
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+import numpy as np
+import pandas as pd
+from santander_bot.core.tracing import stage
+
+MAX_WINDOW = 256  # Najdłuższe okno bez przeliczenia FFT historii (dłuższe - osobny rozmiar FFT)
+
+
+def fft_size(n: int) -> int:
+    return 1 << (n - 1).bit_length()
+
+
+class PatternIndex:
+    """
+    Indeks podobnych formacji: z-normalizowane okna kroczące historii wszystkich tickerów
+
+    - historie sklejone w jeden wektor (każda przeskalowana przez swoją średnią - z-normalizacja
+      okna tego nie widzi, a sumy kroczące zostają dobrze uwarunkowane); okno przecinające
+      granicę tickerów jest maskowane
+    - zapytanie = profil odległości MASS: iloczyny skalarne ze wszystkimi oknami jednym
+      iloczynem widm (rFFT historii liczone raz i trzymane), średnie/odchylenia okien z sum
+      kumulatywnych (raz na długość okna); odległość euklidesowa z-normalizowana
+      d = sqrt(2m (1 - corr))
+    - k najbliższych z wykluczeniem trywialnych dopasowań (±m/2 wokół wybranego okna),
+      tylko okna zakończone przed początkiem okna zapytania; wynik zawiera to, co było dalej
+    - wyniki w LRU per okno zapytania (ticker, koniec, m, k, horyzont)
+    """
+
+    def __init__(self, series: Dict[str, pd.Series], cache_size: int = 256):
+        self.tickers, offsets, values, stamps = [], [0], [], []
+        for ticker, s in series.items():
+            s = s.dropna()
+            s = s[s > 0]
+            if len(s) < 2:
+                continue
+            self.tickers.append(ticker)
+            values.append(s.to_numpy(dtype=np.float64) / float(s.mean()))
+            stamps.append(pd.DatetimeIndex(s.index).asi8)
+            offsets.append(offsets[-1] + len(s))
+        self.offsets = np.array(offsets)
+        self.values = np.concatenate(values) if values else np.empty(0)
+        self.stamps = np.concatenate(stamps) if stamps else np.empty(0, dtype=np.int64)
+        self.owner = np.repeat(np.arange(len(self.tickers)), np.diff(self.offsets))
+        self._col = {t: i for i, t in enumerate(self.tickers)}
+        self._spectra = {}   # rozmiar FFT -> rfft(values)
+        self._stats = {}     # m -> (średnie, odchylenia, maska poprawnych startów)
+        self._cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_panel(cls, close_panel: pd.DataFrame, **kwargs):
+        """Z panelu zamknięć (MarketSnapshot.close_panel) - każda kolumna bez swoich NaN"""
+        return cls({ticker: close_panel[ticker] for ticker in close_panel.columns}, **kwargs)
+
+    def __len__(self):
+        return len(self.values)
+
+    def sessions(self, ticker: str) -> int:
+        """Liczba sesji historii tickera w indeksie"""
+        col = self._col[ticker]
+        return int(self.offsets[col + 1] - self.offsets[col])
+
+    # --- MASS ---
+    def _spectrum(self, m: int):
+        n = fft_size(len(self.values) + max(m, MAX_WINDOW))
+        with self._lock:
+            spectrum = self._spectra.get(n)
+        if spectrum is None:
+            spectrum = np.fft.rfft(self.values, n)
+            with self._lock:
+                self._spectra[n] = spectrum
+        return n, spectrum
+
+    def window_stats(self, m: int):
+        """Średnia i odchylenie każdego okna długości m + maska okien w obrębie jednego tickera"""
+        with self._lock:
+            stats = self._stats.get(m)
+        if stats is None:
+            csum = np.concatenate([[0.0], np.cumsum(self.values)])
+            csum2 = np.concatenate([[0.0], np.cumsum(self.values ** 2)])
+            mean = (csum[m:] - csum[:-m]) / m
+            std = np.sqrt(np.maximum((csum2[m:] - csum2[:-m]) / m - mean ** 2, 0.0))
+            valid = (self.owner[:len(mean)] == self.owner[m - 1:]) & (std > 1e-8 * np.abs(mean))
+            stats = (mean, std, valid)
+            with self._lock:
+                self._stats[m] = stats
+        return stats
+
+    def distance_profile(self, query: np.ndarray) -> np.ndarray:
+        """Z-normalizowana odległość query od każdego okna historii (inf = okno niepoprawne)"""
+        m = len(query)
+        mean, std, valid = self.window_stats(m)
+        n, spectrum = self._spectrum(m)
+        dots = np.fft.irfft(spectrum * np.fft.rfft(query[::-1], n), n)[m - 1:len(self.values)]
+        q_mean, q_std = query.mean(), query.std()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = (dots - m * q_mean * mean) / (m * q_std * std)
+        distance = np.sqrt(2 * m * (1 - np.clip(corr, -1.0, 1.0)))
+        distance[~valid] = np.inf
+        return distance
+
+    # --- Zapytania ---
+    def locate(self, ticker: str, end=None) -> int:
+        """Pozycja (w wektorze indeksu) ostatniej sesji <= end dla tickera; end=None - ostatnia"""
+        col = self._col[ticker]
+        lo, hi = self.offsets[col], self.offsets[col + 1]
+        if end is None:
+            return hi - 1
+        pos = lo + np.searchsorted(self.stamps[lo:hi], pd.Timestamp(end).value, side="right") - 1
+        if pos < lo:
+            raise ValueError(f"{ticker}: brak historii przed {end}")
+        return int(pos)
+
+    def query(self, ticker: str, end=None, m: int = 40, k: int = 10, horizon: int = 10) -> pd.DataFrame:
+        """k najbliższych okien dla okna tickera kończącego się w `end` (domyślnie ostatnia sesja)"""
+        end_pos = self.locate(ticker, end)
+        key = (ticker, end_pos, m, k, horizon)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        start_pos = end_pos - m + 1
+        if start_pos < self.offsets[self._col[ticker]]:
+            raise ValueError(f"{ticker}: historia krótsza niż okno {m}")
+        with stage("compute.patterns", windows=len(self.values), m=m):
+            distance = self.distance_profile(self.values[start_pos:end_pos + 1])
+            # Tylko to, co wydarzyło się wcześniej: okno zakończone przed początkiem zapytania
+            ends = self.stamps[m - 1:]
+            distance[ends >= self.stamps[start_pos]] = np.inf
+            result = self._top_k(distance, m, k, horizon)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _top_k(self, distance: np.ndarray, m: int, k: int, horizon: int) -> pd.DataFrame:
+        distance = distance.copy()
+        rows, zone = [], max(1, m // 2)
+        for _ in range(k):
+            pos = int(np.argmin(distance))
+            if not np.isfinite(distance[pos]):
+                break
+            col = self.owner[pos]
+            end = pos + m - 1
+            ahead = end + horizon
+            forward = (self.values[ahead] / self.values[end] - 1) * 100 \
+                if ahead < self.offsets[col + 1] else np.nan
+            rows.append((self.tickers[col], pos, self.stamps[pos], self.stamps[end], distance[pos], forward))
+            lo = max(pos - zone, self.offsets[col])
+            distance[lo:min(pos + zone + 1, len(distance))] = np.inf
+        df = pd.DataFrame(rows, columns=["Ticker", "Pos", "Start", "End", "Distance", f"Next {horizon} %"])
+        df["Start"] = pd.to_datetime(df["Start"])
+        df["End"] = pd.to_datetime(df["End"])
+        return df
+
+    def path(self, pos: int, m: int, horizon: int = 0) -> np.ndarray:
+        """Okno od `pos` (+ `horizon` sesji dalej, o ile są) z-normalizowane statystykami samego okna"""
+        col = self.owner[pos]
+        window = self.values[pos:pos + m]
+        tail = self.values[pos:min(pos + m + horizon, self.offsets[col + 1])]
+        return (tail - window.mean()) / window.std()
+
+    def cache_info(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache),
+                "windows": len(self.values), "tickers": len(self.tickers)}
+
+
+def brute_force_profile(index: PatternIndex, query: np.ndarray) -> np.ndarray:
+    """Ta sama odległość wprost: z-normalizacja każdego okna (sliding_window_view) - kontrola MASS"""
+    m = len(query)
+    windows = np.lib.stride_tricks.sliding_window_view(index.values, m)
+    z = (windows - windows.mean(axis=1, keepdims=True)) / windows.std(axis=1, keepdims=True)
+    q = (query - query.mean()) / query.std()
+    distance = np.sqrt(((z - q) ** 2).sum(axis=1))
+    distance[~index.window_stats(m)[2]] = np.inf
+    return distance
+
+
+def benchmark_patterns(tickers: int = 400, periods: int = 2500, m: int = 40, queries: int = 20):
+    """Budowa indeksu, pierwsze / kolejne / powtórzone zapytanie vs odległość liczona wprost"""
+    from santander_bot.strategies.sharded import synthetic_history
+
+    series = {f"T{i:03d}": synthetic_history(f"T{i:03d}", periods=periods)["Close"] for i in range(tickers)}
+    start = time.perf_counter()
+    index = PatternIndex(series)
+    build = time.perf_counter() - start
+
+    names = list(series)
+    start = time.perf_counter()
+    index.query(names[0], m=m)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(1, queries + 1):
+        index.query(names[i % tickers], end=series[names[0]].index[-1 - 7 * i], m=m)
+    warm = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    index.query(names[0], m=m)
+    cached = time.perf_counter() - start
+
+    query = index.values[index.locate(names[0]) - m + 1:index.locate(names[0]) + 1]
+    start = time.perf_counter()
+    reference = brute_force_profile(index, query)
+    brute = time.perf_counter() - start
+    mass = index.distance_profile(query)
+    finite = np.isfinite(reference)
+    error = np.max(np.abs(mass[finite] - reference[finite]))
+
+    print(f"{tickers} tickerów x {periods} sesji = {len(index):,} okien (m={m})")
+    print(f"budowa {build * 1000:.0f} ms | pierwsze zapytanie (rFFT historii) {first * 1000:.0f} ms | "
+          f"kolejne {warm * 1000:.1f} ms | z cache {cached * 1e6:.0f} µs")
+    print(f"wprost (sliding window) {brute * 1000:.0f} ms | max |Δ odległości| MASS vs wprost {error:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark indeksu podobnych formacji (MASS)")
+    parser.add_argument("--tickers", type=int, default=400)
+    parser.add_argument("--periods", type=int, default=2500, help="sesje historii na ticker")
+    parser.add_argument("--window", type=int, default=40, help="długość okna zapytania (sesje)")
+    args = parser.parse_args()
+    benchmark_patterns(args.tickers, args.periods, args.window)
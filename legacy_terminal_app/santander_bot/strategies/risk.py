@@ -0,0 +1,257 @@
+# santander_bot/strategies/risk.py
+import argparse
+import functools
+import threading
+import time
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from santander_bot.core.tracing import stage
+
+BENCHMARK = "WIG20"
+TRADING_DAYS = 252
+
+
+@functools.lru_cache(maxsize=None)
+def _blas_dger():
+    """BLAS dger (scipy, opcjonalnie) - ładowany przy pierwszej aktualizacji, nie przy imporcie"""
+    try:
+        from scipy.linalg.blas import dger
+        return dger
+    except ImportError:
+        return None
+
+
+def _rank1_update(a: np.ndarray, alpha: float, x: np.ndarray) -> np.ndarray:
+    """a += alpha * x x^T w miejscu (a w kolejności Fortran dla BLAS)"""
+    dger = _blas_dger()
+    if dger is not None:
+        return dger(alpha, x, x, a=a, overwrite_a=1)
+    a += alpha * np.outer(x, x)
+    return a
+
+
+class RollingRisk:
+    """
+    Krocząca kowariancja / korelacja / beta względem WIG20 dla całego uniwersum
+
+    Trzyma ostatnie `window` wektorów zwrotów w buforze pierścieniowym oraz sumy
+    S1 = sum(r) i S2 = sum(r r^T). Nowa świeca to aktualizacja rzędu 2 (dodaj nowy,
+    odejmij najstarszy wektor): O(N^2) zamiast O(window * N^2) przeliczenia od zera.
+    Co `rebuild_every` aktualizacji sumy są odtwarzane z bufora (dryf numeryczny).
+    Brak notowania spółki w danej sesji = zwrot 0.
+
+    - ostatnia świeca może się jeszcze zmieniać (dzienna świeca bieżącej sesji odbudowywana
+      ze świec 5m): wiersz z tym samym znacznikiem co last_ts zastępuje ostatni wektor zwrotów
+    - bez notowań indeksu benchmarkiem jest równoważony koszyk: jego zwrot to średnia zwrotów
+      spółek w danej sesji (bez sklejania poziomów liczonych od różnych baz)
+    """
+
+    def __init__(self, window: int = 60, benchmark: str = BENCHMARK, rebuild_every: int = None):
+        self.window = window
+        self.benchmark = benchmark
+        self.rebuild_every = rebuild_every or window
+        self.symbols: List[str] = []
+        self.last_ts = None
+        self.updates = 0
+        self._proxy = False  # Benchmark liczony z koszyka (brak kolumny indeksu w panelu)
+        self._lock = threading.RLock()  # sync() trzyma lock przez seed/update_prices
+        self._reset([])
+
+    def _reset(self, symbols):
+        n = len(symbols)
+        self.symbols = list(symbols)
+        self._col = {s: i for i, s in enumerate(self.symbols)}
+        self._buffer = np.zeros((self.window, n))
+        self._pos = 0
+        self._count = 0
+        self._s1 = np.zeros(n)
+        self._s2 = np.zeros((n, n), order="F")
+        self._last_close = np.full(n, np.nan)
+        self._prev_close = np.full(n, np.nan)  # Zamknięcia sprzed ostatniej świecy (poprawka ostatniej)
+        self._since_rebuild = 0
+        self.last_ts = None
+
+    def _columns(self, close_panel: pd.DataFrame) -> List[str]:
+        """Kolumny panelu + benchmark (proxy z koszyka, gdy panel nie ma indeksu)"""
+        columns = list(close_panel.columns)
+        return columns if self.benchmark in columns else columns + [self.benchmark]
+
+    def _returns(self, price: np.ndarray, prev: np.ndarray) -> np.ndarray:
+        """Zwroty sesji; benchmark-proxy = średnia zwrotów notowanych spółek"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = price / prev - 1
+        if self._proxy:
+            b = self._col[self.benchmark]
+            others = np.delete(r, b, axis=-1)
+            quoted = np.isfinite(others)
+            with np.errstate(invalid="ignore"):
+                r[..., b] = np.where(quoted, others, 0.0).sum(axis=-1) / np.maximum(quoted.sum(axis=-1), 1)
+        return np.nan_to_num(r, nan=0.0, posinf=0.0, neginf=0.0)
+
+    # --- Zasilanie ---
+    def seed(self, close_panel: pd.DataFrame):
+        """Inicjalizacja z historii: ostatnie `window` zwrotów, sumy jednym mnożeniem macierzy"""
+        with self._lock:
+            panel = close_panel.sort_index()
+            columns = self._columns(panel)
+            self._proxy = self.benchmark not in panel.columns
+            self._reset(columns)
+            closes = panel.reindex(columns=columns).to_numpy(dtype=np.float64)
+            known = pd.DataFrame(closes).ffill().to_numpy()  # Jak update_prices: zwrot od ostatniego zamknięcia
+            returns = self._returns(closes[1:], known[:-1])[-self.window:]
+            self._buffer[:len(returns)] = returns
+            self._count = len(returns)
+            self._pos = self._count % self.window
+            self._rebuild()
+            if len(panel):
+                self._last_close = known[-1]
+                self._prev_close = known[-2] if len(panel) > 1 else np.full(len(columns), np.nan)
+            self.last_ts = panel.index[-1] if len(panel) else None
+
+    def push_returns(self, returns: np.ndarray):
+        """Jeden wektor zwrotów (kolejność self.symbols) - aktualizacja rzędu 2"""
+        x = np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+        if self._count == self.window:
+            old = self._buffer[self._pos].copy()
+            self._s1 -= old
+            self._s2 = _rank1_update(self._s2, -1.0, old)
+        else:
+            self._count += 1
+        self._buffer[self._pos] = x
+        self._s1 += x
+        self._s2 = _rank1_update(self._s2, 1.0, x)
+        self._pos = (self._pos + 1) % self.window
+        self.updates += 1
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.rebuild_every:
+            self._rebuild()
+
+    def _price_vector(self, closes: Dict[str, float]) -> np.ndarray:
+        price = np.full(len(self.symbols), np.nan)
+        for sym, value in closes.items():
+            if sym in self._col and not (self._proxy and sym == self.benchmark):
+                price[self._col[sym]] = value
+        return price
+
+    def update_prices(self, closes: Dict[str, float], ts=None):
+        """Nowa świeca: {symbol: zamknięcie}; symbole spoza uniwersum są pomijane"""
+        with self._lock:
+            price = self._price_vector(closes)
+            self.push_returns(self._returns(price, self._last_close))
+            self._prev_close = self._last_close
+            self._last_close = np.where(np.isnan(price), self._last_close, price)
+            self.last_ts = ts if ts is not None else self.last_ts
+
+    def revise_prices(self, closes: Dict[str, float]):
+        """Poprawione zamknięcia ostatniej świecy: ostatni wektor zwrotów zastąpiony (downdate + update)"""
+        with self._lock:
+            price = self._price_vector(closes)
+            new_close = np.where(np.isnan(price), self._prev_close, price)
+            if np.array_equal(new_close, self._last_close, equal_nan=True):
+                return
+            self._last_close = new_close
+            if self._count == 0:  # Jedyna świeca seeda - nie ma jeszcze zwrotu do poprawienia
+                return
+            last = (self._pos - 1) % self.window
+            old, x = self._buffer[last].copy(), self._returns(price, self._prev_close)
+            self._s1 += x - old
+            self._s2 = _rank1_update(self._s2, -1.0, old)
+            self._s2 = _rank1_update(self._s2, 1.0, x)
+            self._buffer[last] = x
+            self.updates += 1
+            self._since_rebuild += 1
+            if self._since_rebuild >= self.rebuild_every:
+                self._rebuild()
+
+    def sync(self, close_panel: pd.DataFrame) -> int:
+        """
+        Dogrywa świece nowsze niż last_ts (np. z kolejnego snapshotu dashboardu); świeca
+        z samym last_ts to poprawka ostatniej. Zmiana składu uniwersum albo brak stanu =
+        seed od zera. Zwraca liczbę nowych świec.
+        """
+        panel = close_panel.sort_index()
+        with self._lock:  # Kilka sesji dashboardu nie dogra tej samej świecy dwa razy
+            if self.last_ts is None or self._columns(panel) != self.symbols \
+                    or self._proxy != (self.benchmark not in panel.columns):
+                self.seed(panel)
+                return len(panel)
+            if self.last_ts in panel.index:
+                self.revise_prices(panel.loc[self.last_ts].dropna().to_dict())
+            fresh = panel[panel.index > self.last_ts]
+            for ts, row in fresh.iterrows():
+                self.update_prices(row.dropna().to_dict(), ts)
+            return len(fresh)
+
+    def _rebuild(self):
+        rows = self._buffer[:self._count]
+        self._s1 = rows.sum(axis=0)
+        self._s2 = np.asfortranarray(rows.T @ rows)
+        self._since_rebuild = 0
+
+    # --- Odczyt ---
+    def covariance(self) -> np.ndarray:
+        n = self._count
+        if n < 2:
+            return np.full_like(self._s2, np.nan)
+        return (self._s2 - np.outer(self._s1, self._s1) / n) / (n - 1)
+
+    def correlation(self) -> pd.DataFrame:
+        with self._lock:
+            cov = self.covariance()
+        sd = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(sd, sd)
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.symbols, columns=self.symbols)
+
+    def table(self) -> pd.DataFrame:
+        """Per spółka: beta i korelacja z benchmarkiem + zmienność roczna"""
+        with stage("compute.risk", symbols=len(self.symbols)):
+            with self._lock:
+                cov = self.covariance()
+            b = self.symbols.index(self.benchmark)
+            var = np.diag(cov)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                beta = cov[:, b] / var[b]
+                corr = cov[:, b] / np.sqrt(var * var[b])
+            df = pd.DataFrame({
+                "Ticker": self.symbols,
+                "Beta": beta,
+                f"Corr {self.benchmark}": corr,
+                "Vol %": np.sqrt(var * TRADING_DAYS) * 100,
+            })
+        return df[df["Ticker"] != self.benchmark].sort_values("Beta", ascending=False).reset_index(drop=True)
+
+
+def benchmark_updates(n_symbols: int = 500, window: int = 60, bars: int = 200):
+    """Koszt jednej świecy: aktualizacja przyrostowa vs pełne przeliczenie kowariancji okna"""
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range(end="2025-11-20", periods=window + 1)
+    panel = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (window + 1, n_symbols)), axis=0)),
+                         index=index, columns=[f"T{i:03d}" for i in range(n_symbols)])
+    risk = RollingRisk(window=window, rebuild_every=10**9)
+    risk.seed(panel)
+    _blas_dger()  # Import scipy poza pomiarem
+
+    returns = rng.normal(0, 0.01, (bars, len(risk.symbols)))
+    start = time.perf_counter()
+    for r in returns:
+        risk.push_returns(r)
+    incremental = (time.perf_counter() - start) / bars
+
+    start = time.perf_counter()
+    for _ in range(20):
+        np.cov(risk._buffer, rowvar=False)
+    full = (time.perf_counter() - start) / 20
+
+    drift = np.nanmax(np.abs(risk.covariance() - np.cov(risk._buffer, rowvar=False)))
+    print(f"{len(risk.symbols)} symboli, okno {window}: przyrostowo {incremental * 1000:.2f} ms/świeca, "
+          f"od zera {full * 1000:.2f} ms, dryf {drift:.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark przyrostowej kowariancji (RollingRisk)")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--window", type=int, default=60)
+    args = parser.parse_args()
+    benchmark_updates(args.symbols, args.window)
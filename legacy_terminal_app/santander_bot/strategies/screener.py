@@ -1,8 +1,8 @@
 # santander_bot/strategies/screener.py
 import pandas as pd
-import yfinance as yf
 from typing import List, Dict
 import numpy as np
+from santander_bot.core.tracing import stage
 
 # WIG20 + mWIG40 Top Liquid (hardcoded dla szybkości)
 WIG20_TICKERS = [
@@ -24,34 +24,55 @@ class ScreenerEngine:
     
     def get_stock_data(self, ticker: str, period: str = "3mo") -> pd.DataFrame:
         """Pobierz dane OHLCV dla tickera"""
+        from santander_bot.core.gateway import gateway_from_env  # Leniwie - gateway tylko gdy ustawiony
+
+        gateway = gateway_from_env()
+        if gateway is not None:
+            try:
+                return gateway.history([ticker], period=period).get(ticker, pd.DataFrame())
+            except OSError:
+                pass  # Gateway niedostępny - pobranie bezpośrednie
+
+        from santander_bot.core.resample import BAR_STORE  # Leniwie - start terminala nie czeka na yfinance
+
         try:
-            stock = yf.Ticker(f"{ticker}.WA")
-            df = stock.history(period=period)
-            
-            if df.empty:
-                return pd.DataFrame()
-            
-            # Fix MultiIndex if needed
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.droplevel(1)
-            
-            return df
+            return BAR_STORE.get(f"{ticker}.WA", period=period, interval="1d")
         except Exception as e:
             return pd.DataFrame()
+
+    def get_stock_batch(self, tickers: List[str], period: str = "3mo") -> Dict[str, pd.DataFrame]:
+        """Dane OHLCV wielu tickerów jednym zapytaniem (gateway albo jeden batch BAR_STORE)"""
+        from santander_bot.core.gateway import gateway_from_env
+
+        gateway = gateway_from_env()
+        if gateway is not None:
+            try:
+                return gateway.history(list(tickers), period=period)
+            except OSError:
+                pass  # Gateway niedostępny - pobranie bezpośrednie
+
+        from santander_bot.core.resample import BAR_STORE
+
+        try:
+            frames = BAR_STORE.history([f"{t}.WA" for t in tickers], period=period, interval="1d")
+        except Exception:
+            return {}
+        return {t: frames[f"{t}.WA"] for t in tickers if f"{t}.WA" in frames}
     
     def calculate_smas(self, df: pd.DataFrame) -> Dict[str, float]:
         """Oblicz SMA 5/10/15/20"""
         if df.empty or len(df) < 20:
             return {}
         
-        close = df['Close']
-        return {
-            'SMA5': close.rolling(5).mean().iloc[-1],
-            'SMA10': close.rolling(10).mean().iloc[-1],
-            'SMA15': close.rolling(15).mean().iloc[-1],
-            'SMA20': close.rolling(20).mean().iloc[-1],
-            'Price': close.iloc[-1]
-        }
+        with stage("compute.indicators", source="screener"):
+            close = df['Close']
+            return {
+                'SMA5': close.rolling(5).mean().iloc[-1],
+                'SMA10': close.rolling(10).mean().iloc[-1],
+                'SMA15': close.rolling(15).mean().iloc[-1],
+                'SMA20': close.rolling(20).mean().iloc[-1],
+                'Price': close.iloc[-1]
+            }
     
     def check_fan_formation(self, smas: Dict[str, float]) -> bool:
         """Sprawdź Fan Formation: SMA5 > SMA10 > SMA15 > SMA20"""
@@ -63,9 +84,12 @@ class ScreenerEngine:
     
     def get_pe_ratio(self, ticker: str) -> float:
         """Pobierz C/Z (P/E ratio)"""
+        import yfinance as yf
+
         try:
-            stock = yf.Ticker(f"{ticker}.WA")
-            info = stock.info
+            with stage("fetch.yfinance.info", symbol=ticker):
+                stock = yf.Ticker(f"{ticker}.WA")
+                info = stock.info
             
             # yfinance może zwrócić różne klucze
             pe = info.get('trailingPE') or info.get('forwardPE') or None
@@ -128,10 +152,11 @@ class ScreenerEngine:
             tickers = WIG20_TICKERS
         
         results = []
+        frames = self.get_stock_batch(tickers)  # Jeden batch zamiast pobrania per ticker
         
         for ticker in tickers:
             # 1. Pobierz dane
-            df = self.get_stock_data(ticker)
+            df = frames.get(ticker, pd.DataFrame())
             if df.empty:
                 continue
             
@@ -0,0 +1,238 @@
+# santander_bot/strategies/sharded.py
+import argparse
+import multiprocessing
+import os
+import time
+import zlib
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import List
+import numpy as np
+import pandas as pd
+from santander_bot.strategies.screener import ScreenerEngine
+from santander_bot.strategies.universe import load_universe
+
+# Kolumny tablicy wyników w pamięci współdzielonej (float64, NaN = brak)
+FIELDS = ("Price", "SMA5", "SMA10", "SMA15", "SMA20", "PE", "Strength", "Fan", "Valid")
+COL = {name: i for i, name in enumerate(FIELDS)}
+
+
+def _screen_shard(shm_name, shape, rows, tickers, require_fan, with_pe, fetch):
+    """
+    Worker: pobiera i liczy swój shard, pisze wiersze wprost do pamięci współdzielonej
+
+    Bez `fetch` dane całego sharda przychodzą jednym batchem (BAR_STORE workera jest
+    pusty po spawn - pobranie per ticker to osobne zapytanie dla każdego).
+    """
+    shm = SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        engine = ScreenerEngine()
+        frames = {} if fetch else engine.get_stock_batch(tickers)
+        for row, ticker in zip(rows, tickers):
+            df = fetch(ticker) if fetch else frames.get(ticker, pd.DataFrame())
+            smas = engine.calculate_smas(df)
+            if not smas:
+                continue
+
+            has_fan = engine.check_fan_formation(smas)
+            pe = None
+            if with_pe and (has_fan or not require_fan):
+                pe = engine.get_pe_ratio(ticker)
+
+            out[row, COL["Price"]] = smas['Price']
+            out[row, COL["SMA5"]] = smas['SMA5']
+            out[row, COL["SMA10"]] = smas['SMA10']
+            out[row, COL["SMA15"]] = smas['SMA15']
+            out[row, COL["SMA20"]] = smas['SMA20']
+            out[row, COL["PE"]] = pe if pe is not None else np.nan
+            out[row, COL["Strength"]] = engine.calculate_strength_score(smas)
+            out[row, COL["Fan"]] = float(has_fan)
+            out[row, COL["Valid"]] = 1.0
+        del out
+    finally:
+        shm.close()
+    return len(rows)
+
+
+def synthetic_history(ticker: str, periods: int = 750) -> pd.DataFrame:
+    """Deterministyczna historia OHLCV (benchmark bez sieci; crc32 - stabilny między procesami)"""
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, periods)))
+    index = pd.bdate_range(end="2025-11-20", periods=periods)
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.003, periods)),
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Close": close,
+        "Volume": rng.integers(1_000, 100_000, periods),
+    }, index=index)
+
+
+class ShardedScreener:
+    """
+    Screener całego rynku: tickery dzielone na shardy w puli procesów
+
+    Każdy worker pisze swoje wiersze do wspólnej tablicy (multiprocessing.shared_memory),
+    więc wyniki nie są serializowane z powrotem - rodzic składa DataFrame raz na końcu.
+    """
+
+    def __init__(self, workers: int = None, shards_per_worker: int = 4, fetch=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.shards_per_worker = shards_per_worker
+        self.fetch = fetch  # funkcja modułowa ticker -> DataFrame (musi być picklowalna)
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: fork przy działających wątkach danych/UI mógłby skopiować zajęte locki
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def screen_array(self, tickers: List[str], require_fan: bool = True, with_pe: bool = True) -> np.ndarray:
+        """Surowa macierz [len(tickers), len(FIELDS)] z wynikami wszystkich shardów"""
+        shape = (len(tickers), len(FIELDS))
+        shm = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        try:
+            out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            out[:] = np.nan
+            out[:, COL["Valid"]] = 0.0
+
+            n_shards = min(len(tickers), self.workers * self.shards_per_worker) or 1
+            bounds = np.linspace(0, len(tickers), n_shards + 1).astype(int)
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_screen_shard, shm.name, shape, list(range(lo, hi)),
+                            tickers[lo:hi], require_fan, with_pe, self.fetch)
+                for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+            ]
+            for future in futures:
+                future.result()
+            result = out.copy()
+            del out
+            return result
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def run_screener(self,
+                     tickers: List[str] = None,
+                     max_pe: float = 12.0,
+                     require_fan: bool = True,
+                     with_pe: bool = True) -> pd.DataFrame:
+        """Ten sam wynik co ScreenerEngine.run_screener, ale dla całego uniwersum naraz"""
+        if tickers is None:
+            tickers = load_universe()
+
+        arr = self.screen_array(tickers, require_fan=require_fan, with_pe=with_pe)
+
+        valid = arr[:, COL["Valid"]] == 1.0
+        fan = arr[:, COL["Fan"]] == 1.0
+        pe = arr[:, COL["PE"]]
+        keep = valid & (fan | (not require_fan)) & ~(pe > max_pe)
+
+        idx = np.flatnonzero(keep)
+        if len(idx) == 0:
+            return pd.DataFrame()
+
+        strength = arr[idx, COL["Strength"]]
+        df_results = pd.DataFrame({
+            'Ticker': [tickers[i] for i in idx],
+            'Price': np.round(arr[idx, COL["Price"]], 2),
+            'SMA5': np.round(arr[idx, COL["SMA5"]], 2),
+            'SMA10': np.round(arr[idx, COL["SMA10"]], 2),
+            'SMA15': np.round(arr[idx, COL["SMA15"]], 2),
+            'SMA20': np.round(arr[idx, COL["SMA20"]], 2),
+            'P/E': [p if not np.isnan(p) else 'N/A' for p in pe[idx]],
+            'Strength': np.round(strength, 1),
+            'Signal': np.where(fan[idx] & (strength > 50), '🔥 BUY', '✓ OK'),
+        })
+        return df_results.sort_values('Strength', ascending=False).reset_index(drop=True)
+
+
+def benchmark_scaling(n_tickers: int = 400, worker_counts=(1, 2, 4, 8), periods: int = 750):
+    """Krzywa skalowania: czas screeningu syntetycznego uniwersum vs liczba workerów"""
+    tickers = [f"T{i:03d}" for i in range(n_tickers)]
+    rows = []
+    for workers in worker_counts:
+        screener = ShardedScreener(workers=workers, fetch=partial(synthetic_history, periods=periods))
+        screener.screen_array(tickers[:workers], with_pe=False)  # rozgrzewka puli (spawn)
+        start = time.perf_counter()
+        screener.screen_array(tickers, require_fan=False, with_pe=False)
+        elapsed = time.perf_counter() - start
+        screener.shutdown()
+        rows.append((workers, elapsed))
+
+    base = rows[0][1]
+    print(f"{'WORKERS':>8}{'SECONDS':>10}{'SPEEDUP':>10}{'EFFICIENCY':>12}")
+    for workers, elapsed in rows:
+        speedup = base / elapsed
+        print(f"{workers:>8}{elapsed:>10.2f}{speedup:>10.2f}{speedup / workers * rows[0][0]:>11.0%}")
+    return rows
+
+
+def _get_per_ticker(ticker):
+    """Pobranie per ticker (zachowanie sprzed batcha na shard) - do porównania w benchmarku"""
+    return ScreenerEngine().get_stock_data(ticker)
+
+
+def benchmark_baseline(n_tickers: int = 40, workers: int = 2):
+    """
+    Sharded vs bazowy ScreenerEngine.run_screener na nagraniach (bez sieci, bez C/Z)
+
+    Workery dziedziczą $SANTANDER_YF_FIXTURES, więc ich BAR_STORE czyta te same pliki.
+    """
+    import tempfile
+    from santander_bot.core.replay import YF_FIXTURES_ENV, write_synthetic_fixtures
+    from santander_bot.core.resample import _fixture_download
+
+    tickers = [f"T{i:03d}" for i in range(n_tickers)]
+    path = write_synthetic_fixtures(tempfile.mkdtemp(prefix="screener-fixtures-"), [f"{t}.WA" for t in tickers])
+    os.environ[YF_FIXTURES_ENV] = path
+
+    engine = ScreenerEngine()
+    engine.get_pe_ratio = lambda ticker: None
+    start = time.perf_counter()
+    expected = engine.run_screener(tickers, max_pe=np.inf, require_fan=False)
+    rows = [("baseline", time.perf_counter() - start, _fixture_download(path).calls)]
+
+    for name, fetch in (("per-ticker", _get_per_ticker), ("batched", None)):
+        screener = ShardedScreener(workers=workers, fetch=fetch)
+        screener.screen_array(["WARMUP"] * workers, with_pe=False)  # rozgrzewka puli (spawn), bez danych
+        start = time.perf_counter()
+        result = screener.run_screener(tickers, max_pe=np.inf, require_fan=False, with_pe=False)
+        elapsed = time.perf_counter() - start
+        screener.shutdown()
+        assert sorted(result['Ticker']) == sorted(expected['Ticker'])
+        n_shards = min(n_tickers, workers * screener.shards_per_worker)
+        # Pobrania w workerach liczone, nie mierzone: jedno dzienne na ticker albo na shard (patrz tests/test_sharded.py)
+        rows.append((name, elapsed, n_tickers if fetch else n_shards))
+
+    print(f"{'MODE':>12}{'SECONDS':>10}{'DOWNLOADS':>11}")
+    for name, elapsed, calls in rows:
+        print(f"{name:>12}{elapsed:>10.2f}{calls:>11}")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark skalowania ShardedScreener")
+    parser.add_argument("--tickers", type=int, default=400)
+    parser.add_argument("--workers", default="1,2,4,8", help="lista liczby workerów, np. 1,2,4,8")
+    parser.add_argument("--periods", type=int, default=750, help="długość syntetycznej historii (sesje)")
+    parser.add_argument("--baseline", action="store_true",
+                        help="porównanie z ScreenerEngine.run_screener na nagraniach (pierwsza liczba z --workers)")
+    args = parser.parse_args()
+    workers = tuple(int(w) for w in args.workers.split(","))
+    if args.baseline:
+        benchmark_baseline(args.tickers, workers[0])
+    else:
+        benchmark_scaling(args.tickers, workers, args.periods)
@@ -3,6 +3,7 @@ import pandas as pd
 import pandas as pd
 # import pandas_ta as ta  # Opcjonalnie, ale zrobimy manualnie dla lekkości
 from santander_bot.config import RSI_PERIOD, SMA_FAST, SMA_SLOW
+from santander_bot.core.tracing import stage
 
 class TechnicalAnalyzer:
     @staticmethod
@@ -10,22 +11,23 @@ class TechnicalAnalyzer:
         if df.empty or len(df) < SMA_SLOW:
             return df
         
-        # SMA
-        df['SMA_FAST'] = df['Close'].rolling(window=SMA_FAST).mean()
-        df['SMA_SLOW'] = df['Close'].rolling(window=SMA_SLOW).mean()
-        
-        # RSI (Manual calculation to avoid heavy deps if needed, but pandas is fine)
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=RSI_PERIOD).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_PERIOD).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        
-        # MACD
-        exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = exp1 - exp2
-        df['SIGNAL'] = df['MACD'].ewm(span=9, adjust=False).mean()
+        with stage("compute.indicators", source="technical"):
+            # SMA
+            df['SMA_FAST'] = df['Close'].rolling(window=SMA_FAST).mean()
+            df['SMA_SLOW'] = df['Close'].rolling(window=SMA_SLOW).mean()
+        
+            # RSI (Manual calculation to avoid heavy deps if needed, but pandas is fine)
+            delta = df['Close'].diff()
+            gain = (delta.where(delta > 0, 0)).rolling(window=RSI_PERIOD).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_PERIOD).mean()
+            rs = gain / loss
+            df['RSI'] = 100 - (100 / (1 + rs))
+        
+            # MACD
+            exp1 = df['Close'].ewm(span=12, adjust=False).mean()
+            exp2 = df['Close'].ewm(span=26, adjust=False).mean()
+            df['MACD'] = exp1 - exp2
+            df['SIGNAL'] = df['MACD'].ewm(span=9, adjust=False).mean()
         
         return df
 
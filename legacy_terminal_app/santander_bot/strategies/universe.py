@@ -0,0 +1,42 @@
+# santander_bot/strategies/universe.py
+import os
+from typing import List
+import pandas as pd
+from santander_bot.strategies.screener import ALL_TICKERS
+
+# Plik z pełnym rynkiem głównym GPW (CSV z kolumną Ticker albo jeden ticker w linii)
+UNIVERSE_ENV = "GPW_UNIVERSE_FILE"
+
+
+def normalize_ticker(ticker: str) -> str:
+    """'cdr.wa' / 'CDR.PL' / ' CDR ' -> 'CDR'"""
+    ticker = ticker.strip().upper()
+    for suffix in (".WA", ".PL"):
+        if ticker.endswith(suffix):
+            ticker = ticker[:-len(suffix)]
+    return ticker
+
+
+def load_universe(path: str = None) -> List[str]:
+    """
+    Ładuje uniwersum tickerów do screenera
+
+    Kolejność: argument `path` -> $GPW_UNIVERSE_FILE -> WIG20 + mWIG40 (ALL_TICKERS).
+    Duplikaty są usuwane z zachowaniem kolejności.
+    """
+    path = path or os.getenv(UNIVERSE_ENV)
+    if not path:
+        return list(ALL_TICKERS)
+
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path)
+        column = next((c for c in df.columns if c.lower() in ("ticker", "symbol", "skrot")), df.columns[0])
+        raw = df[column].dropna().astype(str).tolist()
+    else:
+        with open(path) as f:
+            raw = [line for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+    seen = {}
+    for ticker in raw:
+        seen.setdefault(normalize_ticker(ticker), None)
+    return list(seen)
@@ -0,0 +1,26 @@
+# santander_bot/ui/alerts_panel.py
+from rich.table import Table
+from rich.panel import Panel
+from rich.align import Align
+
+class AlertsPanel:
+    @staticmethod
+    def create_table(alerts, title: str = "🔔 ALERTS") -> Panel:
+        """Ostatnie alerty (najnowszy na górze)"""
+        
+        if not alerts:
+            return Panel(Align.center("[dim]Brak alertów[/]"), title=title, border_style="grey50")
+        
+        table = Table(show_header=True, header_style="bold magenta", border_style="cyan", expand=True)
+        table.add_column("Time", style="dim", width=8)
+        table.add_column("Ticker", style="bold cyan", width=6)
+        table.add_column("Rule", style="white")
+        table.add_column("Value", justify="right", width=8)
+        
+        for alert in alerts:
+            # Kolor wg kierunku przecięcia
+            color = "green" if alert.rule.op == ">" else "red"
+            when = alert.ts.strftime("%H:%M:%S") if hasattr(alert.ts, "strftime") else ""
+            table.add_row(when, alert.symbol, f"[{color}]{alert.rule.text}[/]", f"{alert.value:.2f}")
+        
+        return Panel(table, title=title, border_style="gold1")
@@ -6,12 +6,17 @@ from rich.align import Align
 from rich.table import Table
 from datetime import datetime
 from santander_bot.strategies.technical import TechnicalAnalyzer
+from santander_bot.core.tracing import stage
 
 class TerminalUI:
     def __init__(self, data_manager):
         self.dm = data_manager
 
     def draw_chart(self, sym):
+        with stage("render.chart", symbol=sym):
+            return self._draw_chart(sym)
+
+    def _draw_chart(self, sym):
         df = self.dm.get_data(sym)
         
         if df.empty or len(df) < 20:
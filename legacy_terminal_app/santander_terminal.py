@@ -15,6 +15,20 @@ from rich.console import Console
 from rich.align import Align
 from datetime import datetime
 
+try:
+    from santander_bot.core.gpw_calendar import CALENDAR  # Offline kalendarz sesji GPW (święta, skrócone sesje)
+except ImportError:
+    class _AlwaysInSession:
+        """Bez pakietu santander_bot: sesja zawsze trwa - odpytywanie co cykl, jak przed kalendarzem"""
+
+        def is_open(self, now=None):
+            return True
+
+        def needs_refresh(self, last, now=None):
+            return True
+
+    CALENDAR = _AlwaysInSession()
+
 console = Console()
 
 # === SPÓŁKI DO ŚLEDZENIA ===
@@ -23,6 +37,7 @@ SYMBOLS = ["CDR", "LPP", "XTB", "PKN", "PEO", "DNP"]  # dodaj ile chcesz
 # Magazyn danych
 data_store = {sym: pd.DataFrame() for sym in SYMBOLS}
 lock = threading.Lock()
+memory = None  # MemoryMonitor przy --memory / SANTANDER_MEMORY=1
 
 # === 1. STOOQ – najszybsze ceny podczas sesji ===
 def get_stooq_price(ticker):
@@ -56,11 +71,17 @@ def get_yfinance_data(ticker):
 
 # === WĄTEK POBIERAJĄCY DANE CO 5 SEKUND ===
 def data_updater():
+    polled = {}
     while True:
         for sym in SYMBOLS:
+            # Poza sesją: jedno pobranie po zamknięciu (albo zimny start), potem zero zapytań
+            if not data_store[sym].empty and not CALENDAR.needs_refresh(polled.get(sym)):
+                continue
+            polled[sym] = time.time()
+
             # Najpierw próbujemy Stooq (najświeższe)
             stooq = get_stooq_price(sym)
-            if stooq and "2025-11-20" in stooq["time"] or datetime.now().hour >= 9 and datetime.now().hour < 17:
+            if stooq and (datetime.now().strftime("%Y-%m-%d") in str(stooq["time"]) or CALENDAR.is_open()):
                 # Sesja trwa lub dziś – używamy Stooq
                 new_row = pd.DataFrame([{
                     "Open": stooq["open"],
@@ -121,7 +142,7 @@ def draw_chart(sym):
 def make_layout():
     layout = Layout()
     layout.split_column(
-        Layout(Panel(Align.center(f"[bold gold1]SANTANDER TERMINAL 2025 – TRUE LIVE (Stooq + yfinance)[/]\n{datetime.now().strftime('%H:%M:%S')}"), style="white on black"), size=3),
+        Layout(Panel(Align.center(f"[bold gold1]SANTANDER TERMINAL 2025 – TRUE LIVE (Stooq + yfinance)[/]\n{datetime.now().strftime('%H:%M:%S')}{'  [dim]' + memory.summary() + '[/]' if memory else ''}"), style="white on black"), size=3),
         Layout(name="row", ratio=1)
     )
     
@@ -139,6 +160,13 @@ def make_layout():
 
 # === URUCHOMIENIE ===
 if __name__ == "__main__":
+    try:
+        from santander_bot.core.memory import frame_bytes, memory_requested, start_memory_monitor
+        if memory_requested():
+            memory = start_memory_monitor().track("data", lambda: sum(frame_bytes(df) for df in list(data_store.values())))
+    except ImportError:
+        pass  # Monitor pamięci tylko obok pakietu santander_bot
+
     # Start wątku danych
     threading.Thread(target=data_updater, daemon=True).start()
     
@@ -151,4 +179,7 @@ if __name__ == "__main__":
                 live.update(make_layout())
                 time.sleep(1)
     except KeyboardInterrupt:
+        if memory:
+            memory.stop()
+            console.print(memory.report())
         console.print("\n[red]Zamykam terminal. Do zobaczenia na zielonej stronie! 🚀[/]")
@@ -0,0 +1,308 @@
+# market_data.py - Pipeline danych dashboardu (pobranie + wskaźniki + AI Oracle)
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Pakiet santander_bot (telemetria, snapshoty) leży w legacy_terminal_app/
+_LEGACY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "legacy_terminal_app")
+if _LEGACY_DIR not in sys.path:
+    sys.path.insert(0, _LEGACY_DIR)
+
+from santander_bot.core.snapshot import SnapshotStore
+from santander_bot.core.tracing import stage
+from santander_bot.core.gateway import gateway_from_env
+from santander_bot.core.gpw_calendar import CALENDAR
+from santander_bot.core.watchlists import WatchlistRegistry
+from santander_bot.strategies.risk import BENCHMARK
+from ai_oracle import (MultiHorizonOracleEngine, OnlineOracleEngine, ORACLE_HORIZONS,
+                       ORACLE_ONLINE, tuned_tickers)
+
+# Wiek snapshotu, po którym startuje odświeżenie w tle (krótszy niż kadencja fragmentów dashboardu)
+MARKET_TTL = 25
+
+# Ostatni dobry snapshot na dysku - nowy proces startuje od razu z danymi
+SNAPSHOT_PATH = os.getenv(
+    "SANTANDER_SNAPSHOT_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "santander", "market_snapshot.pkl")
+)
+
+# Kolumny historii trzymane per ticker jako tablice float32 (wiersz = kolumna)
+HISTORY_COLUMNS = ("Open", "High", "Low", "Close", "Volume", "SMA5", "SMA10", "SMA15", "SMA20", "RSI")
+
+
+class MarketSnapshot:
+    """
+    Kolumnowy wynik pipeline'u
+
+    - `table`: płaska tabela skalarów screenera (bez zagnieżdżonych DataFrame'ów)
+    - historie: per ticker indeks int64 (ns) + tablica float32 [len(HISTORY_COLUMNS), n],
+      zamieniana w DataFrame dopiero dla wybranego tickera (history())
+    """
+
+    def __init__(self, table, indexes=None, histories=None, benchmark=None, requested=None):
+        self.table = table
+        self._indexes = indexes or {}
+        self._histories = histories or {}
+        self.benchmark = benchmark  # (indeks ns, Close float32) WIG20 albo None
+        self.requested = set(requested or ())  # Tickery, dla których liczono (także nieudane)
+
+    @property
+    def empty(self):
+        return self.table.empty
+
+    @property
+    def tickers(self):
+        return list(self._histories)
+
+    def add_history(self, ticker, df):
+        self._indexes[ticker] = df.index.asi8.copy()
+        self._histories[ticker] = np.ascontiguousarray(
+            df[list(HISTORY_COLUMNS)].to_numpy(dtype=np.float32).T
+        )
+
+    def history(self, ticker):
+        """OHLCV + wskaźniki jednego tickera jako DataFrame (float32)"""
+        if ticker not in self._histories:
+            return pd.DataFrame(columns=list(HISTORY_COLUMNS))
+        arrays = self._histories[ticker]
+        return pd.DataFrame(
+            {col: arrays[i] for i, col in enumerate(HISTORY_COLUMNS)},
+            index=pd.DatetimeIndex(self._indexes[ticker])
+        )
+
+    def subset(self, tickers):
+        """Widok na część tickerów (watchlista sesji): tablice historii współdzielone, bez kopii"""
+        keep = [t for t in tickers if t in self._histories]
+        table = self.table[self.table["Ticker"].isin(keep)].reset_index(drop=True) if not self.table.empty else self.table
+        return MarketSnapshot(table, {t: self._indexes[t] for t in keep},
+                              {t: self._histories[t] for t in keep}, self.benchmark, keep)
+
+    def set_benchmark(self, df):
+        self.benchmark = (df.index.asi8.copy(), df['Close'].to_numpy(dtype=np.float32))
+
+    def close_panel(self):
+        """Zamknięcia wszystkich tickerów (+ kolumna BENCHMARK) wyrównane po datach"""
+        close = HISTORY_COLUMNS.index("Close")
+        series = {
+            ticker: pd.Series(arrays[close], index=pd.DatetimeIndex(self._indexes[ticker]))
+            for ticker, arrays in self._histories.items()
+        }
+        benchmark = getattr(self, "benchmark", None)  # Snapshoty sprzed benchmarku
+        if benchmark is not None:
+            series[BENCHMARK] = pd.Series(benchmark[1], index=pd.DatetimeIndex(benchmark[0]))
+        return pd.DataFrame(series).astype(np.float64).sort_index()
+
+    @property
+    def nbytes(self):
+        """Przybliżony rozmiar w pamięci (tabela + historie)"""
+        return int(self.table.memory_usage(deep=True).sum()) + sum(
+            a.nbytes for a in self._histories.values()
+        ) + sum(i.nbytes for i in self._indexes.values())
+
+
+# --- LISTA SPÓŁEK (WIG20 + mWIG40 Selection) ---
+TICKERS = [
+    "XTB.WA", "CDR.WA", "LPP.WA", "DNP.WA", "PCO.WA", "BFT.WA", "CCC.WA",
+    "PKO.WA", "PEO.WA", "KGH.WA", "ALE.WA", "KRU.WA", "JSW.WA", "CPS.WA",
+    "MBK.WA", "ALR.WA", "BDX.WA", "TEN.WA"
+]
+BENCHMARK_TICKER = f"{BENCHMARK}.WA"  # Indeks WIG20 - punkt odniesienia dla bety (panel ryzyka)
+
+HISTORY_PERIOD = "5y"  # Długa historia dzienna (close_history): okno par, indeks podobnych formacji
+
+# Watchlisty sesji dashboardu; pipeline liczy raz sumę aktywnych list (TICKERS zawsze)
+WATCHLISTS = WatchlistRegistry(base=TICKERS)
+
+# --- SILNIK DANYCH ---
+def download_histories(symbols=None, period="3mo", interval="1d"):
+    """
+    ticker -> OHLCV dla `symbols` (domyślnie TICKERS + WIG20): przez lokalny gateway ($SANTANDER_GATEWAY -
+    jedno pobranie na symbol niezależnie od liczby procesów dashboardu) albo z BAR_STORE (core/resample.py)
+    """
+    symbols = TICKERS + [BENCHMARK_TICKER] if symbols is None else symbols
+    gateway = gateway_from_env()
+    if gateway is not None:
+        try:
+            frames = gateway.history([t.replace(".WA", "") for t in symbols], period=period, interval=interval)
+            return {f"{name}.WA": df for name, df in frames.items()}
+        except OSError:
+            pass  # Gateway niedostępny - pobranie bezpośrednie
+
+    from santander_bot.core.resample import BAR_STORE  # yfinance ładowany przy pierwszym pobraniu
+
+    # Jeden magazyn świec 5m dla widoków dziennych/śróddziennych - odświeżenie dociąga tylko nowe świece
+    return BAR_STORE.history(symbols, period=period, interval=interval)
+
+
+def close_history(symbols, period=HISTORY_PERIOD):
+    """
+    Zamknięcia dzienne `symbols` + WIG20 za `period` (kolumny jak MarketData.close_panel) - dla
+    analiz potrzebujących dłuższej historii niż 3-miesięczny snapshot (pary, podobne formacje)
+    """
+    frames = download_histories(list(symbols) + [BENCHMARK_TICKER], period=period, interval="1d")
+    series = {
+        BENCHMARK if ticker == BENCHMARK_TICKER else ticker: df["Close"]
+        for ticker, df in frames.items() if df is not None and not df.empty
+    }
+    return pd.DataFrame(series).astype(np.float64).sort_index()
+
+
+_online_oracle = None
+
+
+def batch_oracle(ticker=None):
+    """Model wsadowy: wielohoryzontowy (ORACLE_HORIZONS + horyzont z configu, wspólna macierz cech)"""
+    return MultiHorizonOracleEngine(ticker=ticker)
+
+
+def online_oracle():
+    """Wspólny model online procesu - przeżywa kolejne snapshoty i dokłada tylko nowe wiersze"""
+    global _online_oracle
+    if _online_oracle is None:
+        _online_oracle = OnlineOracleEngine()
+    return _online_oracle
+
+
+def compute_market_data(tickers=None, base=None):
+    """
+    Pełny pipeline: pobranie -> wskaźniki -> wachlarz -> AI Oracle (wolne, ~sekundy)
+
+    `tickers`: nazwy bez .WA (domyślnie TICKERS); `base`: aktualny MarketSnapshot, do którego
+    doklejane są tylko wyniki `tickers` (nowe tickery z watchlist) - bez ponownego liczenia reszty
+    """
+    names = [t.replace(".WA", "") for t in (TICKERS if tickers is None else tickers)]
+    if base is not None and not names:
+        return base
+    data_list = []
+    if base is None:
+        snapshot = MarketSnapshot(pd.DataFrame(), requested=names)
+    else:
+        snapshot = MarketSnapshot(base.table, dict(base._indexes), dict(base._histories), base.benchmark,
+                                  set(getattr(base, "requested", base.tickers)) | set(names))
+    
+    # Initialize AI Oracle (wspólny model + osobne dla spółek strojonych per ticker, oracle_tuning.py)
+    oracle = online_oracle() if ORACLE_ONLINE else batch_oracle()
+    tuned = tuned_tickers()
+    ticker_oracles = {}
+    
+    # Pobieranie (gateway albo batch)
+    symbols = [f"{name}.WA" for name in names]
+    try:
+        histories = download_histories(symbols if base is not None else symbols + [BENCHMARK_TICKER])
+    except Exception:
+        return snapshot  # Przy doklejaniu: base + `requested` (bez ponawiania przy każdym get())
+
+    benchmark = histories.get(BENCHMARK_TICKER)
+    if benchmark is not None and not benchmark.dropna(how="all").empty:
+        if isinstance(benchmark.columns, pd.MultiIndex):
+            benchmark.columns = benchmark.columns.droplevel(0)
+        snapshot.set_benchmark(benchmark.dropna(how="all"))
+
+    for ticker in symbols:
+        try:
+            df = histories[ticker].copy()
+            if df.empty: continue
+            
+            # Usuwanie MultiIndex jeśli jest
+            if isinstance(df.columns, pd.MultiIndex):
+                df.columns = df.columns.droplevel(0)
+            
+            # Obliczenia wskaźników
+            with stage("compute.indicators", symbol=ticker):
+                df['SMA5'] = df['Close'].rolling(5).mean()
+                df['SMA10'] = df['Close'].rolling(10).mean()
+                df['SMA15'] = df['Close'].rolling(15).mean()
+                df['SMA20'] = df['Close'].rolling(20).mean()
+            
+                # RSI
+                delta = df['Close'].diff()
+                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
+                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+                rs = gain / loss
+                df['RSI'] = 100 - (100 / (1 + rs))
+            
+            last_row = df.iloc[-1]
+            prev_row = df.iloc[-2]
+            
+            # --- LOGIKA SCREENERA (WACHLARZ) ---
+            score = 0
+            price = last_row['Close']
+            s5, s10, s15, s20 = last_row['SMA5'], last_row['SMA10'], last_row['SMA15'], last_row['SMA20']
+            
+            if price > s5: score += 1
+            if s5 > s10: score += 2
+            if s10 > s15: score += 2
+            if s15 > s20: score += 2
+            
+            signal = "NEUTRAL"
+            if score >= 7: signal = "STRONG BUY 🚀"
+            elif score >= 4: signal = "BUY"
+            elif price < s20: signal = "SELL"
+
+            change_pct = ((price - prev_row['Close']) / prev_row['Close']) * 100
+            
+            # 🧠 AI ORACLE PREDICTION
+            name = ticker.replace(".WA", "")
+            if name in tuned:
+                if name not in ticker_oracles:
+                    ticker_oracles[name] = batch_oracle(ticker=name)
+                ai_pred = ticker_oracles[name].predict(df)
+            else:
+                if ORACLE_ONLINE:
+                    oracle.update(name, df)
+                ai_pred = oracle.predict(df)
+
+            snapshot.add_history(name, df)
+
+            data_list.append({
+                "Ticker": name,
+                "Price": round(price, 2),
+                "Change %": round(change_pct, 2),
+                "RSI": round(last_row['RSI'], 1),
+                "Signal": signal,
+                "Score": score,
+                "Volume": last_row['Volume'],
+                "AI_Prediction": ai_pred['prediction'],
+                "AI_Confidence": ai_pred['confidence'],
+                "AI_Prob_Up": ai_pred['probability_up'],
+                "AI_Prob_Down": ai_pred['probability_down'],
+                # P(wzrost) per horyzont (NaN dla modelu online / jednohoryzontowego)
+                **{f"AI_Up_{h}d": ai_pred.get('horizons', {}).get(h, np.nan) for h in ORACLE_HORIZONS}
+            })
+            
+        except Exception as e:
+            continue
+            
+    table = pd.DataFrame(data_list)
+    if base is not None:
+        table = pd.concat([base.table, table], ignore_index=True) if data_list else base.table
+    snapshot.table = table
+    return snapshot
+
+
+def create_market_store(watchlists=WATCHLISTS):
+    """
+    SnapshotStore z semantyką stale-while-revalidate nad compute_market_data() dla sumy watchlist;
+    poza sesją GPW snapshot policzony po ostatnim zamknięciu jest aktualny (bez pobrań, wskaźników
+    i treningu). Ticker spoza snapshotu (nowa watchlista) = odświeżenie od razu, ale gdy reszta
+    danych jest aktualna, liczone są tylko brakujące tickery i doklejane do snapshotu.
+    """
+    def requested(value):
+        return getattr(value, "requested", None) or value.tickers  # Snapshoty sprzed watchlist
+
+    def load():
+        current = store.peek()
+        if current is not None and not store.expired(current):
+            return compute_market_data(watchlists.missing(requested(current.value)), base=current.value)
+        return compute_market_data(watchlists.union())
+
+    store = SnapshotStore(
+        load,
+        ttl=MARKET_TTL,
+        path=SNAPSHOT_PATH,
+        is_valid=lambda snapshot: isinstance(snapshot, MarketSnapshot) and not snapshot.empty,
+        schedule=CALENDAR.needs_refresh,
+        is_current=lambda snapshot: not watchlists.missing(requested(snapshot))
+    )
+    return store
@@ -0,0 +1,261 @@
+# oracle_tuning.py - Strojenie AI Oracle: successive halving w puli procesów
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Pakiet santander_bot (uniwersum, gateway, dane syntetyczne) leży w legacy_terminal_app/
+_LEGACY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "legacy_terminal_app")
+if _LEGACY_DIR not in sys.path:
+    sys.path.insert(0, _LEGACY_DIR)
+
+from ai_oracle import AIOracleEngine, DEFAULT_CONFIG, FEATURE_KEYS, FEATURE_CACHE, ORACLE_CONFIG_PATH
+
+# Przestrzeń przeszukiwania (horyzont celu jest stały w obrębie strojenia - inny cel = inne zadanie)
+MODEL_SPACE = {
+    'n_estimators': [50, 100, 200, 400],
+    'max_depth': [4, 6, 10, 16, None],
+    'min_samples_leaf': [1, 5, 20, 50],
+    'max_features': ['sqrt', 0.5, 1.0],
+}
+FEATURE_SPACE = {
+    'sma_fast': [3, 5, 8],
+    'sma_mid': [10, 15],
+    'sma_slow': [20, 30, 50],
+    'rsi_window': [7, 14, 21],
+    'momentum_short': [3, 5],
+    'momentum_long': [10, 20],
+    'volatility_window': [10, 20],
+    'volume_window': [10, 20],
+}
+
+VALID_FRACTION = 0.3   # ostatnie 30% wierszy każdej spółki = walidacja (walk-forward)
+MIN_ROWS = 60
+
+
+def sample_configs(n_configs, feature_variants, horizon, seed=42):
+    """
+    Losowe konfiguracje; okna cech losowane z małej puli `feature_variants`,
+    więc wiele triali dzieli te same macierze cech (FEATURE_CACHE w workerach)
+    """
+    rng = random.Random(seed)
+    variants = [{k: rng.choice(v) for k, v in FEATURE_SPACE.items()} for _ in range(feature_variants)]
+    variants[0] = {k: DEFAULT_CONFIG[k] for k in FEATURE_SPACE}  # Obecna konfiguracja zawsze w grze
+    configs = []
+    for i in range(n_configs):
+        model = {k: rng.choice(v) for k, v in MODEL_SPACE.items()}
+        configs.append({**model, **variants[i % len(variants)], 'horizon': horizon})
+    return configs
+
+
+def split_features(engine, df):
+    """(X_train, y_train, X_valid, y_valid) jednej spółki; przerwa `horizon` chroni przed przeciekiem celu"""
+    X, y = engine.create_features(df)
+    if X is None or len(X) < MIN_ROWS:
+        return None
+    horizon = engine.config['horizon']
+    split = int(len(X) * (1 - VALID_FRACTION))
+    end = len(X) - horizon  # Ostatnie `horizon` wierszy nie ma jeszcze znanego celu
+    return X.iloc[:split - horizon], y.iloc[:split - horizon], X.iloc[split:end], y.iloc[split:end]
+
+
+def evaluate(config, histories, budget):
+    """
+    Balanced accuracy na walidacji dla konfiguracji; `budget` (0..1] = część
+    najnowszych wierszy treningowych każdej spółki (zasób successive halving)
+    """
+    from sklearn.metrics import balanced_accuracy_score
+
+    engine = AIOracleEngine(config=config, n_jobs=1)
+    parts = [p for p in (split_features(engine, df) for df in histories) if p is not None]
+    if not parts:
+        return 0.0
+
+    X_train = pd.concat([p[0].iloc[-max(30, int(len(p[0]) * budget)):] for p in parts])
+    y_train = pd.concat([p[1].iloc[-max(30, int(len(p[1]) * budget)):] for p in parts])
+    X_valid = pd.concat([p[2] for p in parts])
+    y_valid = pd.concat([p[3] for p in parts])
+    if y_train.nunique() < 2 or X_valid.empty:
+        return 0.0
+
+    engine.fit(X_train, y_train)
+    predicted = engine.model.predict(engine.scaler.transform(X_valid))
+    return float(balanced_accuracy_score(y_valid, predicted))
+
+
+# --- Worker puli: historie ładowane raz na proces, macierze cech w FEATURE_CACHE procesu ---
+_HISTORIES = {}
+
+
+def _init_worker(histories):
+    global _HISTORIES
+    _HISTORIES = histories
+
+
+def _run_trial(trial):
+    tickers, config, budget = trial
+    before = FEATURE_CACHE.info()
+    score = evaluate(config, [_HISTORIES[t] for t in tickers], budget)
+    after = FEATURE_CACHE.info()
+    return score, after['hits'] - before['hits'], after['misses'] - before['misses']
+
+
+def _feature_order(trial):
+    return tuple(str(trial[1][k]) for k in FEATURE_KEYS), trial[2]
+
+
+class SuccessiveHalving:
+    """
+    Successive halving nad grupami (jedna grupa = model wspólny albo jedna spółka)
+
+    Rung r: każda grupa ocenia swoich ocalałych przy budżecie min_budget * eta^r,
+    do kolejnego rungu przechodzi najlepsze 1/eta. Triale wszystkich grup z jednego
+    rungu idą do puli razem, więc workery są zajęte także przy strojeniu per spółka.
+    """
+
+    def __init__(self, histories, workers=None, eta=3, min_budget=1 / 9):
+        self.histories = histories
+        self.workers = workers or os.cpu_count() or 1
+        self.eta = eta
+        self.min_budget = min_budget
+        self.rungs = int(round(math.log(1 / min_budget, eta))) + 1
+        self.trials = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def run(self, groups, configs):
+        """groups: {nazwa: [tickery]} -> {nazwa: (najlepszy config, score)}"""
+        survivors = {name: list(configs) for name in groups}
+        scores = {}
+        # spawn: jak ShardedScreener - bez kopiowania locków wątków rodzica
+        with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(self.histories,)) as pool:
+            for rung in range(self.rungs):
+                budget = min(1.0, self.min_budget * self.eta ** rung)
+                trials = [(name, groups[name], config, budget)
+                          for name, candidates in survivors.items() for config in candidates]
+                # Triale z tymi samymi oknami cech obok siebie -> ten sam worker, trafienia w cache
+                trials.sort(key=lambda t: _feature_order(t[1:]))
+                chunksize = max(1, len(trials) // (self.workers * 4))
+                results = pool.map(_run_trial, [t[1:] for t in trials], chunksize=chunksize)
+
+                scores = {name: [] for name in survivors}
+                for (name, _, config, _), (score, hits, misses) in zip(trials, results):
+                    scores[name].append((score, config))
+                    self.cache_hits += hits
+                    self.cache_misses += misses
+                self.trials += len(trials)
+
+                keep = max(1, len(next(iter(survivors.values()))) // self.eta)
+                for name in survivors:
+                    ranked = sorted(scores[name], key=lambda item: item[0], reverse=True)
+                    survivors[name] = [config for _, config in ranked[:keep]]
+                print(f"rung {rung}: budget {budget:.2f}, {len(trials)} triali, "
+                      f"best {np.mean([max(s for s, _ in v) for v in scores.values()]):.3f} (średnio po grupach)")
+
+        return {name: max(scores[name], key=lambda item: item[0])[::-1] for name in groups}
+
+
+def load_histories(tickers, period="2y"):
+    """ticker -> dzienne OHLCV (gateway z $SANTANDER_GATEWAY albo jeden batch yfinance)"""
+    from santander_bot.core.gateway import gateway_from_env
+
+    gateway = gateway_from_env()
+    if gateway is not None:
+        try:
+            return {t: df for t, df in gateway.history(tickers, period=period).items() if len(df) >= MIN_ROWS}
+        except OSError:
+            pass
+
+    import yfinance as yf
+
+    bulk = yf.download(" ".join(f"{t}.WA" for t in tickers), period=period, interval="1d",
+                       group_by='ticker', progress=False)
+    available = set(bulk.columns.get_level_values(0))
+    histories = {}
+    for t in tickers:
+        if f"{t}.WA" in available:
+            df = bulk[f"{t}.WA"].dropna(how="all")
+            if len(df) >= MIN_ROWS:
+                histories[t] = df
+    return histories
+
+
+def write_config(results, per_ticker, path=ORACLE_CONFIG_PATH, search=None):
+    """Zapisuje zwycięskie konfiguracje (zachowuje drugą sekcję z poprzedniego strojenia)"""
+    try:
+        with open(path) as f:
+            tuned = json.load(f)
+    except (OSError, ValueError):
+        tuned = {}
+
+    entries = {name: {**config, 'score': round(score, 4)} for name, (config, score) in results.items()}
+    if per_ticker:
+        tuned['tickers'] = entries
+    else:
+        tuned['pooled'] = entries['pooled']
+    tuned['generated_at'] = datetime.now().isoformat(timespec="seconds")
+    tuned['search'] = search or {}
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(tuned, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def tune(tickers, per_ticker=False, n_configs=27, feature_variants=6, horizon=DEFAULT_CONFIG['horizon'],
+         eta=3, workers=None, synthetic=False, path=ORACLE_CONFIG_PATH, seed=42):
+    start = time.perf_counter()
+    if synthetic:
+        from santander_bot.strategies.sharded import synthetic_history
+        histories = {t: synthetic_history(t, periods=500) for t in tickers}
+    else:
+        histories = load_histories(tickers)
+    print(f"Historie: {len(histories)}/{len(tickers)} spółek ({time.perf_counter() - start:.1f}s)")
+
+    groups = {t: [t] for t in histories} if per_ticker else {'pooled': list(histories)}
+    configs = sample_configs(n_configs, feature_variants, horizon, seed=seed)
+    search = SuccessiveHalving(histories, workers=workers, eta=eta)
+    results = search.run(groups, configs)
+
+    elapsed = time.perf_counter() - start
+    lookups = search.cache_hits + search.cache_misses
+    print(f"{search.trials} triali w {elapsed:.1f}s na {search.workers} workerach; "
+          f"feature cache hit rate {search.cache_hits / lookups if lookups else 0:.0%}")
+
+    baseline = {'n_configs': n_configs, 'eta': eta, 'rungs': search.rungs, 'trials': search.trials,
+                'seconds': round(elapsed, 1), 'tickers': len(histories)}
+    out = write_config(results, per_ticker, path=path, search=baseline)
+    for name, (config, score) in sorted(results.items())[:10]:
+        print(f"  {name:<8} {score:.3f}  " + ", ".join(f"{k}={config[k]}" for k in DEFAULT_CONFIG))
+    print(f"Zapisano: {out}")
+    return results
+
+
+if __name__ == "__main__":
+    from santander_bot.strategies.universe import load_universe
+
+    parser = argparse.ArgumentParser(description="Strojenie AI Oracle (successive halving, pula procesów)")
+    parser.add_argument("--per-ticker", action="store_true", help="osobna konfiguracja dla każdej spółki")
+    parser.add_argument("--tickers", help="lista po przecinku (domyślnie uniwersum: GPW_UNIVERSE_FILE / WIG20+mWIG40)")
+    parser.add_argument("--configs", type=int, default=27, help="liczba konfiguracji w pierwszym rungu")
+    parser.add_argument("--feature-variants", type=int, default=6, help="różne zestawy okien cech")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_CONFIG['horizon'], help="horyzont celu (sesje)")
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--synthetic", action="store_true", help="dane syntetyczne zamiast yfinance (benchmark)")
+    parser.add_argument("--output", default=ORACLE_CONFIG_PATH, help="plik konfiguracji (SANTANDER_ORACLE_CONFIG)")
+    args = parser.parse_args()
+
+    tickers = args.tickers.split(",") if args.tickers else load_universe()
+    tune(tickers, per_ticker=args.per_ticker, n_configs=args.configs, feature_variants=args.feature_variants,
+         horizon=args.horizon, eta=args.eta, workers=args.workers, synthetic=args.synthetic, path=args.output)
@@ -0,0 +1,6 @@
+# tests/conftest.py - pakiet santander_bot leży w legacy_terminal_app/, moduły dashboardu w katalogu głównym
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "legacy_terminal_app"), ROOT]
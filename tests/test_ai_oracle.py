@@ -0,0 +1,19 @@
+# tests/test_ai_oracle.py
+import pytest
+from ai_oracle import DEFAULT_CONFIG, MultiHorizonOracleEngine
+from santander_bot.strategies.sharded import synthetic_history
+
+
+@pytest.mark.parametrize("horizons, expected", [
+    ((3,), (3,)),           # SANTANDER_ORACLE_HORIZONS=3: las jednowyjściowy
+    ((5,), (3, 5)),         # horyzont z configu zawsze dołączany
+    ((1, 3, 5, 10), (1, 3, 5, 10)),
+])
+def test_predict_returns_every_horizon(horizons, expected):
+    engine = MultiHorizonOracleEngine(horizons, config=DEFAULT_CONFIG, n_jobs=1)
+    result = engine.predict(synthetic_history("PKO", periods=300))
+
+    assert 'error' not in result
+    assert tuple(result['horizons']) == expected
+    assert all(0 <= p <= 100 for p in result['horizons'].values())
+    assert result['probability_up'] == result['horizons'][DEFAULT_CONFIG['horizon']]
@@ -0,0 +1,65 @@
+# tests/test_hedging.py
+import time
+import pandas as pd
+from santander_bot.core.hedging import MIN_SAMPLES, Cached, HedgedFetcher
+
+
+def _source(latency, calls=None, cached=False):
+    def fetch(key):
+        if calls is not None:
+            calls.append(key)
+        time.sleep(latency)
+        return Cached(key) if cached else key
+    return fetch
+
+
+def test_fast_primary_settles_and_untried_source_ranks_last():
+    fetcher = HedgedFetcher({"stooq": _source(0.02), "yfinance": _source(0.2)}, timeout=2.0)
+    primaries = []
+    for i in range(3 * MIN_SAMPLES):
+        primaries.append(fetcher.ranking()[0])
+        assert fetcher.fetch(i) == ("stooq", i)
+    assert set(primaries) == {"stooq"}
+    assert fetcher.hedges == 0
+    assert fetcher.stats()["sources"]["yfinance"]["samples"] == 0
+
+
+def test_slow_configured_primary_yields_to_measured_faster_source():
+    fetcher = HedgedFetcher({"slow": _source(0.15), "fast": _source(0.01)}, timeout=2.0, default_delay=0.02)
+    for i in range(2 * MIN_SAMPLES + 2):
+        fetcher.fetch(i)
+    assert fetcher.ranking()[0] == "fast"
+
+
+def test_cached_answers_win_but_are_not_timed():
+    fetcher = HedgedFetcher({"cache": _source(0.0, cached=True), "live": _source(0.01)}, timeout=2.0)
+    for i in range(MIN_SAMPLES):
+        assert fetcher.fetch(i) == ("cache", i)  # Wynik odpakowany z Cached
+    time.sleep(0.05)  # Callbacki statystyk
+    assert fetcher.stats()["sources"]["cache"]["samples"] == 0
+    assert fetcher.ranking()[0] == "cache"  # Nadal kolejność konfiguracji, bez pozornie szybkich próbek
+
+
+def test_replace_history_keeps_newer_live_bars():
+    from santander_bot.core.data import DataManager
+
+    dm = DataManager()
+    history = pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": [1.0, 2.0], "Volume": 10},
+                           index=pd.DatetimeIndex(["2026-10-19 10:00", "2026-10-19 10:05"]).tz_localize("Europe/Warsaw"))
+    dm.replace_history("CDR", history)
+    bar = {"open": 3.0, "high": 3.0, "low": 3.0, "close": 3.0, "volume": 5}
+    dm.append_bar("CDR", bar, pd.Timestamp("2026-10-19 10:20"))
+    dm.replace_history("CDR", history)  # yfinance (opóźnione) wygrało po żywej świecy Stooq
+    assert dm.data_store["CDR"]["Close"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_counters_are_exact_under_concurrent_fetches():
+    from concurrent.futures import ThreadPoolExecutor
+
+    fetcher = HedgedFetcher({"a": _source(0.001), "b": _source(0.001)}, timeout=2.0)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(fetcher.fetch, range(400)))
+    stats = fetcher.stats()
+    assert all(source is not None for source, _ in results)
+    assert stats["calls"] == 400
+    assert sum(s["wins"] for s in stats["sources"].values()) == 400
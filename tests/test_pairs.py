@@ -0,0 +1,10 @@
+# tests/test_pairs.py
+from santander_bot.strategies.pairs import PairsScanner, synthetic_panel
+
+
+def test_scan_uses_full_window_and_rejects_short_panels():
+    panel = synthetic_panel(20, periods=300, cointegrated=3)
+    scanner = PairsScanner(window=250)
+    result = scanner.scan(panel, top=10**9)
+    assert {"T000/T001", "T001/T000"} & set(result["Pair"])
+    assert scanner.scan(panel.iloc[-200:]).empty  # 200 < 250 sesji - bez po cichu skróconego okna
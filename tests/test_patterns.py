@@ -0,0 +1,16 @@
+# tests/test_patterns.py
+import pytest
+from santander_bot.strategies.pairs import synthetic_panel
+from santander_bot.strategies.patterns import PatternIndex
+
+
+@pytest.mark.parametrize("m", [20, 40, 60, 120])
+def test_long_daily_history_supports_every_window(m):
+    index = PatternIndex.from_panel(synthetic_panel(8, periods=1260))  # ~5 lat sesji
+    assert index.sessions("T000") == 1260
+    assert len(index.query("T000", m=m, k=8, horizon=10)) == 8
+
+
+def test_snapshot_length_history_has_no_earlier_window():
+    index = PatternIndex.from_panel(synthetic_panel(8, periods=63))  # ~3 miesiące: dopasowanie przed zapytaniem
+    assert index.query("T000", m=40).empty                            # nie mieści się w historii
@@ -0,0 +1,69 @@
+# tests/test_profiling.py
+import threading
+from santander_bot.core.profiling import SamplingProfiler
+
+
+def test_cycles_are_kept_per_thread(tmp_path):
+    profiler = SamplingProfiler(output_dir=str(tmp_path))
+    a_open, b_done = threading.Event(), threading.Event()
+
+    def session_a():
+        with profiler.cycle():
+            profiler.record_stage("render.a", 0.1, 0.1)
+            a_open.set()
+            b_done.wait(5)  # Cykl B otwiera się i zamyka w trakcie cyklu A
+            profiler.record_stage("render.a", 0.1, 0.1)
+
+    def session_b():
+        a_open.wait(5)
+        with profiler.cycle():
+            profiler.record_stage("render.b", 0.2, 0.2)
+            with profiler.cycle():  # Fragment wywołany w pełnym runie - bez nowego cyklu
+                profiler.record_stage("render.b", 0.2, 0.2)
+        b_done.set()
+
+    profiler.record_stage("fetch.stooq", 0.3, 0.0)  # Wątek bez cyklu - dane w tle
+    threads = [threading.Thread(target=session_a), threading.Thread(target=session_b)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    cycles = [c for c in profiler.cycles if "cycle" in c]
+    assert len(cycles) == 2
+    b, a = cycles  # B zamknięty pierwszy
+    assert set(b) == {"render.b", "cycle"} and b["render.b"][0] == 2
+    assert set(a) == {"render.a", "cycle"} and a["render.a"][0] == 2
+    background = [c for c in profiler.cycles if "cycle" not in c]
+    assert background == [{"fetch.stooq [background]": [1, 0.3, 0.0]}]
+
+
+def test_cycle_of_finished_thread_is_dropped(tmp_path):
+    profiler = SamplingProfiler(output_dir=str(tmp_path))
+    t = threading.Thread(target=profiler.begin_cycle)  # Run przerwany przed end_cycle
+    t.start()
+    t.join()
+    profiler.begin_cycle()
+    profiler.end_cycle()
+    assert len(profiler.cycles) == 1 and len(profiler._open) == 0
+
+
+def test_write_while_sampling_and_stop_joins_the_sampler(tmp_path):
+    stop = threading.Event()
+    workers = [threading.Thread(target=stop.wait, name=f"worker-{i}") for i in range(8)]
+    for t in workers:
+        t.start()
+    profiler = SamplingProfiler(hz=2000, output_dir=str(tmp_path), flush_every=0).start()
+    try:
+        for _ in range(50):
+            profiler.write()  # Równolegle z _sample_loop
+    finally:
+        base = profiler.stop()
+        stop.set()
+        for t in workers:
+            t.join()
+
+    assert not profiler._thread.is_alive()
+    with open(base + ".folded") as f:
+        counts = sum(int(line.rsplit(" ", 1)[1]) for line in f)
+    assert counts == sum(profiler.stacks.values()) > 0
@@ -0,0 +1,27 @@
+# tests/test_replay.py
+import pandas as pd
+from santander_bot.core.replay import ReplaySource, write_synthetic_session
+
+
+class RecordingDM:
+    running = True
+
+    def __init__(self):
+        self.bars = []
+
+    def append_bar(self, sym, bar, ts):
+        self.bars.append((ts, sym, bar["close"]))
+
+
+def test_csv_replay_keeps_each_file_symbol(tmp_path):
+    path = write_synthetic_session(str(tmp_path), ["CDR", "PKO"], freq="30min")
+    expected = {sym: pd.read_csv(tmp_path / f"{sym}.csv")["Close"].tolist() for sym in ("CDR", "PKO")}
+
+    dm = RecordingDM()
+    ReplaySource(path, speed=0).run(dm)
+
+    assert len(dm.bars) == 2 * 16
+    assert [ts for ts, _, _ in dm.bars] == sorted(ts for ts, _, _ in dm.bars)
+    for sym in ("CDR", "PKO"):
+        closes = [close for _, s, close in dm.bars if s == sym]
+        assert closes == expected[sym]
@@ -0,0 +1,74 @@
+# tests/test_resample.py
+import threading
+import numpy as np
+from santander_bot.core.resample import BarStore, resample_bars, synthetic_bars
+
+
+class FakeDownload:
+    def __init__(self, days=20):
+        self.calls = []
+        self.full = {}
+        self.days = days
+        self.gate = {}  # symbol -> Event: pobranie czeka, aż test je zwolni
+
+    def __call__(self, symbols, period, interval):
+        self.calls.append((tuple(symbols), period, interval))
+        for s in symbols:
+            if s in self.gate:
+                self.gate[s].wait(5)
+        bars = {s: self.full.setdefault(s, synthetic_bars(s, self.days)) for s in symbols}
+        return {s: resample_bars(df, "1d") if interval == "1d" else df for s, df in bars.items()}
+
+
+def test_daily_only_symbols_skip_the_5m_base():
+    download = FakeDownload()
+    store = BarStore(download=download, ttl=np.inf)
+    frames = store.history(["AAA.WA", "BBB.WA"], period="3mo", interval="1d")
+
+    assert [c[2] for c in download.calls] == ["1d"]
+    assert len(frames["AAA.WA"]) == 20
+    assert store.info()["base_bars"] == 0
+
+    store.ttl = 0  # Kolejne odświeżenie: tylko końcówka dziennych
+    store.history(["AAA.WA"], period="3mo", interval="1d")
+    assert download.calls[-1] == (("AAA.WA",), "5d", "1d")
+
+
+def test_intraday_view_keeps_the_base_and_daily_matches():
+    download = FakeDownload()
+    store = BarStore(download=download, ttl=np.inf)
+    store.history(["AAA.WA"], period="5d", interval="15m")
+    daily = store.get("AAA.WA", period="3mo", interval="1d")
+
+    assert [c[2] for c in download.calls] == ["5m", "1d"]  # Dzienne tylko sprzed bazy (3mo > 20 sesji)
+    np.testing.assert_allclose(daily["Close"], resample_bars(download.full["AAA.WA"], "1d")["Close"])
+
+
+def test_daily_symbol_gets_the_base_once_an_intraday_view_is_requested():
+    download = FakeDownload()
+    store = BarStore(download=download, ttl=np.inf)
+    store.history(["AAA.WA"], period="3mo", interval="1d")
+    bars = store.history(["AAA.WA"], period="5d", interval="5m")["AAA.WA"]
+
+    assert [c[2] for c in download.calls] == ["1d", "5m"]
+    assert len(bars) == 5 * 96
+    store.history(["AAA.WA"], period="5d", interval="5m")
+    assert len(download.calls) == 2
+
+
+def test_fetch_does_not_block_other_symbols():
+    download = FakeDownload()
+    download.gate["SLOW.WA"] = threading.Event()
+    store = BarStore(download=download, ttl=np.inf)
+    slow = threading.Thread(target=store.history, args=(["SLOW.WA"], "3mo", "1d"))
+    slow.start()
+    try:
+        while not download.calls:
+            pass
+        assert "FAST.WA" in store.history(["FAST.WA"], "3mo", "1d")  # Nie czeka na SLOW.WA
+        assert slow.is_alive()
+    finally:
+        download.gate["SLOW.WA"].set()
+        slow.join()
+    assert "SLOW.WA" in store.history(["SLOW.WA"], "3mo", "1d")
+    assert len(download.calls) == 2
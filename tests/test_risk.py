@@ -0,0 +1,46 @@
+# tests/test_risk.py
+import numpy as np
+import pandas as pd
+import pytest
+from santander_bot.strategies.risk import BENCHMARK, RollingRisk
+
+
+def _panel(rows=90, with_index=True, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2025-11-20", periods=rows)
+    columns = ["PKO.WA", "PZU.WA", "KGH.WA"] + ([BENCHMARK] if with_index else [])
+    panel = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (rows, len(columns))), axis=0)),
+                         index=index, columns=columns)
+    panel.iloc[5, 1] = np.nan  # Brak notowania w jednej sesji
+    return panel
+
+
+@pytest.mark.parametrize("with_index", [True, False])
+def test_sync_applies_revisions_of_the_last_bar(with_index):
+    panel = _panel(with_index=with_index)
+    risk = RollingRisk(window=30, rebuild_every=10**9)
+    risk.seed(panel.iloc[:50])
+    rng = np.random.default_rng(1)
+    for end in range(51, len(panel) + 1):
+        live = panel.iloc[:end].copy()
+        for _ in range(3):  # Świeca bieżącej sesji zmienia się kilka razy przed zamknięciem
+            live.iloc[-1] *= 1 + rng.normal(0, 0.005, live.shape[1])
+            risk.sync(live.iloc[max(0, end - 60):])  # Snapshot dashboardu = przesuwane okno
+        live.iloc[-1] = panel.iloc[end - 1]
+        assert risk.sync(live.iloc[max(0, end - 60):]) == 0
+
+    fresh = RollingRisk(window=30)
+    fresh.seed(panel)
+    assert risk.symbols == fresh.symbols
+    assert np.allclose(risk.covariance(), fresh.covariance())
+    pd.testing.assert_frame_equal(risk.table(), fresh.table())
+
+
+def test_proxy_benchmark_is_mean_of_constituent_returns():
+    panel = _panel(rows=20, with_index=False)
+    risk = RollingRisk(window=30)
+    risk.seed(panel)
+    b = risk.symbols.index(BENCHMARK)
+    returns = panel / panel.ffill().shift() - 1  # Zwrot od ostatniego znanego zamknięcia
+    expected = returns.iloc[1:].mean(axis=1).to_numpy()
+    assert np.allclose(risk._buffer[:risk._count, b], expected)
@@ -0,0 +1,31 @@
+# tests/test_sharded.py
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from santander_bot.core.replay import FixtureDownload, write_synthetic_fixtures
+from santander_bot.core.resample import BAR_STORE
+from santander_bot.strategies.screener import ScreenerEngine
+from santander_bot.strategies.sharded import COL, FIELDS, _screen_shard
+
+
+def test_shard_fetches_one_batch_and_matches_screener(tmp_path, monkeypatch):
+    monkeypatch.delenv("SANTANDER_GATEWAY", raising=False)
+    tickers = ["SHA", "SHB", "SHC", "SHD", "SHE"]
+    download = FixtureDownload(write_synthetic_fixtures(str(tmp_path), [f"{t}.WA" for t in tickers]))
+    monkeypatch.setattr(BAR_STORE, "download", download)
+
+    shape = (len(tickers), len(FIELDS))
+    shm = SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        out[:] = np.nan
+        _screen_shard(shm.name, shape, list(range(len(tickers))), tickers, False, False, None)
+        prices = out[:, COL["Price"]].copy()
+        del out
+    finally:
+        shm.close()
+        shm.unlink()
+
+    assert download.calls == 1  # jeden batch dziennych na shard, bez bazy 5m
+    engine = ScreenerEngine()
+    expected = [engine.calculate_smas(engine.get_stock_data(t))['Price'] for t in tickers]
+    np.testing.assert_allclose(prices, expected)
@@ -0,0 +1,16 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+OPTIONAL = ("santander_bot.core.memory", "santander_bot.core.replay", "santander_bot.core.gateway",
+            "santander_bot.core.alerts", "santander_bot.core.profiling")
+
+
+def test_terminal_import_skips_optional_features():
+    code = "import sys, santander_bot.main; print(' '.join(m for m in %r if m in sys.modules))" % (OPTIONAL,)
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, "legacy_terminal_app"))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert out.stdout.split() == []
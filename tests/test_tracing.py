@@ -0,0 +1,111 @@
+# tests/test_tracing.py
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader, PeriodicExportingMetricReader
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from santander_bot.core import tracing
+from santander_bot.core.tracing import stage, start_metrics_server
+
+
+@pytest.fixture(scope="module")
+def otel():
+    """Globalne providery z eksporterami w pamięci (moduł tracing trzyma proxy z get_tracer/get_meter)"""
+    spans = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(spans))
+    reader = InMemoryMetricReader()
+    trace.set_tracer_provider(provider)
+    metrics.set_meter_provider(MeterProvider(metric_readers=[reader]))
+    if trace.get_tracer_provider() is not provider:
+        pytest.skip("globalny TracerProvider ustawiony wcześniej w tym procesie")
+    return spans, reader
+
+
+def _histogram_points(reader, name):
+    data = reader.get_metrics_data()
+    return [point
+            for resource in data.resource_metrics
+            for scope in resource.scope_metrics
+            for metric in scope.metrics if metric.name == name
+            for point in metric.data.data_points]
+
+
+def test_stage_records_span_and_histogram(otel):
+    spans, reader = otel
+    spans.clear()
+    for _ in range(3):
+        with stage("compute.test", symbol="CDR"):
+            time.sleep(0.001)
+    with pytest.raises(ValueError):
+        with stage("fetch.test", symbol="PKO"):
+            raise ValueError("boom")
+
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    assert finished["compute.test"].attributes["symbol"] == "CDR"
+    assert finished["fetch.test"].attributes["symbol"] == "PKO"
+    assert not finished["fetch.test"].status.is_ok
+
+    points = {(p.attributes["stage"], p.attributes["error"]): p
+              for p in _histogram_points(reader, "santander.stage.duration")}
+    assert points[("compute.test", False)].count == 3
+    assert points[("compute.test", False)].sum >= 0.003
+    assert points[("fetch.test", True)].count == 1
+
+
+def test_metrics_endpoint_exposes_stage_series(otel):
+    with stage("render.test"):
+        pass
+    server = start_metrics_server(port=0, host="127.0.0.1")
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as resp:
+        body = resp.read().decode()
+
+    assert resp.status == 200
+    assert 'santander_stage_duration_seconds_bucket{stage="render.test",le="+Inf"}' in body
+    assert 'santander_stage_duration_seconds_count{stage="render.test"}' in body
+    assert 'santander_stage_errors_total{stage="render.test"} 0' in body
+
+
+def test_otlp_http_exporters_reach_collector(monkeypatch):
+    received = {}
+
+    class Collector(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            received[self.path] = received.get(self.path, 0) + 1
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-protobuf")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    collector = ThreadingHTTPServer(("127.0.0.1", 0), Collector)
+    threading.Thread(target=collector.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_PROTOCOL", "http/protobuf")
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_ENDPOINT", f"http://127.0.0.1:{collector.server_port}")
+    try:
+        span_exporter, metric_exporter = tracing._otlp_exporters()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+        meter_provider = MeterProvider(metric_readers=[PeriodicExportingMetricReader(metric_exporter)])
+
+        with provider.get_tracer("test").start_as_current_span("fetch.otlp"):
+            pass
+        meter_provider.get_meter("test").create_histogram("santander.stage.duration").record(0.01)
+        meter_provider.force_flush()
+        provider.shutdown()
+        meter_provider.shutdown()
+    finally:
+        collector.shutdown()
+
+    assert received.get("/v1/traces", 0) >= 1
+    assert received.get("/v1/metrics", 0) >= 1
@@ -0,0 +1,32 @@
+# tests/test_watchlists.py
+import json
+import pytest
+from santander_bot.core import watchlists
+from santander_bot.core.watchlists import WatchlistRegistry
+
+
+def test_user_names_are_validated(tmp_path):
+    registry = WatchlistRegistry(base=["PKO"], path=str(tmp_path / "w.json"))
+    for bad in ("", "../etc", "a b", "x" * 33, "<script>"):
+        with pytest.raises(ValueError):
+            registry.save(bad, ["CDR"])
+        assert registry.load(bad) is None
+
+    assert registry.save("jan.k-1", ["cdr.wa", "PKN"]) == ("CDR", "PKN")
+    assert registry.load("jan.k-1") == ("CDR", "PKN")
+
+
+def test_registry_and_list_sizes_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(watchlists, "MAX_USERS", 2)
+    monkeypatch.setattr(watchlists, "MAX_WATCHLIST", 3)
+    path = tmp_path / "w.json"
+    registry = WatchlistRegistry(base=["PKO"], path=str(path))
+    registry.save("a", ["CDR"])
+    registry.save("b", ["PKN"])
+
+    with pytest.raises(ValueError):
+        registry.save("c", ["PZU"])
+    with pytest.raises(ValueError):
+        registry.save("a", ["CDR", "PKN", "PZU", "KGH"])
+    assert registry.save("a", ["PZU"]) == ("PZU",)  # Istniejący użytkownik nadal może zmienić listę
+    assert json.loads(path.read_text()) == {"a": ["PZU"], "b": ["PKN"]}